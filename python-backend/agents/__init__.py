@@ -1,8 +1,25 @@
 """
 Agents package for OutreachGPT
+
+Agents are built on first use rather than at import time so the API starts
+without loading models or opening connections. Routes get them through
+``Depends(get_outreach_agent)`` / ``Depends(get_resolution_agent)``.
 """
 
-from .outreach_agent import OutreachAgent
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_outreach_agent():
+    """Return the shared OutreachAgent, created on first use"""
+    from .outreach_agent import OutreachAgent
+
+    return OutreachAgent()
+
+
+@lru_cache(maxsize=None)
+def get_resolution_agent():
+    """Return the shared ResolutionAgent, created on first use"""
+    from .resolution_agent import ResolutionAgent
 
-# Create a single instance of the agent to be used throughout the application
-agent = OutreachAgent()
+    return ResolutionAgent()
@@ -1,11 +1,12 @@
 from dotenv import load_dotenv
 import os
 import uuid
+import asyncio
 
 # Load environment variables at the very beginning
 load_dotenv()
 
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from langchain_community.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import StrOutputParser
@@ -13,51 +14,74 @@ from langchain.schema.runnable import Runnable, RunnablePassthrough
 from langchain.smith import RunEvalConfig, run_on_dataset
 from langsmith.run_helpers import traceable
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Pinecone
-from pinecone import Pinecone as PineconeClient
 from datetime import datetime
 import json
-from utils.db import supabase
+from utils import repositories
 from utils.email_utils import send_email
-
-# Initialize Pinecone
-pinecone_api_key = os.getenv("PINECONE_API_KEY")
-pinecone_environment = os.getenv("PINECONE_ENVIRONMENT")
-pinecone_index_name = os.getenv("PINECONE_INDEX", "ticket-ai")
-
-if not pinecone_api_key or not pinecone_environment:
-    raise ValueError(
-        "Missing Pinecone credentials. Please ensure PINECONE_API_KEY and PINECONE_ENVIRONMENT are set in your .env file"
-    )
-
-# Initialize Pinecone client using the modern class-based API
-pc = PineconeClient(api_key=pinecone_api_key, environment=pinecone_environment)
-index = pc.Index(pinecone_index_name)
-
-# Initialize embeddings
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-)
+from utils.concurrency import iter_bounded, run_bounded
+from utils.embedding_cache import CachedEmbeddings
+from utils.vector_store import create_vector_store
+from utils.context_builder import ContextBuilder, PromptContext, format_date
+from utils.llm_cache import cached_chat_model
+from utils.singleflight import context_flight
+from utils.context_cache import get_customer_context_cache
+from utils.metrics import stage, timed
+
+# Batch outreach tuning
+BATCH_CONCURRENCY = int(os.getenv("OUTREACH_BATCH_CONCURRENCY", "8"))
+BATCH_TIMEOUT = float(os.getenv("OUTREACH_BATCH_TIMEOUT", "60"))
+
+# Customer context loading
+CONTEXT_ROW_LIMIT = 5
+# Keep CONTEXT_BULK_CHUNK_SIZE x CONTEXT_ROW_LIMIT within PostgREST's max-rows
+# (1000 by default), or the per-customer reads are truncated
+CONTEXT_BULK_CHUNK_SIZE = int(os.getenv("OUTREACH_CONTEXT_CHUNK_SIZE", "200"))
+
+_embeddings: Optional[CachedEmbeddings] = None
+
+
+def get_embeddings() -> CachedEmbeddings:
+    """Return the shared embeddings, created on first use.
+
+    They sit behind a content-hash cache so identical texts (e.g. a prompt
+    shared by a whole batch) are only embedded once.
+    """
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(
+                model="text-embedding-3-small",
+            )
+        )
+    return _embeddings
 
 
 class OutreachAgent:
-    def __init__(self, callbacks=None):
+    def __init__(
+        self,
+        callbacks=None,
+        embeddings=None,
+        vector_store=None,
+        context_cache=None,
+        model=None,
+        llm_cache_mode=None,
+    ):
+        self.embeddings = embeddings or get_embeddings()
+        self.context_cache = context_cache or get_customer_context_cache()
+
         # Initialize the model with callbacks if provided
-        self.model = ChatOpenAI(
-            model="gpt-4o-mini", temperature=0.7, callbacks=callbacks
+        # Identical prompts can be served from the completion cache
+        # (llm_cache_mode, default LLM_CACHE_MODE, which is off)
+        self.model = model or cached_chat_model(
+            ChatOpenAI(model="gpt-4o-mini", temperature=0.7, callbacks=callbacks),
+            mode=llm_cache_mode,
         )
 
-        # Initialize vector store
-        try:
-            self.vector_store = Pinecone.from_existing_index(
-                index_name=pinecone_index_name,
-                embedding=embeddings,
-                namespace="outreach",
-            )
-            print(f"✓ Successfully connected to Pinecone index: {pinecone_index_name}")
-        except Exception as e:
-            print(f"Error initializing Pinecone: {e}")
-            raise
+        # Initialize vector store (Pinecone or local, see VECTOR_STORE_BACKEND)
+        # (an empty local index is falsy, so compare with None)
+        if vector_store is None:
+            vector_store = create_vector_store(self.embeddings)
+        self.vector_store = vector_store
 
         # Define the base prompt template
         self.prompt = ChatPromptTemplate.from_messages(
@@ -85,6 +109,46 @@ class OutreachAgent:
             ]
         )
 
+        # Create prompt template with stronger emphasis on using actual data
+        self.batch_prompt = ChatPromptTemplate.from_messages(
+            [
+                (
+                    "system",
+                    """You are a proactive customer engagement agent for a clothing store, representing Ticket.ai. 
+                Your primary goals are to:
+                1. Follow up on UNRESOLVED tickets that need attention
+                2. Turn past purchases into opportunities for personalized recommendations
+                3. Drive engagement and sales while maintaining excellent customer service
+                
+                Guidelines:
+                - ALWAYS start with "Hello [Full Name]," using their exact name
+                - Only mention UNRESOLVED tickets that need attention - do not bring up resolved issues
+                - Use past purchases and preferences to make relevant product recommendations
+                - Look for opportunities to suggest complementary items or new arrivals
+                - Be professional, friendly, and sales-oriented while addressing any outstanding concerns
+                - Keep the focus positive and forward-looking
+                - Sign off as "Ticket.ai"
+                
+                IMPORTANT:
+                - Check ticket status before mentioning any issues
+                - Never fabricate product recommendations - use actual customer history
+                - If making suggestions, tie them to their demonstrated preferences
+                - Balance addressing open issues with creating sales opportunities
+                """,
+                ),
+                (
+                    "user",
+                    """Customer Context:
+                {context}
+                
+                Query to respond to: {query}
+                
+                Remember: Focus on unresolved issues and sales opportunities based on their actual history.
+                Generate a response:""",
+                ),
+            ]
+        )
+
         # Define the chain with callbacks
         self.chain = (
             {
@@ -99,80 +163,28 @@ class OutreachAgent:
 
     @traceable(run_type="customer_context")
     async def get_customer_context(self, customer_id: str) -> str:
-        """Fetch comprehensive customer context from Supabase"""
+        """Fetch comprehensive customer context from Supabase.
+
+        The rows behind it are cached per customer and kept current by this
+        service's own writes (see ``utils.context_cache``); concurrent misses
+        for the same customer share one fetch.
+        """
         try:
-            # Fetch user data with preferences
-            user_response = (
-                supabase.table("users")
-                .select("*, preferences")
-                .eq("id", customer_id)
-                .single()
-                .execute()
-            )
+            version, rows = await self.context_cache.lookup(customer_id)
+            if rows is None:
+                rows = await context_flight.load(
+                    "customer_context",
+                    (customer_id, version),
+                    lambda: self._load_customer_rows(customer_id, version),
+                )
 
-            if not user_response or not user_response.data:
-                print(f"No user found for ID: {customer_id}")
+            if rows is None:
                 return "No user data available"
 
-            user_data = user_response.data
-            print(f"Retrieved user data for {customer_id}: {user_data}")  # Debug log
-
-            # Fetch tickets first since they're most important
-            tickets_response = (
-                supabase.table("tickets")
-                .select("*")
-                .eq("customer_id", customer_id)
-                .order("created_at", desc=True)
-                .limit(5)
-                .execute()
-            )
-
-            tickets = []
-            if tickets_response and hasattr(tickets_response, "data"):
-                tickets = tickets_response.data
-                print(
-                    f"Found {len(tickets)} tickets for user {customer_id}"
-                )  # Debug log
-            else:
-                print(f"No tickets found for user {customer_id}")  # Debug log
-
-            # Fetch recent interactions
-            interactions_response = (
-                supabase.table("interactions")
-                .select("*")
-                .eq("author_id", customer_id)
-                .order("created_at", desc=True)
-                .limit(5)
-                .execute()
+            return self.format_customer_context(
+                rows["user"], rows["tickets"], rows["interactions"]
             )
 
-            recent_interactions = []
-            if interactions_response and hasattr(interactions_response, "data"):
-                recent_interactions = interactions_response.data
-                print(
-                    f"Found {len(recent_interactions)} interactions for user {customer_id}"
-                )  # Debug log
-            else:
-                print(f"No interactions found for user {customer_id}")  # Debug log
-
-            # Format context with more structure and handle missing data
-            context = f"""
-            Customer Profile:
-            - Name: {user_data.get('name', 'Unknown')}
-            - Email: {user_data.get('email', 'Unknown')}
-            
-            Active Tickets:
-            {self.format_tickets(tickets) if tickets else "No active tickets found"}
-            
-            Recent Interactions:
-            {self.format_interactions(recent_interactions) if recent_interactions else "No recent interactions found"}
-            
-            Customer Preferences:
-            {json.dumps(user_data.get('preferences', {}), indent=2) if user_data.get('preferences') else "No specific preferences recorded"}
-            """
-
-            return context
-
         except Exception as e:
             print(f"Error fetching customer context: {str(e)}")
             import traceback
@@ -180,94 +192,221 @@ class OutreachAgent:
             print(f"Traceback: {traceback.format_exc()}")
             return f"Error fetching customer data: {str(e)}"
 
-    def format_interactions(self, interactions: List[Dict]) -> str:
-        """Format interactions in a readable way with better null handling"""
-        if not interactions:
-            return "No recent interactions"
+    async def _load_customer_rows(
+        self, customer_id: str, version: int
+    ) -> Optional[Dict]:
+        # Fetch user data with preferences
+        user_data = await repositories.get_user(customer_id, "*, preferences")
 
-        formatted = []
-        for interaction in interactions:
-            if interaction is None:
-                continue
+        if not user_data:
+            print(f"No user found for ID: {customer_id}")
+            return None
 
-            # Safely get values with defaults
-            created_at = interaction.get("created_at", "Unknown date")
-            interaction_type = interaction.get("type", "Unknown type")
-            content = interaction.get("content", "No content")
+        print(f"Retrieved user data for {customer_id}: {user_data}")  # Debug log
 
-            # Safely handle nested metadata
-            metadata = interaction.get("metadata", {})
-            success = (
-                "Unknown" if metadata is None else metadata.get("success", "Unknown")
-            )
+        # Fetch tickets and recent interactions together
+        tickets, recent_interactions = await asyncio.gather(
+            repositories.list_customer_tickets(customer_id, CONTEXT_ROW_LIMIT),
+            repositories.list_author_interactions(customer_id, CONTEXT_ROW_LIMIT),
+        )
+        print(f"Found {len(tickets)} tickets for user {customer_id}")  # Debug log
+        print(
+            f"Found {len(recent_interactions)} interactions for user {customer_id}"
+        )  # Debug log
+
+        rows = {
+            "user": user_data,
+            "tickets": tickets,
+            "interactions": recent_interactions,
+        }
+        await self.context_cache.store(customer_id, version, rows)
+        return rows
+
+    @traceable(run_type="customer_context")
+    async def get_customer_contexts(self, customer_ids: List[str]) -> Dict[str, str]:
+        """Fetch customer contexts for many customers in a constant number of queries.
+
+        Customers whose rows are cached are served from the cache. The rest are
+        loaded with one query per table for each chunk of
+        ``CONTEXT_BULK_CHUNK_SIZE`` IDs, with tickets and interactions capped
+        at ``CONTEXT_ROW_LIMIT`` per customer in the database, and split per
+        customer in memory.
+        Returns a mapping of customer ID to the same formatted context string
+        produced by ``get_customer_context``.
+        """
+        contexts = {}
+        versions = {}
+        unique_ids = list(dict.fromkeys(customer_ids))
+        lookups = await asyncio.gather(
+            *[self.context_cache.lookup(customer_id) for customer_id in unique_ids]
+        )
+        for customer_id, (version, rows) in zip(unique_ids, lookups):
+            if rows is not None:
+                contexts[customer_id] = self.format_customer_context(
+                    rows["user"], rows["tickets"], rows["interactions"]
+                )
+            else:
+                versions[customer_id] = version
+        missing_ids = list(versions)
+
+        for start in range(0, len(missing_ids), CONTEXT_BULK_CHUNK_SIZE):
+            chunk = missing_ids[start : start + CONTEXT_BULK_CHUNK_SIZE]
 
-            formatted.append(
-                f"""
-            Date: {created_at}
-            Type: {interaction_type}
-            Content: {content}
-            Success: {success}
-            """
+            user_rows, ticket_rows, interaction_rows = await asyncio.gather(
+                repositories.get_users(chunk, "*, preferences"),
+                repositories.list_tickets_for_customers(chunk, CONTEXT_ROW_LIMIT),
+                repositories.list_interactions_for_authors(chunk, CONTEXT_ROW_LIMIT),
             )
 
-        return "\n".join(formatted) if formatted else "No valid interactions found"
+            users = {user["id"]: user for user in user_rows}
+            tickets = self._group_latest(ticket_rows, "customer_id")
+            interactions = self._group_latest(interaction_rows, "author_id")
+            print(
+                f"Loaded context rows for {len(users)}/{len(chunk)} customers"
+            )  # Debug log
+
+            for customer_id in chunk:
+                user_data = users.get(customer_id)
+                if not user_data:
+                    print(f"No user found for ID: {customer_id}")
+                    contexts[customer_id] = "No user data available"
+                    continue
+
+                rows = {
+                    "user": user_data,
+                    "tickets": tickets.get(customer_id, []),
+                    "interactions": interactions.get(customer_id, []),
+                }
+                await self.context_cache.store(customer_id, versions[customer_id], rows)
+                contexts[customer_id] = self.format_customer_context(
+                    rows["user"], rows["tickets"], rows["interactions"]
+                )
+
+        return contexts
+
+    @staticmethod
+    def _group_latest(
+        rows: Optional[List[Dict]], key: str, limit: int = CONTEXT_ROW_LIMIT
+    ) -> Dict[str, List[Dict]]:
+        """Group rows (already sorted newest first) by ``key``, keeping ``limit`` each"""
+        grouped: Dict[str, List[Dict]] = {}
+        for row in rows or []:
+            bucket = grouped.setdefault(row.get(key), [])
+            if len(bucket) < limit:
+                bucket.append(row)
+        return grouped
+
+    def format_customer_context(
+        self, user_data: Dict, tickets: List[Dict], recent_interactions: List[Dict]
+    ) -> PromptContext:
+        """Build compact prompt context for a customer within the token budget.
+
+        Sections are ranked open tickets, recent interactions, preferences,
+        then purchase history and resolved tickets.
+        """
+        builder = ContextBuilder()
+        builder.header(
+            f"Customer: {user_data.get('name') or 'Unknown'} "
+            f"<{user_data.get('email') or 'Unknown'}>"
+        )
+
+        open_tickets, purchases, resolved = self.ticket_entries(tickets, builder)
+        builder.section("Open tickets", open_tickets, empty="none")
+        builder.section(
+            "Recent interactions",
+            self.interaction_entries(recent_interactions, builder),
+            empty="none",
+        )
+        preferences = user_data.get("preferences")
+        builder.section(
+            "Preferences",
+            [builder.field(preferences)] if preferences else [],
+            empty="none recorded",
+        )
+        builder.section("Purchase history", purchases)
+        builder.section("Recently resolved", resolved)
+
+        return builder.build()
 
-    def format_tickets(self, tickets: List[Dict]) -> str:
-        """Format tickets in a readable way, organizing by status and highlighting purchases"""
-        if not tickets:
-            return "No recent tickets"
+    def interaction_entries(
+        self, interactions: List[Dict], builder: ContextBuilder
+    ) -> List[str]:
+        """One compact line per interaction, skipping missing rows"""
+        entries = []
+        for interaction in interactions or []:
+            if interaction is None:
+                continue
+
+            metadata = interaction.get("metadata") or {}
+            entry = (
+                f"{format_date(interaction.get('created_at'))} "
+                f"{interaction.get('type') or 'UNKNOWN'}: "
+                f"{builder.field(interaction.get('content') or 'no content')}"
+            )
+            if "success" in metadata:
+                entry += f" (success: {metadata['success']})"
+            entries.append(entry)
+        return entries
 
-        # Separate tickets by status
-        open_tickets = []
-        resolved_tickets = []
-        purchase_history = []
+    def ticket_entries(self, tickets: List[Dict], builder: ContextBuilder) -> tuple:
+        """Compact ticket lines split into (open, purchases, resolved)"""
+        open_tickets, purchase_history, resolved_tickets = [], [], []
 
-        for ticket in tickets:
-            status = ticket.get("status", "").upper()
+        for ticket in tickets or []:
+            status = (ticket.get("status") or "").upper()
             tags = [
                 tag["tags"]["name"]
                 for tag in ticket.get("ticket_tags", [])
                 if tag.get("tags")
             ]
 
-            formatted_ticket = f"""
-            Title: {ticket.get('title')}
-            Status: {status}
-            Priority: {ticket.get('priority')}
-            Created: {ticket.get('created_at')}
-            Tags: {', '.join(tags) if tags else 'None'}
-            Description: {ticket.get('description')}
-            """
+            entry = (
+                f"[{ticket.get('priority') or 'NONE'}] {ticket.get('title')} "
+                f"({status}, {format_date(ticket.get('created_at'))})"
+            )
+            if tags:
+                entry += f" tags: {', '.join(tags)}"
+            if ticket.get("description"):
+                entry += f" - {builder.field(ticket['description'])}"
 
             # Categorize tickets
             if "PURCHASE" in tags or "ORDER" in tags:
-                purchase_history.append(formatted_ticket)
+                purchase_history.append(entry)
             elif status in ["RESOLVED", "CLOSED", "COMPLETED"]:
-                resolved_tickets.append(formatted_ticket)
+                resolved_tickets.append(entry)
             else:
-                open_tickets.append(formatted_ticket)
-
-        # Combine sections with headers
-        sections = []
-        if open_tickets:
-            sections.append("=== Open Tickets ===\n" + "\n".join(open_tickets))
-        if purchase_history:
-            sections.append("=== Purchase History ===\n" + "\n".join(purchase_history))
-        if resolved_tickets:
-            sections.append("=== Recently Resolved ===\n" + "\n".join(resolved_tickets))
+                open_tickets.append(entry)
 
-        return "\n\n".join(sections)
+        return open_tickets, purchase_history, resolved_tickets
 
     @traceable(run_type="similar_interactions")
-    async def get_similar_interactions(self, customer_id: str, query: str) -> str:
-        """Find similar successful interactions from Pinecone"""
+    async def get_similar_interactions(
+        self,
+        customer_id: str,
+        query: str,
+        query_embedding: Optional[List[float]] = None,
+    ) -> str:
+        """Find similar successful interactions in the vector store.
+
+        Pass ``query_embedding`` to reuse a vector that was already computed,
+        e.g. for a prompt shared by many customers.
+        """
         try:
+            if query_embedding is None:
+                query_embedding = await self.embeddings.aembed_query(query)
+
             # Search for similar interactions
-            results = self.vector_store.similarity_search(
-                query, filter={"customer_id": customer_id, "success": True}, k=3
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                None,
+                lambda: self.vector_store.similarity_search_by_vector_with_score(
+                    query_embedding,
+                    filter={"customer_id": customer_id, "success": True},
+                    k=3,
+                ),
             )
 
-            return "\n".join(str(r.page_content) for r in results)
+            return "\n".join(str(doc.page_content) for doc, _ in results)
 
         except Exception as e:
             print(f"Error finding similar interactions: {str(e)}")
@@ -275,41 +414,63 @@ class OutreachAgent:
 
     @traceable(run_type="store_interaction")
     async def store_interaction(self, customer_id: str, message: str, success: bool):
-        """Store interaction in both Supabase and Pinecone"""
+        """Store interaction in both Supabase and the vector store"""
+        await self.store_interactions(customer_id, [message], success)
+
+    @traceable(run_type="store_interaction")
+    async def store_interactions(
+        self, customer_id: str, messages: List[str], success: bool
+    ):
+        """Store several interactions with one insert and one batched embedding call"""
         try:
+            timestamp = datetime.now().isoformat()
+
             # Store in Supabase
-            interaction_data = {
-                "author_id": customer_id,
-                "content": message,
-                "type": "outreach",
-                "ticket_id": str(
-                    uuid.uuid4()
-                ),  # Generate a placeholder ticket ID for testing
-                "metadata": {
-                    "success": success,
-                    "timestamp": datetime.now().isoformat(),
-                },
-            }
-            supabase.table("interactions").insert(interaction_data).execute()
+            interactions = [
+                {
+                    "author_id": customer_id,
+                    "content": message,
+                    "type": "outreach",
+                    "ticket_id": str(
+                        uuid.uuid4()
+                    ),  # Generate a placeholder ticket ID for testing
+                    "metadata": {"success": success, "timestamp": timestamp},
+                }
+                for message in messages
+            ]
+            created = await repositories.insert_interactions(interactions)
 
-            # Store in Pinecone
-            vector = embeddings.embed_query(message)
-            self.vector_store.add_texts(
-                texts=[message],
-                metadatas=[
-                    {
-                        "customer_id": customer_id,
-                        "success": success,
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                ],
-                embeddings=[vector],
+            # Keep the cached customer context current, newest first
+            created = created or [
+                {**interaction, "created_at": timestamp} for interaction in interactions
+            ]
+            await self.context_cache.add_interactions(
+                customer_id, list(reversed(created)), CONTEXT_ROW_LIMIT
+            )
+
+            # Store in the vector store; add_texts embeds every message through the
+            # cached embeddings in a single embed_documents call
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None,
+                lambda: self.vector_store.add_texts(
+                    texts=messages,
+                    metadatas=[
+                        {
+                            "customer_id": customer_id,
+                            "success": success,
+                            "timestamp": timestamp,
+                        }
+                        for _ in messages
+                    ],
+                ),
             )
 
         except Exception as e:
             print(f"Error storing interaction: {str(e)}")
 
     @traceable(run_type="generate_outreach")
+    @timed("generate_outreach")
     async def generate_outreach(
         self, request: str, customer_id: str, options: Optional[Dict] = None
     ) -> Dict:
@@ -318,53 +479,54 @@ class OutreachAgent:
             start_time = datetime.now()
 
             # Get context and similar interactions first
-            db_context = await self.get_customer_context(customer_id)
-            similar_interactions = await self.get_similar_interactions(
-                customer_id, request
-            )
+            with stage("generate_outreach", "context"):
+                db_context = await self.get_customer_context(customer_id)
+            with stage("generate_outreach", "vector_search"):
+                similar_interactions = await self.get_similar_interactions(
+                    customer_id, request
+                )
 
             # Then invoke the chain with the gathered data
-            result = await self.chain.ainvoke(
-                {
-                    "request": request,
-                    "db_context": db_context,
-                    "similar_interactions": similar_interactions,
-                    "options": options or {},
-                }
-            )
+            with stage("generate_outreach", "llm"):
+                result = await self.chain.ainvoke(
+                    {
+                        "request": request,
+                        "db_context": db_context,
+                        "similar_interactions": similar_interactions,
+                        "options": options or {},
+                    }
+                )
 
             response_time = (datetime.now() - start_time).total_seconds()
 
             # Get customer email from context
-            user_response = (
-                supabase.table("users")
-                .select("email")
-                .eq("id", customer_id)
-                .single()
-                .execute()
-            )
+            with stage("generate_outreach", "db_read"):
+                user_data = await repositories.get_user(customer_id, "email")
 
-            if user_response and user_response.data:
-                customer_email = user_response.data.get("email")
+            if user_data:
+                customer_email = user_data.get("email")
                 if customer_email:
                     try:
-                        await send_email(
-                            to=customer_email,
-                            subject="TicketAI: Updates and Recommendations",
-                            body=result,
-                            # Don't pass ticket_id for outreach emails
-                        )
+                        with stage("generate_outreach", "email"):
+                            await send_email(
+                                to=customer_email,
+                                subject="TicketAI: Updates and Recommendations",
+                                body=result,
+                                # Don't pass ticket_id for outreach emails
+                            )
                     except Exception as e:
                         print(f"Error sending outreach email: {str(e)}")
 
             # Store the interaction
-            await self.store_interaction(customer_id, result, True)
+            with stage("generate_outreach", "db_write"):
+                await self.store_interaction(customer_id, result, True)
 
             return {
                 "response": result,
                 "metadata": {
                     "response_time": response_time,
                     "model_used": "gpt-4o-mini",
+                    "context_tokens": getattr(db_context, "tokens", None),
                     "timestamp": datetime.now().isoformat(),
                 },
             }
@@ -375,86 +537,121 @@ class OutreachAgent:
             raise
 
     @traceable(run_type="batch_outreach")
+    @timed("batch_outreach")
     async def generate_batch_outreach(
         self, requests: List[Dict], options: Optional[Dict] = None
     ) -> List[Dict]:
-        """Generate personalized outreach messages for multiple users"""
-        results = []
-        for request in requests:
-            try:
-                # Get customer context
-                context = await self.get_customer_context(request["customer_id"])
-
-                if context == "No user data available":
-                    raise ValueError(
-                        f"No user data found for customer {request['customer_id']}"
-                    )
+        """Generate personalized outreach messages for multiple users.
 
-                # Create prompt template with stronger emphasis on using actual data
-                prompt = ChatPromptTemplate.from_messages(
-                    [
-                        (
-                            "system",
-                            """You are a proactive customer engagement agent for a clothing store, representing Ticket.ai. 
-                Your primary goals are to:
-                1. Follow up on UNRESOLVED tickets that need attention
-                2. Turn past purchases into opportunities for personalized recommendations
-                3. Drive engagement and sales while maintaining excellent customer service
-                
-                Guidelines:
-                - ALWAYS start with "Hello [Full Name]," using their exact name
-                - Only mention UNRESOLVED tickets that need attention - do not bring up resolved issues
-                - Use past purchases and preferences to make relevant product recommendations
-                - Look for opportunities to suggest complementary items or new arrivals
-                - Be professional, friendly, and sales-oriented while addressing any outstanding concerns
-                - Keep the focus positive and forward-looking
-                - Sign off as "Ticket.ai"
-                
-                IMPORTANT:
-                - Check ticket status before mentioning any issues
-                - Never fabricate product recommendations - use actual customer history
-                - If making suggestions, tie them to their demonstrated preferences
-                - Balance addressing open issues with creating sales opportunities
-                """,
-                        ),
-                        (
-                            "user",
-                            """Customer Context:
-                {context}
-                
-                Query to respond to: {query}
-                
-                Remember: Focus on unresolved issues and sales opportunities based on their actual history.
-                Generate a response:""",
-                        ),
-                    ]
-                )
+        Customers are processed concurrently, bounded by ``options["concurrency"]``
+        (default ``OUTREACH_BATCH_CONCURRENCY``) with a per-customer timeout of
+        ``options["timeout"]`` seconds. Results are returned in input order.
+        """
+        options = options or {}
+        concurrency = int(options.get("concurrency") or BATCH_CONCURRENCY)
+        timeout = float(options.get("timeout") or BATCH_TIMEOUT)
 
-                # Format messages and get response
-                messages = prompt.format_messages(
-                    context=context, query=request["request"]
+        # Load every customer's context up front in a handful of bulk queries
+        try:
+            with stage("batch_outreach", "context"):
+                contexts = await self.get_customer_contexts(
+                    [request["customer_id"] for request in requests]
                 )
+        except Exception as e:
+            print(f"Error bulk loading customer contexts: {str(e)}")
+            contexts = {}
 
-                response = await self.model.ainvoke(messages)
+        async def worker(request: Dict) -> Dict:
+            return await self._generate_batch_item(
+                request, contexts.get(request["customer_id"])
+            )
 
-                results.append(
-                    {
-                        "customer_id": request["customer_id"],
-                        "response": response.content,
-                        "metadata": {
-                            "timestamp": datetime.now().isoformat(),
-                            "model": "gpt-4o-mini",
-                        },
-                    }
-                )
+        return await run_bounded(
+            requests,
+            worker,
+            concurrency=concurrency,
+            timeout=timeout,
+            on_error=self._batch_item_error,
+        )
 
+    async def iter_batch_outreach(
+        self, requests: List[Dict], options: Optional[Dict] = None
+    ) -> AsyncIterator[List[Tuple[int, Dict]]]:
+        """Generate a batch like ``generate_batch_outreach``, yielding as it goes.
+
+        Yields lists of ``(index, result)`` for the drafts that finished since
+        the previous step. Contexts are loaded one chunk of
+        ``CONTEXT_BULK_CHUNK_SIZE`` customers at a time, so memory use doesn't
+        grow with the size of the batch.
+        """
+        options = options or {}
+        concurrency = int(options.get("concurrency") or BATCH_CONCURRENCY)
+        timeout = float(options.get("timeout") or BATCH_TIMEOUT)
+
+        for offset in range(0, len(requests), CONTEXT_BULK_CHUNK_SIZE):
+            chunk = requests[offset : offset + CONTEXT_BULK_CHUNK_SIZE]
+            try:
+                with stage("batch_outreach", "context"):
+                    contexts = await self.get_customer_contexts(
+                        [request["customer_id"] for request in chunk]
+                    )
             except Exception as e:
-                print(
-                    f"Error generating outreach for customer {request['customer_id']}: {str(e)}"
+                print(f"Error bulk loading customer contexts: {str(e)}")
+                contexts = {}
+
+            async def worker(request: Dict) -> Dict:
+                return await self._generate_batch_item(
+                    request, contexts.get(request["customer_id"])
                 )
-                results.append({"customer_id": request["customer_id"], "error": str(e)})
 
-        return results
+            async for finished in iter_bounded(
+                chunk,
+                worker,
+                concurrency=concurrency,
+                timeout=timeout,
+                on_error=self._batch_item_error,
+            ):
+                yield [(offset + index, result) for index, result in finished]
+
+    @staticmethod
+    def _batch_item_error(request: Dict, e: Exception) -> Dict:
+        """Result recorded for a batch entry that failed or timed out"""
+        print(
+            f"Error generating outreach for customer {request['customer_id']}: {str(e)}"
+        )
+        return {"customer_id": request["customer_id"], "error": str(e)}
+
+    async def _generate_batch_item(
+        self, request: Dict, context: Optional[str] = None
+    ) -> Dict:
+        """Generate the outreach draft for a single entry of a batch"""
+        # Fall back to a per-customer fetch if the context wasn't preloaded
+        if context is None:
+            with stage("batch_outreach", "context"):
+                context = await self.get_customer_context(request["customer_id"])
+
+        if context == "No user data available":
+            raise ValueError(
+                f"No user data found for customer {request['customer_id']}"
+            )
+
+        # Format messages and get response
+        messages = self.batch_prompt.format_messages(
+            context=context, query=request["request"]
+        )
+
+        with stage("batch_outreach", "llm"):
+            response = await self.model.ainvoke(messages)
+
+        return {
+            "customer_id": request["customer_id"],
+            "response": response.content,
+            "metadata": {
+                "timestamp": datetime.now().isoformat(),
+                "model": "gpt-4o-mini",
+                "context_tokens": getattr(context, "tokens", None),
+            },
+        }
 
     def evaluate_performance(self, eval_dataset: List[Dict]):
         """Evaluate agent performance on a test dataset"""
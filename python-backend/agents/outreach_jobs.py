@@ -0,0 +1,252 @@
+"""
+Background batch outreach jobs.
+
+A job is an ``agent_outreach_sessions`` row: the users, prompt and options
+are kept in its ``metadata`` and progress in its ``completion_metrics``, so
+the job ID is the session ID. Customers are processed in chunks of
+``OUTREACH_JOB_CHUNK_SIZE``; after each chunk the per-customer results are
+written back to the session. A job that is interrupted (crash, restart or
+failure) is resumed by skipping every customer already recorded there.
+"""
+
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from utils import repositories
+from utils.email_log_writer import EmailLogWriter
+from utils.jobs import LocalJobQueue
+
+JOB_CHUNK_SIZE = int(os.getenv("OUTREACH_JOB_CHUNK_SIZE", "50"))
+
+# ACTIVE jobs whose progress hasn't moved for this long are considered
+# abandoned by a crashed worker and are picked up again on startup
+JOB_STALE_SECONDS = float(os.getenv("OUTREACH_JOB_STALE_SECONDS", "300"))
+
+JOB_TYPE = "batch_outreach_job"
+
+
+def draft_from_result(user: Dict[str, str], result: Dict) -> Dict:
+    """The draft returned to the client for one batch result"""
+    if "error" in result:
+        return {
+            "userId": user["id"],
+            "content": f"Error: {result['error']}",
+            "status": "error",
+        }
+    return {"userId": user["id"], "content": result["response"], "status": "draft"}
+
+
+def draft_log_row(user: Dict[str, str], result: Dict) -> Dict:
+    """The email_logs row recording one batch result"""
+    return {
+        "recipient_email": user["email"],
+        "status": "FAILED",  # Start with FAILED
+        "ai_draft": (
+            f"Error: {result['error']}" if "error" in result else result["response"]
+        ),
+        "source": "AI",
+        "error_message": result.get("error") if "error" in result else None,
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+async def create_batch_job(
+    users: List[Dict[str, str]], prompt: str, options: Optional[Dict] = None
+) -> Dict:
+    """Record a batch outreach job and queue it. Returns its status."""
+    batch_id = str(uuid.uuid4())
+    session_rows = await repositories.create_outreach_session(
+        {
+            "customer_id": users[0]["id"],  # Primary target
+            "status": "ACTIVE",
+            "session_goals": {
+                "type": JOB_TYPE,
+                "prompt": prompt,
+                "target_count": len(users),
+            },
+            "metadata": {
+                "batch_id": batch_id,
+                "all_targets": [user["id"] for user in users],
+                "users": [{"id": user["id"], "email": user["email"]} for user in users],
+                "options": options or {},
+            },
+            "completion_metrics": _metrics("queued", len(users), {}),
+        }
+    )
+    session = session_rows[0]
+    await job_queue.enqueue(session["id"])
+    return job_status(session)
+
+
+async def get_batch_job(job_id: str) -> Optional[Dict]:
+    """Current status of a job, or None if there is no such job"""
+    session = await repositories.get_outreach_session(job_id)
+    if not session or (session.get("session_goals") or {}).get("type") != JOB_TYPE:
+        return None
+    return job_status(session)
+
+
+async def resume_batch_job(job_id: str) -> Optional[Dict]:
+    """Queue an unfinished job again; completed jobs are left alone"""
+    session = await repositories.get_outreach_session(job_id)
+    if not session or (session.get("session_goals") or {}).get("type") != JOB_TYPE:
+        return None
+    if session["status"] == "COMPLETED" or job_queue.is_active(job_id):
+        return job_status(session)
+
+    metrics = dict(session.get("completion_metrics") or {})
+    metrics.update(status="queued", updated_at=_now())
+    metrics.pop("error", None)
+    await repositories.update_outreach_session(
+        job_id, {"status": "ACTIVE", "completion_metrics": metrics}
+    )
+    await job_queue.enqueue(job_id)
+    return job_status({**session, "status": "ACTIVE", "completion_metrics": metrics})
+
+
+async def recover_batch_jobs() -> List[str]:
+    """Queue ACTIVE jobs that no worker has touched for JOB_STALE_SECONDS"""
+    recovered = []
+    for session in await repositories.list_outreach_sessions("ACTIVE"):
+        if (session.get("session_goals") or {}).get("type") != JOB_TYPE:
+            continue
+        updated_at = (session.get("completion_metrics") or {}).get("updated_at")
+        if updated_at and _age_seconds(updated_at) < JOB_STALE_SECONDS:
+            continue
+        if await job_queue.enqueue(session["id"]):
+            recovered.append(session["id"])
+    if recovered:
+        print(f"✓ Resuming {len(recovered)} interrupted batch outreach job(s)")
+    return recovered
+
+
+async def run_batch_job(job_id: str):
+    """Generate and log the drafts a job still needs, recording progress"""
+    session = await repositories.get_outreach_session(job_id)
+    if not session or session["status"] != "ACTIVE":
+        return
+
+    from agents import get_outreach_agent
+
+    agent = get_outreach_agent()
+    goals = session["session_goals"]
+    metadata = session["metadata"]
+    users = metadata["users"]
+    customers: Dict[str, Dict] = dict(
+        (session.get("completion_metrics") or {}).get("customers") or {}
+    )
+
+    try:
+        await _save_progress(job_id, "running", len(users), customers)
+
+        remaining = [user for user in users if user["id"] not in customers]
+        for offset in range(0, len(remaining), JOB_CHUNK_SIZE):
+            chunk = remaining[offset : offset + JOB_CHUNK_SIZE]
+            requests = [
+                {"customer_id": user["id"], "request": goals["prompt"]}
+                for user in chunk
+            ]
+
+            # Results only count as done once their email_logs rows exist
+            results: Dict[int, Dict] = {}
+            async with EmailLogWriter() as log_writer:
+                async for finished in agent.iter_batch_outreach(
+                    requests, metadata.get("options")
+                ):
+                    for index, result in finished:
+                        results[index] = result
+                        await log_writer.add(index, draft_log_row(chunk[index], result))
+
+            for index, user in enumerate(chunk):
+                result = results[index]
+                if index in log_writer.errors:
+                    customers[user["id"]] = {
+                        "status": "error",
+                        "error": log_writer.errors[index],
+                    }
+                elif "error" in result:
+                    customers[user["id"]] = {
+                        "status": "error",
+                        "error": result["error"],
+                        "email_log_id": log_writer.ids.get(index),
+                    }
+                else:
+                    customers[user["id"]] = {
+                        "status": "draft",
+                        "email_log_id": log_writer.ids.get(index),
+                    }
+
+            await _save_progress(job_id, "running", len(users), customers)
+
+        metrics = _metrics("completed", len(users), customers)
+        metrics["completed_at"] = metrics["updated_at"]
+        await repositories.update_outreach_session(
+            job_id, {"status": "COMPLETED", "completion_metrics": metrics}
+        )
+
+    except Exception as e:
+        print(f"Error in batch outreach job {job_id}: {str(e)}")
+        metrics = _metrics("failed", len(users), customers)
+        metrics["error"] = str(e)
+        try:
+            await repositories.update_outreach_session(
+                job_id, {"status": "FAILED", "completion_metrics": metrics}
+            )
+        except Exception as update_error:
+            print(f"Error updating session status: {str(update_error)}")
+
+
+def job_status(session: Dict) -> Dict:
+    """Public view of a job session"""
+    metrics = session.get("completion_metrics") or {}
+    total = metrics.get("total_processed", 0) + metrics.get("pending", 0)
+    return {
+        "job_id": session["id"],
+        "batch_id": (session.get("metadata") or {}).get("batch_id"),
+        "status": metrics.get("status"),
+        "session_status": session.get("status"),
+        "total": total,
+        "processed": metrics.get("total_processed", 0),
+        "successful": metrics.get("successful", 0),
+        "failed": metrics.get("failed", 0),
+        "progress": metrics.get("total_processed", 0) / total if total else 1.0,
+        "customers": metrics.get("customers", {}),
+        "error": metrics.get("error"),
+        "updated_at": metrics.get("updated_at"),
+        "completed_at": metrics.get("completed_at"),
+    }
+
+
+async def _save_progress(job_id: str, status: str, total: int, customers: Dict):
+    await repositories.update_outreach_session(
+        job_id, {"completion_metrics": _metrics(status, total, customers)}
+    )
+
+
+def _metrics(status: str, total: int, customers: Dict[str, Dict]) -> Dict:
+    failed = sum(1 for entry in customers.values() if entry["status"] == "error")
+    return {
+        "status": status,
+        "total_processed": len(customers),
+        "successful": len(customers) - failed,
+        "failed": failed,
+        "pending": total - len(customers),
+        "customers": customers,
+        "updated_at": _now(),
+    }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _age_seconds(timestamp: str) -> float:
+    updated_at = datetime.fromisoformat(timestamp)
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - updated_at).total_seconds()
+
+
+job_queue = LocalJobQueue(run_batch_job)
@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 import os
 import uuid
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import StrOutputParser
@@ -10,63 +10,125 @@ from langsmith.run_helpers import traceable
 from datetime import datetime
 import json
 import time
-from utils.db import supabase
-from utils.email_utils import send_email
+from utils import repositories
+from utils.concurrency import run_bounded
+from utils.email_utils import send_bulk_emails, send_email
+from utils.telemetry import get_langsmith_client, telemetry
+from utils.context_builder import ContextBuilder, PromptContext, format_date
+from utils.llm_cache import cached_chat_model
+from utils.singleflight import context_flight
+from utils.context_cache import get_customer_context_cache
+from utils.metrics import stage, timed
+from models.ticket import (
+    TICKET_SNAPSHOT_COLUMNS,
+    TicketInteraction,
+    TicketSnapshot,
+)
 from langsmith import Client
-from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.tracers import LangChainTracer
 import asyncio
+from pydantic import ValidationError
 
 # Load environment variables
 load_dotenv()
 
-# Initialize LangSmith client with project
+# LangSmith project used for tracing resolutions
 LANGSMITH_PROJECT = "ticket-resolution-project"
-langsmith_client = Client()
-
-# Create a tracer for the project
-tracer = LangChainTracer(project_name=LANGSMITH_PROJECT, client=langsmith_client)
-callback_manager = CallbackManager([tracer])
-
-# Try to create project only if it doesn't exist
-try:
-    # First check if project exists
-    projects = langsmith_client.list_projects()
-    project_exists = any(p.name == LANGSMITH_PROJECT for p in projects)
-
-    if not project_exists:
-        langsmith_client.create_project(
-            LANGSMITH_PROJECT,
-            description="Ticket Resolution System - Tracking metrics for resolution accuracy and performance",
-        )
-        print(f"✓ Created new LangSmith project: {LANGSMITH_PROJECT}")
-    else:
-        print(f"✓ Using existing LangSmith project: {LANGSMITH_PROJECT}")
-except Exception as e:
-    print(f"Note: Using default project. Details: {str(e)}")
+
+# Resolutions generated at once by resolve_tickets
+RESOLUTION_BATCH_CONCURRENCY = int(os.getenv("RESOLUTION_BATCH_CONCURRENCY", "8"))
+
+# Tickets read per query by resolve_tickets; each chunk's IDs go into one
+# in_() filter in the request URL, so keep it well under URL length limits
+RESOLUTION_BATCH_CHUNK_SIZE = int(os.getenv("RESOLUTION_BATCH_CHUNK_SIZE", "200"))
+
+# Batch resolution skips tickets in these states, so a batch can be retried
+CLOSED_STATUSES = ("RESOLVED", "CLOSED")
+ALREADY_RESOLVED = "Ticket is already resolved or closed"
+NOT_RESOLVED = "Ticket was not resolved by this batch"
+
+_tracer: Optional[LangChainTracer] = None
+
+
+def get_tracer() -> LangChainTracer:
+    """Return the project tracer, ensuring the project exists on first use."""
+    global _tracer
+    if _tracer is None:
+        client = get_langsmith_client()
+        ensure_langsmith_project(client)
+        _tracer = LangChainTracer(project_name=LANGSMITH_PROJECT, client=client)
+    return _tracer
+
+
+def ensure_langsmith_project(client: Client):
+    """Create the LangSmith project only if it doesn't exist"""
+    try:
+        # First check if project exists
+        projects = client.list_projects()
+        project_exists = any(p.name == LANGSMITH_PROJECT for p in projects)
+
+        if not project_exists:
+            client.create_project(
+                LANGSMITH_PROJECT,
+                description="Ticket Resolution System - Tracking metrics for resolution accuracy and performance",
+            )
+            print(f"✓ Created new LangSmith project: {LANGSMITH_PROJECT}")
+        else:
+            print(f"✓ Using existing LangSmith project: {LANGSMITH_PROJECT}")
+    except Exception as e:
+        print(f"Note: Using default project. Details: {str(e)}")
+
+
+def resolution_email(ticket_title: str, resolution_text: str) -> Dict[str, str]:
+    """The subject and body of a resolution email"""
+    # Clean up resolution text to remove any duplicate closings
+    cleaned_resolution = (
+        resolution_text.replace("Best regards,\nTicketAI", "")
+        .replace("If you have any questions", "")
+        .strip()
+    )
+
+    email_body = f"""
+            <h2 style="color: #2d3748; margin-bottom: 20px;">Dear Customer,</h2>
+            
+            <div style="margin-bottom: 24px;">
+                {cleaned_resolution}
+            </div>
+            
+            <div class="signature">
+                Best regards,<br>
+                TicketAI
+            </div>
+            """
+    return {"subject": f"Resolution: {ticket_title}", "body": email_body}
 
 
 class ResolutionAgent:
-    def __init__(self, callbacks=None):
-        # Combine custom callbacks with our tracer
-        self.combined_callbacks = [tracer]
+    def __init__(self, callbacks=None, model=None, client=None, tracing=True):
+        # Combine custom callbacks with our tracer (off for offline runs)
+        self.combined_callbacks = [get_tracer()] if tracing else []
         if callbacks:
             self.combined_callbacks.extend(callbacks)
 
         # Initialize the model with combined callbacks
-        self.model = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7,
-            callbacks=self.combined_callbacks,
-            tags=["ticket_resolution"],
+        # Identical prompts can be served from the completion cache
+        # (LLM_CACHE_MODE, off by default)
+        self.model = model or cached_chat_model(
+            ChatOpenAI(
+                model="gpt-4o-mini",
+                temperature=0.7,
+                callbacks=self.combined_callbacks,
+                tags=["ticket_resolution"],
+            )
         )
 
         # Set the project for tracing
-        os.environ["LANGCHAIN_PROJECT"] = LANGSMITH_PROJECT
-        os.environ["LANGCHAIN_TRACING_V2"] = "true"
+        if tracing:
+            os.environ["LANGCHAIN_PROJECT"] = LANGSMITH_PROJECT
+            os.environ["LANGCHAIN_TRACING_V2"] = "true"
 
-        # Create a tracer for this instance
-        self.client = Client()
+        # Share the LangSmith client used by the tracer
+        self.client = client or get_langsmith_client()
 
         # Define the base prompt template for ticket resolution
         self.prompt = ChatPromptTemplate.from_messages(
@@ -114,7 +176,7 @@ class ResolutionAgent:
 
         # Initialize dataset if it doesn't exist
         try:
-            langsmith_client.create_dataset(
+            self.client.create_dataset(
                 "ticket_resolutions",
                 description="Ticket resolution examples for manual review and accuracy tracking",
             )
@@ -122,27 +184,26 @@ class ResolutionAgent:
             if "already exists" not in str(e).lower():
                 print(f"Warning creating dataset: {str(e)}")
 
-    async def _create_run_feedback(self, run_id: str, metrics: Dict):
-        """Create comprehensive feedback for a run in LangSmith"""
-        try:
-            # Track all metrics
-            for key, value in metrics.items():
-                if isinstance(value, (int, float)):
-                    langsmith_client.create_feedback(
-                        run_id,
-                        key=key,
-                        score=float(value),
-                        comment=self._get_metric_description(key),
-                    )
-                else:
-                    langsmith_client.create_feedback(
-                        run_id,
-                        key=key,
-                        value=str(value),
-                        comment=self._get_metric_description(key),
-                    )
-        except Exception as e:
-            print(f"Error creating run feedback: {str(e)}")
+    def _create_run_feedback(self, run_id: str, metrics: Dict):
+        """Queue comprehensive feedback for a run in LangSmith"""
+        # Track all metrics
+        for key, value in metrics.items():
+            if isinstance(value, (int, float)):
+                telemetry.submit(
+                    "create_feedback",
+                    run_id,
+                    key=key,
+                    score=float(value),
+                    comment=self._get_metric_description(key),
+                )
+            else:
+                telemetry.submit(
+                    "create_feedback",
+                    run_id,
+                    key=key,
+                    value=str(value),
+                    comment=self._get_metric_description(key),
+                )
 
     def _get_metric_description(self, metric_key: str) -> str:
         """Get description for each metric type"""
@@ -156,123 +217,120 @@ class ResolutionAgent:
         }
         return descriptions.get(metric_key, "Additional metric being tracked")
 
+    async def get_ticket_snapshot(self, ticket_id: str) -> Optional[TicketSnapshot]:
+        """Fetch a ticket with its customer and interactions in one query.
+
+        Concurrent calls for the same ticket share one fetch, and the result
+        is reused briefly (see ``utils.singleflight``).
+        """
+        return await context_flight.load(
+            "ticket_snapshot", ticket_id, lambda: self._fetch_ticket_snapshot(ticket_id)
+        )
+
+    async def _fetch_ticket_snapshot(self, ticket_id: str) -> Optional[TicketSnapshot]:
+        ticket_data = await repositories.get_ticket(ticket_id, TICKET_SNAPSHOT_COLUMNS)
+        return TicketSnapshot.model_validate(ticket_data) if ticket_data else None
+
     @traceable(
         run_type="ticket_resolution", name="get_ticket_context", tags=["context"]
     )
     async def get_ticket_context(self, ticket_id: str) -> str:
         """Fetch comprehensive ticket context from Supabase"""
         try:
-            # First check if ticket exists
-            ticket_response = (
-                supabase.table("tickets")
-                .select("*")
-                .eq("id", ticket_id)
-                .single()
-                .execute()
-            )
+            snapshot = await self.get_ticket_snapshot(ticket_id)
 
-            if not ticket_response.data:
+            if snapshot is None:
                 return f"No ticket found with ID: {ticket_id}"
 
-            ticket_data = ticket_response.data
-
-            # Format the ticket context - omit customer info if unknown
-            context = f"""
-            Ticket Information:
-            - ID: {ticket_data.get('id')}
-            - Title: {ticket_data.get('title')}
-            - Status: {ticket_data.get('status')}
-            - Priority: {ticket_data.get('priority')}
-            - Created: {ticket_data.get('created_at')}
-            - Description: {ticket_data.get('description')}
-            """
-
-            # Only add customer info if it's known
-            customer_name = ticket_data.get("customer", {}).get("name")
-            customer_email = ticket_data.get("customer", {}).get("email")
-            if (
-                customer_name
-                and customer_name.lower() != "unknown"
-                and customer_email
-                and customer_email.lower() != "unknown"
-            ):
-                context += f"""
-                Customer Information:
-                - Name: {customer_name}
-                - Email: {customer_email}
-                """
-
-            # Add interactions if they exist
-            interactions = self.format_interactions(ticket_data.get("interactions", []))
-            if interactions != "No interactions recorded":
-                context += f"""
-                Recent Interactions:
-                {interactions}
-                """
-
-            return context.strip()
+            return self.format_ticket_context(snapshot)
 
         except Exception as e:
             print(f"Error fetching ticket context: {str(e)}")
             return f"Error: Could not find ticket with ID {ticket_id}"
 
-    def format_interactions(self, interactions: List[Dict]) -> str:
-        """Format interactions in a readable way"""
-        if not interactions:
-            return "No interactions recorded"
-
-        formatted = []
-        for interaction in interactions:
-            created_at = interaction.get("created_at", "Unknown date")
-            interaction_type = interaction.get("type", "Unknown type")
-            content = interaction.get("content", {})
-
-            formatted.append(
-                f"""
-            Date: {created_at}
-            Type: {interaction_type}
-            Content: {json.dumps(content, indent=2)}
-            """
-            )
+    def format_ticket_context(self, snapshot: TicketSnapshot) -> PromptContext:
+        """Build compact prompt context for a ticket within the token budget"""
+        builder = ContextBuilder()
+        builder.header(
+            f"Ticket {snapshot.id}: {snapshot.title} "
+            f"({snapshot.status}, priority {snapshot.priority}, "
+            f"created {format_date(snapshot.created_at)})"
+        )
+        builder.header(f"Description: {builder.field(snapshot.description or '')}")
 
-        return "\n".join(formatted)
+        # Recent interactions first, then customer info if it's known
+        builder.section(
+            "Recent interactions",
+            self.interaction_entries(snapshot.interactions, builder),
+        )
+
+        customer = snapshot.customer
+        if (
+            customer
+            and customer.name
+            and customer.name.lower() != "unknown"
+            and customer.email
+            and customer.email.lower() != "unknown"
+        ):
+            builder.section("Customer", [f"{customer.name} <{customer.email}>"])
+
+        return builder.build()
+
+    def interaction_entries(
+        self, interactions: List[TicketInteraction], builder: ContextBuilder
+    ) -> List[str]:
+        """One compact line per interaction, most recent first"""
+        interactions = sorted(
+            interactions, key=lambda i: str(i.created_at or ""), reverse=True
+        )
+        return [
+            f"{format_date(interaction.created_at)} "
+            f"{interaction.type or 'Unknown type'}: "
+            f"{builder.field(interaction.content or {})}"
+            for interaction in interactions
+        ]
 
     @traceable(run_type="ticket_resolution", name="resolve_ticket", tags=["resolution"])
+    @timed("resolve_ticket")
     async def resolve_ticket(
-        self, ticket_id: str, resolution_text: str, author_id: str
+        self,
+        ticket_id: str,
+        resolution_text: str,
+        author_id: str,
+        snapshot: Optional[TicketSnapshot] = None,
     ) -> Dict:
-        """Resolve a ticket and create appropriate interactions"""
+        """Resolve a ticket and create appropriate interactions.
+
+        Pass the ``snapshot`` the resolution was generated from to skip
+        reading the ticket again.
+        """
         try:
             # 1. Get ticket and customer info
-            ticket_response = (
-                supabase.table("tickets")
-                .select("*, customer:customer_id(*)")
-                .eq("id", ticket_id)
-                .single()
-                .execute()
-            )
+            if snapshot is None:
+                with stage("resolve_ticket", "db_read"):
+                    snapshot = await self._fetch_ticket_snapshot(ticket_id)
 
-            if not ticket_response.data:
-                await self._create_run_feedback(
+            if snapshot is None:
+                self._create_run_feedback(
                     run_id=ticket_id,
                     metrics={"action_correct": 0.0, "error_type": "ticket_not_found"},
                 )
                 return {"success": False, "error": "Ticket not found"}
 
-            ticket_data = ticket_response.data
-            customer_email = ticket_data.get("customer", {}).get("email")
+            ticket_data = snapshot.model_dump(mode="json")
+            customer_email = snapshot.customer.email if snapshot.customer else None
 
             # 2. Update ticket status
-            ticket_update = (
-                supabase.table("tickets")
-                .update(
-                    {
-                        "status": "RESOLVED",
-                        "resolved_at": datetime.utcnow().isoformat(),
-                    }
-                )
-                .eq("id", ticket_id)
-                .execute()
+            resolved = {
+                "status": "RESOLVED",
+                "resolved_at": datetime.utcnow().isoformat(),
+            }
+            with stage("resolve_ticket", "db_write"):
+                await repositories.update_ticket(ticket_id, resolved)
+            context_flight.forget("ticket", ticket_id)
+            context_flight.forget("ticket_snapshot", ticket_id)
+            await get_customer_context_cache().update_ticket(
+                snapshot.customer_id, ticket_id, resolved
             )
 
             # 3. Create AGENT_RESOLUTION interaction
@@ -283,24 +341,24 @@ class ResolutionAgent:
                 "content": {"resolution_text": resolution_text, "automated": True},
             }
 
-            interaction_insert = (
-                supabase.table("interactions").insert(interaction_data).execute()
-            )
+            with stage("resolve_ticket", "db_write"):
+                await repositories.insert_interaction(interaction_data)
 
             # 4. Send email to customer
             email_success = True
             if customer_email:
-                email_success = await self.send_resolution_email(
-                    to_email=customer_email,
-                    ticket_title=ticket_data.get("title", ""),
-                    resolution_text=resolution_text,
-                    ticket_id=ticket_id,
-                )
+                with stage("resolve_ticket", "email"):
+                    email_success = await self.send_resolution_email(
+                        to_email=customer_email,
+                        ticket_title=snapshot.title,
+                        resolution_text=resolution_text,
+                        ticket_id=ticket_id,
+                    )
                 if not email_success:
                     print("Warning: Failed to send resolution email")
 
             # Create feedback for the resolution
-            await self._create_run_feedback(
+            self._create_run_feedback(
                 run_id=ticket_id,
                 metrics={
                     "action_correct": 1.0,
@@ -318,7 +376,7 @@ class ResolutionAgent:
             }
 
         except Exception as e:
-            await self._create_run_feedback(
+            self._create_run_feedback(
                 run_id=ticket_id,
                 metrics={
                     "action_correct": 0.0,
@@ -333,40 +391,252 @@ class ResolutionAgent:
     ):
         """Send resolution email to customer using Mailgun"""
         try:
-            subject = f"Resolution: {ticket_title}"
-
-            # Clean up resolution text to remove any duplicate closings
-            cleaned_resolution = (
-                resolution_text.replace("Best regards,\nTicketAI", "")
-                .replace("If you have any questions", "")
-                .strip()
-            )
-
-            email_body = f"""
-            <h2 style="color: #2d3748; margin-bottom: 20px;">Dear Customer,</h2>
-            
-            <div style="margin-bottom: 24px;">
-                {cleaned_resolution}
-            </div>
-            
-            <div class="signature">
-                Best regards,<br>
-                TicketAI
-            </div>
-            """
-
             await send_email(
                 to=to_email,
-                subject=subject,
-                body=email_body,
                 ticket_id=ticket_id,
+                **resolution_email(ticket_title, resolution_text),
             )
             return True
         except Exception as e:
             print(f"Error sending email: {str(e)}")
             return False
 
+    async def _fetch_ticket_snapshots(
+        self, ticket_ids: List[str]
+    ) -> Tuple[Dict[str, TicketSnapshot], Dict[str, str]]:
+        """Read tickets in chunks of ``RESOLUTION_BATCH_CHUNK_SIZE`` IDs.
+
+        Returns the valid snapshots by ID, and an error per ID whose row
+        could not be parsed.
+        """
+        snapshots, invalid = {}, {}
+        for row in await self._read_tickets(ticket_ids, TICKET_SNAPSHOT_COLUMNS):
+            try:
+                snapshot = TicketSnapshot.model_validate(row)
+            except ValidationError as e:
+                print(f"Invalid ticket row {row.get('id')}: {str(e)}")
+                invalid[row.get("id")] = f"Invalid ticket data: {str(e)}"
+                continue
+            snapshots[snapshot.id] = snapshot
+        return snapshots, invalid
+
+    async def _read_tickets(self, ticket_ids: List[str], columns: str) -> List[Dict]:
+        rows = []
+        unique_ids = list(dict.fromkeys(ticket_ids))
+        for start in range(0, len(unique_ids), RESOLUTION_BATCH_CHUNK_SIZE):
+            chunk = unique_ids[start : start + RESOLUTION_BATCH_CHUNK_SIZE]
+            rows.extend(await repositories.get_tickets(chunk, columns))
+        return rows
+
+    async def _unresolved_errors(self, ticket_ids: List[str]) -> Dict[str, str]:
+        """Why each ticket the batch write skipped was not resolved"""
+        try:
+            rows = await self._read_tickets(ticket_ids, "id, status")
+        except Exception as e:
+            print(f"Error re-reading unresolved tickets: {str(e)}")
+            return {ticket_id: NOT_RESOLVED for ticket_id in ticket_ids}
+        statuses = {row["id"]: row.get("status") for row in rows}
+        errors = {}
+        for ticket_id in ticket_ids:
+            if ticket_id not in statuses:
+                errors[ticket_id] = f"Ticket not found: {ticket_id}"
+            elif statuses[ticket_id] in CLOSED_STATUSES:
+                errors[ticket_id] = ALREADY_RESOLVED
+            else:
+                errors[ticket_id] = NOT_RESOLVED
+        return errors
+
+    async def _refresh_cached_ticket(
+        self, customer_id: Optional[str], ticket_id: str, values: Optional[Dict]
+    ):
+        """Drop cached reads of a written ticket.
+
+        The customer's cached context is patched with ``values``, or
+        invalidated when they are None. Cache errors are only logged, so
+        they can't mask the outcome of the write.
+        """
+        context_flight.forget("ticket", ticket_id)
+        context_flight.forget("ticket_snapshot", ticket_id)
+        try:
+            cache = get_customer_context_cache()
+            if values is None:
+                await cache.invalidate(customer_id)
+            else:
+                await cache.update_ticket(customer_id, ticket_id, values)
+        except Exception as e:
+            print(f"Error refreshing cached context for {ticket_id}: {str(e)}")
+
+    @timed("resolve_batch")
+    async def resolve_tickets(
+        self,
+        commands: List[Tuple[str, str]],
+        author_id: str,
+        concurrency: int = RESOLUTION_BATCH_CONCURRENCY,
+    ) -> Dict:
+        """Resolve many tickets, each from its own ``(ticket_id, command)``.
+
+        Tickets are read in chunks of ``RESOLUTION_BATCH_CHUNK_SIZE`` IDs and
+        their resolutions generated concurrently; a ticket whose row fails
+        to parse is reported failed. The resolved ones are then written in
+        one transaction that sets them RESOLVED and inserts their
+        AGENT_RESOLUTION interactions; tickets already resolved or closed
+        are skipped, so a batch can be retried. Resolution emails go out in
+        the background through the bulk mail pipeline. Returns one result
+        per ticket, in input order.
+        """
+        with stage("resolve_batch", "db_read"):
+            snapshots, invalid = await self._fetch_ticket_snapshots(
+                [ticket_id for ticket_id, _ in commands]
+            )
+
+        async def generate(item: Tuple[str, str]) -> Dict:
+            ticket_id, command = item
+            if ticket_id in invalid:
+                return {
+                    "ticket_id": ticket_id,
+                    "success": False,
+                    "error": invalid[ticket_id],
+                }
+            snapshot = snapshots.get(ticket_id)
+            if snapshot is None:
+                return {
+                    "ticket_id": ticket_id,
+                    "success": False,
+                    "error": f"Ticket not found: {ticket_id}",
+                }
+            if snapshot.status in CLOSED_STATUSES:
+                return {
+                    "ticket_id": ticket_id,
+                    "success": False,
+                    "error": ALREADY_RESOLVED,
+                }
+            resolution = await self.chain.ainvoke(
+                self._chain_inputs(self.format_ticket_context(snapshot), command)
+            )
+            return {"ticket_id": ticket_id, "success": True, "resolution": resolution}
+
+        def failed(item: Tuple[str, str], error: Exception) -> Dict:
+            print(f"Error generating resolution for {item[0]}: {error}")
+            return {"ticket_id": item[0], "success": False, "error": str(error)}
+
+        with stage("resolve_batch", "llm"):
+            results = await run_bounded(
+                commands, generate, concurrency, on_error=failed
+            )
+
+        generated = [result for result in results if result["success"]]
+        resolved = {
+            "status": "RESOLVED",
+            "resolved_at": datetime.utcnow().isoformat(),
+        }
+
+        try:
+            with stage("resolve_batch", "db_write"):
+                committed = set(
+                    await repositories.resolve_tickets(
+                        [
+                            {
+                                "ticket_id": result["ticket_id"],
+                                "resolution_text": result["resolution"],
+                            }
+                            for result in generated
+                        ],
+                        author_id,
+                        resolved["resolved_at"],
+                    )
+                )
+            errors = await self._unresolved_errors(
+                [
+                    result["ticket_id"]
+                    for result in generated
+                    if result["ticket_id"] not in committed
+                ]
+            )
+        except Exception as e:
+            # The transaction may have committed before the response was
+            # lost, so drop every cached read of the tickets it covered
+            print(f"Error saving batch resolution: {str(e)}")
+            committed = set()
+            errors = {result["ticket_id"]: str(e) for result in generated}
+            for result in generated:
+                ticket_id = result["ticket_id"]
+                await self._refresh_cached_ticket(
+                    snapshots[ticket_id].customer_id, ticket_id, None
+                )
+
+        for result in generated:
+            if result["ticket_id"] not in committed:
+                result.update(success=False, error=errors[result["ticket_id"]])
+                result.pop("resolution")
+        generated = [result for result in generated if result["success"]]
+
+        emails = []
+        for result in generated:
+            ticket_id = result["ticket_id"]
+            snapshot = snapshots[ticket_id]
+            await self._refresh_cached_ticket(snapshot.customer_id, ticket_id, resolved)
+
+            self._create_run_feedback(
+                run_id=ticket_id,
+                metrics={
+                    "action_correct": 1.0,
+                    "resolution_response": result["resolution"],
+                },
+            )
+
+            customer_email = snapshot.customer.email if snapshot.customer else None
+            result["email_queued"] = bool(customer_email)
+            if customer_email:
+                emails.append(
+                    {
+                        "to": customer_email,
+                        "ticket_id": ticket_id,
+                        **resolution_email(snapshot.title, result["resolution"]),
+                    }
+                )
+
+        if emails:
+            asyncio.create_task(self._send_resolution_emails(emails))
+
+        return {
+            "success": bool(generated),
+            "resolved": len(generated),
+            "failed": len(results) - len(generated),
+            "emails_queued": len(emails),
+            "results": results,
+        }
+
+    async def _send_resolution_emails(self, emails: List[Dict[str, str]]):
+        """Send a batch's resolution emails and log them in one insert"""
+        try:
+            with stage("resolve_batch", "email"):
+                send_results = await send_bulk_emails(emails)
+            sent_at = datetime.utcnow().isoformat()
+            with stage("resolve_batch", "db_write"):
+                await repositories.insert_email_logs(
+                    [
+                        {
+                            "ticket_id": email["ticket_id"],
+                            "recipient_email": email["to"],
+                            "sent_at": sent_at,
+                            "status": "SENT" if send_result.success else "FAILED",
+                            "source": "AI",
+                        }
+                        for email, send_result in zip(emails, send_results)
+                    ]
+                )
+            failed = [
+                email["ticket_id"]
+                for email, send_result in zip(emails, send_results)
+                if not send_result.success
+            ]
+            if failed:
+                print(f"Warning: Failed to send resolution emails for {failed}")
+        except Exception as e:
+            print(f"Error sending resolution emails: {str(e)}")
+
     @traceable(run_type="ticket_resolution", name="process_command", tags=["command"])
+    @timed("process_command")
     async def process_command(
         self, command: str, ticket_id: str, author_id: str
     ) -> Dict:
@@ -376,20 +646,20 @@ class ResolutionAgent:
         parent_run_id = None
 
         try:
-            # Get context using the provided ticket_id directly
-            ticket_context = await self.get_ticket_context(ticket_id)
+            # Read the ticket once; the background resolution reuses it
+            with stage("process_command", "context"):
+                snapshot = await self.get_ticket_snapshot(ticket_id)
 
-            if "No ticket found" in ticket_context:
+            if snapshot is None:
                 return {"success": False, "error": f"Ticket not found: {ticket_id}"}
 
+            ticket_context = self.format_ticket_context(snapshot)
+
             # Generate resolution using the chain
-            resolution = await self.chain.ainvoke(
-                {
-                    "ticket_context": ticket_context,
-                    "customer_history": "Customer history will be implemented",
-                    "command": command,
-                }
-            )
+            with stage("process_command", "llm"):
+                resolution = await self.chain.ainvoke(
+                    self._chain_inputs(ticket_context, command)
+                )
 
             # Start async tracking in background
             asyncio.create_task(
@@ -399,6 +669,7 @@ class ResolutionAgent:
                     resolution=resolution,
                     author_id=author_id,
                     start_time=start_time,
+                    snapshot=snapshot,
                 )
             )
 
@@ -414,6 +685,85 @@ class ResolutionAgent:
             print(f"Error processing command: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    async def stream_command(
+        self, command: str, ticket_id: str, author_id: str
+    ) -> AsyncIterator[Dict]:
+        """Process a command, yielding events as the resolution is generated.
+
+        Yields ``context`` once the ticket context is loaded, one ``token``
+        per chunk from the chain, then ``done`` with the same payload as
+        ``process_command``. Failures yield a single ``error`` event. The
+        background resolution only starts once the stream completes, so a
+        client that disconnects mid-stream leaves the ticket untouched.
+        """
+        start_time = time.time()
+
+        try:
+            snapshot = await self.get_ticket_snapshot(ticket_id)
+
+            if snapshot is None:
+                yield {
+                    "event": "error",
+                    "data": {
+                        "success": False,
+                        "error": f"Ticket not found: {ticket_id}",
+                    },
+                }
+                return
+
+            ticket_context = self.format_ticket_context(snapshot)
+            yield {
+                "event": "context",
+                "data": {
+                    "ticket_id": ticket_id,
+                    "context_seconds": time.time() - start_time,
+                    "context_tokens": getattr(ticket_context, "tokens", None),
+                },
+            }
+
+            chunks = []
+            async for chunk in self.chain.astream(
+                self._chain_inputs(ticket_context, command)
+            ):
+                if chunk:
+                    chunks.append(chunk)
+                    yield {"event": "token", "data": {"text": chunk}}
+            resolution = "".join(chunks)
+
+            # Start async tracking in background
+            asyncio.create_task(
+                self._track_metrics(
+                    ticket_id=ticket_id,
+                    command=command,
+                    resolution=resolution,
+                    author_id=author_id,
+                    start_time=start_time,
+                    snapshot=snapshot,
+                )
+            )
+
+            yield {
+                "event": "done",
+                "data": {
+                    "success": True,
+                    "resolution": resolution,
+                    "ticket_id": ticket_id,
+                    "message": "Resolution in progress",
+                },
+            }
+
+        except Exception as e:
+            print(f"Error streaming command: {str(e)}")
+            yield {"event": "error", "data": {"success": False, "error": str(e)}}
+
+    def _chain_inputs(self, ticket_context: str, command: str) -> Dict:
+        """Inputs for the resolution chain"""
+        return {
+            "ticket_context": ticket_context,
+            "customer_history": "Customer history will be implemented",
+            "command": command,
+        }
+
     async def _track_metrics(
         self,
         ticket_id: str,
@@ -421,55 +771,57 @@ class ResolutionAgent:
         resolution: str,
         author_id: str,
         start_time: float,
+        snapshot: Optional[TicketSnapshot] = None,
     ):
         """Handle all the metrics tracking and LangSmith updates asynchronously"""
         try:
-            # Create parent run
-            try:
-                parent_run = self.client.create_run(
-                    name=f"Ticket Resolution - {ticket_id}",
-                    run_type="chain",
-                    inputs={"command": command, "ticket_id": ticket_id},
-                    project_name=LANGSMITH_PROJECT,
-                    tags=["ticket_resolution", "parent_run"],
-                    metadata={
-                        "ticket_id": ticket_id,
-                        "author_id": author_id,
-                        "start_time": datetime.now().isoformat(),
-                    },
-                )
-                parent_run_id = parent_run.id if parent_run else None
-                if parent_run_id:
-                    self.client.update_run(run_id=parent_run_id, status="running")
-            except Exception as e:
-                print(f"Warning: Failed to create parent run: {str(e)}")
-                parent_run_id = None
+            # Create parent run with a client-side ID so updates and feedback
+            # can reference it before the queue has sent it
+            parent_run_id = uuid.uuid4()
+            telemetry.submit(
+                "create_run",
+                name=f"Ticket Resolution - {ticket_id}",
+                run_type="chain",
+                inputs={"command": command, "ticket_id": ticket_id},
+                project_name=LANGSMITH_PROJECT,
+                id=parent_run_id,
+                start_time=datetime.utcnow(),
+                tags=["ticket_resolution", "parent_run"],
+                metadata={
+                    "ticket_id": ticket_id,
+                    "author_id": author_id,
+                    "start_time": datetime.now().isoformat(),
+                },
+            )
 
             # Resolve the ticket in background
-            result = await self.resolve_ticket(ticket_id, resolution, author_id)
+            result = await self.resolve_ticket(
+                ticket_id, resolution, author_id, snapshot
+            )
 
             # Calculate latency
             latency = time.time() - start_time
 
             # Update parent run with success metrics
-            if parent_run_id:
-                self.client.update_run(
-                    run_id=parent_run_id,
-                    status="completed",
-                    outputs={
-                        "resolution": resolution,
-                        "success": result["success"],
-                        "latency_seconds": latency,
-                        "resolution_details": {
-                            "new_status": "RESOLVED",
-                            "resolved_at": datetime.utcnow().isoformat(),
-                            "email_sent": result.get("email_sent", False),
-                        },
+            telemetry.submit(
+                "update_run",
+                run_id=parent_run_id,
+                end_time=datetime.utcnow(),
+                status="completed",
+                outputs={
+                    "resolution": resolution,
+                    "success": result["success"],
+                    "latency_seconds": latency,
+                    "resolution_details": {
+                        "new_status": "RESOLVED",
+                        "resolved_at": datetime.utcnow().isoformat(),
+                        "email_sent": result.get("email_sent", False),
                     },
-                )
+                },
+            )
 
             # Add metrics
-            await self._create_run_feedback(
+            self._create_run_feedback(
                 run_id=parent_run_id or ticket_id,
                 metrics={
                     "action_correct": 1.0 if result["success"] else 0.0,
@@ -484,7 +836,8 @@ class ResolutionAgent:
             try:
                 ticket_data = result.get("ticket_data", {})
                 if ticket_data:
-                    langsmith_client.create_example(
+                    telemetry.submit(
+                        "create_example",
                         inputs={
                             "ticket_id": ticket_id,
                             "command": command,
@@ -525,14 +878,16 @@ class ResolutionAgent:
                         },
                         dataset_name="ticket_resolutions",
                     )
-                    print("Successfully added resolution to annotation queue")
+                    print("Queued resolution for the annotation queue")
             except Exception as e:
                 print(f"Error adding to annotation queue: {str(e)}")
 
         except Exception as e:
             if parent_run_id:
-                self.client.update_run(
+                telemetry.submit(
+                    "update_run",
                     run_id=parent_run_id,
+                    end_time=datetime.utcnow(),
                     status="failed",
                     error=str(e),
                     outputs={
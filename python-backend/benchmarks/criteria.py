@@ -0,0 +1,204 @@
+"""
+Benchmark criteria scoring: the per-criterion checks vs the compiled matcher.
+
+Generates responses from fragments of support replies and scores each one
+against the criteria of every evaluation test case, first with the original
+``_check_criterion`` logic (kept below as ``legacy_check_criterion``, minus
+its log lines) and then with ``CriteriaMatcher.score_batch``. The two must
+agree on every response and criterion.
+
+    python -m benchmarks.criteria --responses 20000
+
+Prints JSON with the time taken and checks per second for each.
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Dict, List
+
+from evaluation.criteria import compile_criteria
+from evaluation.test_cases import (
+    TestCase,
+    create_inventory_update_test,
+    create_return_process_test,
+    create_size_recommendation_test,
+)
+
+FRAGMENTS = [
+    "I've updated the inventory for the blue denim jeans in size 32.",
+    "The stock has been set to 15 units in the main warehouse.",
+    "Stock was updated to 12 pieces.",
+    "Our shirts run slim, so sizing up will ensure the best comfort.",
+    "Based on the customer's measurements I recommend a Large.",
+    "It falls well within our 30-day return window.",
+    "I've initiated the return process and will email the shipping label.",
+    "Would you like to order a different size instead?",
+    "We can arrange an exchange for another size.",
+    "Thank you for your patience.",
+    "Please let me know if you need anything else.",
+    "Best regards,\nSupport Team",
+    "The order shipped yesterday and should arrive soon.",
+    "Brand-specific sizing notes are attached.",
+    "This will keep your account up to date.",
+]
+
+
+def legacy_check_criterion(response: str, criterion: str, test_case: TestCase) -> bool:
+    """The original per-call criterion check, for comparison"""
+    response = response.strip().lower()
+    criterion = criterion.strip().lower()
+
+    if criterion in response:
+        return True
+
+    response_words = set(response.split())
+    criterion_words = set(criterion.split())
+    if criterion_words.issubset(response_words):
+        return True
+
+    if criterion == "professional tone":
+        professional_phrases = [
+            "best regards",
+            "sincerely",
+            "thank you",
+            "regards",
+            "please",
+            "kindly",
+        ]
+        return any(phrase in response for phrase in professional_phrases)
+
+    if criterion == "correctly identifies product":
+        product_details = []
+        if "product_id" in test_case.context:
+            pid = test_case.context["product_id"].lower()
+            product_details.extend(re.findall(r"[a-z]+|\d+", pid))
+        product_details.extend(
+            str(v).lower()
+            for v in test_case.context.values()
+            if isinstance(v, (str, int))
+        )
+        has_product_type = any(term in response for term in ["denim", "jeans"])
+        has_color = any(term in response for term in ["blue", "blu"])
+        has_size = any(term in response for term in ["32", "size 32"])
+        return has_product_type and has_color and has_size
+
+    if criterion == "updates correct quantity":
+        target_quantity = None
+        for change in test_case.expected_db_changes:
+            if (
+                change.table == "inventory"
+                and change.operation == "UPDATE"
+                and "stock_quantity" in change.fields
+            ):
+                target_quantity = change.fields["stock_quantity"]
+                break
+        if target_quantity is None:
+            return False
+        quantity_patterns = [
+            rf"\b{target_quantity}\s*(?:units?|items?|pieces?|stock)\b",
+            rf"\bset\s*(?:to|at)\s*{target_quantity}\b",
+            rf"\bupdated\s*(?:to)?\s*{target_quantity}\b",
+        ]
+        return any(re.search(pattern, response) for pattern in quantity_patterns)
+
+    if "references" in criterion:
+        reference_terms = criterion.split()[1:]
+        return any(term.lower() in response for term in reference_terms)
+
+    if criterion == "provides reasoning":
+        indicators = [
+            "because",
+            "since",
+            "as",
+            "therefore",
+            "this ensures",
+            "this will",
+        ]
+        return any(indicator in response for indicator in indicators)
+
+    if criterion == "verifies return eligibility":
+        terms = ["within", "window", "eligible", "qualify", "can return", "days ago"]
+        return any(term in response for term in terms)
+
+    if criterion == "mentions return window":
+        return "30-day" in response or "30 day" in response
+
+    if criterion == "explains return process":
+        terms = ["shipping label", "refund", "email", "process", "initiated", "return"]
+        return any(term in response for term in terms)
+
+    if criterion == "offers size exchange":
+        terms = [
+            "different size",
+            "exchange",
+            "another size",
+            "size exchange",
+            "order a different",
+        ]
+        return any(term in response for term in terms)
+
+    return False
+
+
+def make_responses(count: int, seed: int = 5) -> List[str]:
+    rng = random.Random(seed)
+    return ["\n".join(rng.sample(FRAGMENTS, rng.randint(2, 7))) for _ in range(count)]
+
+
+def run(responses: List[str]) -> Dict:
+    test_cases = [
+        create_inventory_update_test(),
+        create_size_recommendation_test(),
+        create_return_process_test(),
+    ]
+    checks = len(responses) * sum(len(tc.success_criteria) for tc in test_cases)
+
+    start = time.perf_counter()
+    legacy = [
+        [
+            [legacy_check_criterion(r, c, tc) for c in tc.success_criteria]
+            for r in responses
+        ]
+        for tc in test_cases
+    ]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [
+        compile_criteria(tc.success_criteria).score_batch(
+            responses, [tc] * len(responses)
+        )
+        for tc in test_cases
+    ]
+    compiled_seconds = time.perf_counter() - start
+
+    if compiled != legacy:
+        raise AssertionError("Compiled criteria disagree with the original checks")
+
+    return {
+        "responses": len(responses),
+        "checks": checks,
+        "legacy": {
+            "seconds": round(legacy_seconds, 4),
+            "checks_per_second": round(checks / legacy_seconds),
+        },
+        "compiled": {
+            "seconds": round(compiled_seconds, 4),
+            "checks_per_second": round(checks / compiled_seconds),
+        },
+        "speedup": round(legacy_seconds / compiled_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--responses", type=int, default=20_000)
+    args = parser.parse_args()
+    print(json.dumps(run(make_responses(args.responses)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+"""
+In-process stand-ins for the backend's external services.
+
+Used by ``benchmarks.load`` to boot ``main.app`` without network access:
+
+- ``FakeSupabase``: the subset of the PostgREST query builder the
+  repositories use, over in-memory tables with the tickets joins and the
+  ``search_users``, ``latest_customer_tickets`` and
+  ``latest_author_interactions`` RPCs, plus an optional per-query latency.
+- ``FakeChatModel``: a chat model with a configurable time to first token
+  and token rate.
+- ``fake_embeddings`` / ``fake_vector_store``: deterministic embeddings and
+  the local NumPy index over them.
+- ``FakeMailServer``: a Mailgun-compatible HTTP server on localhost, running
+  on its own thread and event loop.
+- ``FakeLangSmithClient``: accepts and counts every LangSmith call.
+"""
+
+import asyncio
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from aiohttp import web
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from benchmarks.user_search import IndexedUserTable, make_users
+from utils.vector_store import LocalVectorStore
+
+Row = Dict[str, Any]
+
+# Columns kept indexed per table, for the filters the repositories use
+INDEXED_COLUMNS = {
+    "users": ("id",),
+    "tickets": ("id", "customer_id"),
+    "interactions": ("author_id", "ticket_id"),
+    "email_logs": ("id",),
+    "agent_outreach_sessions": ("id", "status"),
+}
+
+# (table, embedded resource) -> (target table, local column, target column, many)
+RELATIONS = {
+    ("tickets", "users!tickets_customer_id_fkey"): (
+        "users",
+        "customer_id",
+        "id",
+        False,
+    ),
+    ("tickets", "users!tickets_assigned_to_id_fkey"): (
+        "users",
+        "assigned_to_id",
+        "id",
+        False,
+    ),
+    ("tickets", "customer_id"): ("users", "customer_id", "id", False),
+    ("tickets", "interactions"): ("interactions", "id", "ticket_id", True),
+}
+
+# RPC name -> (table, ID column, IDs parameter, per-ID limit parameter)
+RPCS = {
+    "search_users": None,
+    "latest_customer_tickets": (
+        "tickets",
+        "customer_id",
+        "customer_ids",
+        "per_customer",
+    ),
+    "latest_author_interactions": (
+        "interactions",
+        "author_id",
+        "author_ids",
+        "per_author",
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Supabase
+# ---------------------------------------------------------------------------
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split a select string on commas outside parentheses"""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part for part in parts if part]
+
+
+def parse_select(columns: str) -> List[tuple]:
+    """Parse ``*, alias:table!hint(col, ...)`` into (alias, resource, children)"""
+    columns = re.sub(r"\s+", "", columns or "*")
+    fields = []
+    for part in _split_top_level(columns):
+        if "(" not in part:
+            fields.append((part, part, None))
+            continue
+        head, _, inner = part.partition("(")
+        alias, _, resource = head.rpartition(":")
+        fields.append((alias or resource, resource, parse_select(inner[:-1])))
+    return fields
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """One PostgREST request, built up by chained calls and run by ``execute``"""
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.filters: List[tuple] = []
+        self.ordering: List[tuple] = []
+        self.row_limit: Optional[int] = None
+        self.single = False
+
+    def select(self, columns: str = "*", **kwargs) -> "FakeQuery":
+        self.columns = columns
+        return self
+
+    def insert(self, rows, **kwargs) -> "FakeQuery":
+        self.action, self.payload = "insert", rows
+        return self
+
+    def update(self, values: Row, **kwargs) -> "FakeQuery":
+        self.action, self.payload = "update", values
+        return self
+
+    def eq(self, column: str, value) -> "FakeQuery":
+        self.filters.append((column, {str(value)}))
+        return self
+
+    def in_(self, column: str, values: Iterable) -> "FakeQuery":
+        self.filters.append((column, {str(value) for value in values}))
+        return self
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> "FakeQuery":
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count: int, **kwargs) -> "FakeQuery":
+        self.row_limit = count
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self.single = True
+        return self
+
+    def execute(self) -> FakeResponse:
+        return self.db.run(self)
+
+
+class FakeRPC:
+    def __init__(self, db: "FakeSupabase", name: str, params: Dict):
+        self.db, self.name, self.params = db, name, params
+
+    def execute(self) -> FakeResponse:
+        return self.db.call(self.name, self.params)
+
+
+class FakeSupabase:
+    """In-memory tables behind the Supabase client interface.
+
+    ``latency`` seconds are slept on the calling thread for every query,
+    like the round trip the real synchronous client would block for.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: Dict[str, List[Row]] = {}
+        self.indexes: Dict[str, Dict[str, Dict[str, List[Row]]]] = {}
+        self.queries = 0
+        self._search: Optional[IndexedUserTable] = None
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Dict) -> FakeRPC:
+        return FakeRPC(self, name, params)
+
+    # Data ---------------------------------------------------------------
+
+    def _add(self, table: str, row: Row):
+        self.tables.setdefault(table, []).append(row)
+        indexes = self.indexes.setdefault(table, {})
+        for column in INDEXED_COLUMNS.get(table, ()):
+            indexes.setdefault(column, {}).setdefault(str(row.get(column)), []).append(
+                row
+            )
+
+    def _reindex(self, table: str):
+        self.indexes[table] = {}
+        rows, self.tables[table] = self.tables.get(table, []), []
+        for row in rows:
+            self._add(table, row)
+
+    def seed(self, table: str, rows: Iterable[Row]):
+        with self._lock:
+            for row in rows:
+                self._add(table, dict(row))
+            if table == "users":
+                self._search = None
+
+    # Queries ------------------------------------------------------------
+
+    def _candidates(self, table: str, filters: List[tuple]) -> List[Row]:
+        indexes = self.indexes.get(table, {})
+        for column, values in filters:
+            if column in indexes:
+                index = indexes[column]
+                return [row for value in values for row in index.get(value, ())]
+        return list(self.tables.get(table, ()))
+
+    def _embed(self, table: str, row: Row, fields: List[tuple]) -> Row:
+        result: Row = {}
+        for alias, resource, children in fields:
+            if children is None:
+                if resource == "*":
+                    result.update(row)
+                else:
+                    result[alias] = row.get(resource)
+                continue
+            relation = RELATIONS.get((table, resource))
+            if relation is None:
+                raise ValueError(f"Unknown relation {table} -> {resource}")
+            target, local, remote, many = relation
+            matches = self._candidates(target, [(remote, {str(row.get(local))})])
+            embedded = [self._embed(target, match, children) for match in matches]
+            result[alias] = embedded if many else (embedded[0] if embedded else None)
+        return result
+
+    def run(self, query: FakeQuery) -> FakeResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.queries += 1
+            if query.action == "insert":
+                return FakeResponse(self._insert(query.table, query.payload))
+
+            rows = [
+                row
+                for row in self._candidates(query.table, query.filters)
+                if all(str(row.get(col)) in values for col, values in query.filters)
+            ]
+            if query.action == "update":
+                for row in rows:
+                    row.update(query.payload)
+                if set(query.payload) & set(INDEXED_COLUMNS.get(query.table, ())):
+                    self._reindex(query.table)
+                return FakeResponse([dict(row) for row in rows])
+
+            for column, desc in reversed(query.ordering):
+                rows.sort(key=lambda row: str(row.get(column) or ""), reverse=desc)
+            if query.row_limit is not None:
+                rows = rows[: query.row_limit]
+            fields = parse_select(query.columns)
+            data = [self._embed(query.table, row, fields) for row in rows]
+        if query.single:
+            return FakeResponse(data[0] if data else None)
+        return FakeResponse(data)
+
+    def _insert(self, table: str, payload) -> List[Row]:
+        rows = payload if isinstance(payload, list) else [payload]
+        inserted = []
+        for row in rows:
+            row = {
+                "id": str(uuid.uuid4()),
+                "created_at": datetime.now().isoformat(),
+                **row,
+            }
+            self._add(table, row)
+            inserted.append(dict(row))
+        return inserted
+
+    def _latest(self, table: str, column: str, ids: List[str], limit: int):
+        """Each ID's newest ``limit`` rows, like the latest_* RPCs"""
+        rows = []
+        for id_ in ids:
+            matches = self._candidates(table, [(column, {str(id_)})])
+            matches.sort(key=lambda row: str(row.get("created_at") or ""), reverse=True)
+            rows.extend(dict(row) for row in matches[:limit])
+        return FakeResponse(rows)
+
+    def call(self, name: str, params: Dict) -> FakeResponse:
+        if name not in RPCS:
+            raise ValueError(f"Unknown RPC {name}")
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.queries += 1
+            if name != "search_users":
+                table, column, ids, limit = RPCS[name]
+                return self._latest(table, column, params[ids], params[limit])
+            if self._search is None:
+                self._search = IndexedUserTable(self.tables.get("users", []))
+            rows = self._search.find(params["query"], params["max_results"])
+        return FakeResponse(
+            [{key: row.get(key) for key in ("id", "name", "email")} for row in rows]
+        )
+
+
+def seed_crm(db: FakeSupabase, customers: int, seed: int = 7) -> List[Row]:
+    """Seed users, two tickets per customer and a few interactions per ticket"""
+    users = make_users(customers, seed=seed)
+    start = datetime(2025, 1, 1)
+    tickets, interactions = [], []
+    for i, user in enumerate(users):
+        user["preferences"] = {"channel": "email"}
+        for t in range(2):
+            ticket_id = f"ticket-{i}-{t}"
+            created = start + timedelta(minutes=i * 2 + t)
+            tickets.append(
+                {
+                    "id": ticket_id,
+                    "title": f"Order issue #{i}-{t}",
+                    "description": "The jacket I ordered arrived in the wrong size.",
+                    "status": "OPEN",
+                    "priority": "MEDIUM",
+                    "customer_id": user["id"],
+                    "assigned_to_id": users[(i + 1) % len(users)]["id"],
+                    "created_at": created.isoformat(),
+                }
+            )
+            for n in range(2):
+                interactions.append(
+                    {
+                        "id": f"interaction-{i}-{t}-{n}",
+                        "ticket_id": ticket_id,
+                        "author_id": user["id"],
+                        "type": "NOTE",
+                        "content": "Asked for an exchange to a medium.",
+                        "created_at": (created + timedelta(seconds=n)).isoformat(),
+                    }
+                )
+    db.seed("users", users)
+    db.seed("tickets", tickets)
+    db.seed("interactions", interactions)
+    return users
+
+
+# ---------------------------------------------------------------------------
+# Chat model, vector store
+# ---------------------------------------------------------------------------
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that waits like an LLM API: ``latency`` seconds to the first
+    token, then ``tokens`` tokens at ``tokens_per_second``."""
+
+    latency: float = 0.2
+    tokens_per_second: float = 100.0
+    tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _words(self, messages: List[BaseMessage]) -> List[str]:
+        seed = abs(hash(messages[-1].content)) if messages else 0
+        words = ["Thanks", "for", "reaching", "out", "about", "your", "order."]
+        return [words[(seed + i) % len(words)] + " " for i in range(self.tokens)]
+
+    def _seconds(self) -> float:
+        return self.latency + self.tokens / self.tokens_per_second
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self._seconds())
+        text = "".join(self._words(messages)).strip()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self._seconds())
+        text = "".join(self._words(messages)).strip()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for word in self._words(messages):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                await run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+
+def fake_embeddings(size: int = 256) -> DeterministicFakeEmbedding:
+    """Embeddings derived from a hash of the text, computed locally"""
+    return DeterministicFakeEmbedding(size=size)
+
+
+def fake_vector_store(embeddings=None) -> LocalVectorStore:
+    """An empty in-process index over deterministic embeddings"""
+    return LocalVectorStore(embeddings or fake_embeddings())
+
+
+# ---------------------------------------------------------------------------
+# Mailgun, LangSmith
+# ---------------------------------------------------------------------------
+
+
+class FakeMailServer:
+    """Mailgun messages API on 127.0.0.1, answering after ``latency`` seconds.
+
+    It runs on its own thread and event loop so its work does not show up in
+    the application's event-loop lag.
+    """
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.messages = 0
+        self.url: Optional[str] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="fake-mailgun", daemon=True
+        )
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        await request.post()
+        await asyncio.sleep(self.latency)
+        self.messages += 1
+        return web.json_response(
+            {"id": f"<{uuid.uuid4()}@benchmark>", "message": "Queued. Thank you."}
+        )
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post("/{domain}/messages", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    def start(self) -> str:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self.url
+
+    def stop(self):
+        if self._runner:
+            asyncio.run_coroutine_threadsafe(
+                self._runner.cleanup(), self._loop
+            ).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class FakeLangSmithClient:
+    """Accepts any LangSmith client call and counts it by method"""
+
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return None
+
+        return call
@@ -0,0 +1,376 @@
+"""
+Offline load test of the API against in-process fake backends.
+
+Boots ``main.app`` (with its lifespan) behind an in-process HTTP client, with
+Supabase, the chat model, the vector store, Mailgun and LangSmith replaced by
+the stand-ins in ``benchmarks.fakes``. Each scenario is driven at fixed
+concurrency levels while a ticker measures event-loop lag:
+
+    python -m benchmarks.load --concurrency 1,8,32 --requests 200
+
+Prints JSON (or writes it to ``--output``) with, per scenario and
+concurrency: requests per second, p50/p95/p99 latency, errors and
+event-loop lag. Application logs are suppressed unless ``--verbose``.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+import main
+from agents import get_outreach_agent, get_resolution_agent
+from agents.outreach_agent import OutreachAgent
+from agents.resolution_agent import ResolutionAgent
+from benchmarks import fakes
+from benchmarks.user_search import keystrokes, percentiles
+from utils import db, email_utils, telemetry, user_search
+from utils.auth import get_user_id
+from utils.context_cache import CustomerContextCache, MemoryContextStore
+from utils.llm_cache import cached_chat_model
+from utils.user_search import UserSearchCache
+
+SCENARIOS = [
+    "generate_outreach",
+    "batch_outreach",
+    "send_batch_emails",
+    "users_search",
+    "resolve",
+]
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class LoopLagMonitor:
+    """Samples how late a ``sleep(interval)`` wakes up on the running loop"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _tick(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._tick())
+
+    async def stop(self) -> Dict[str, float]:
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        ms = [sample * 1000 for sample in self.samples] or [0.0]
+        return {**percentiles(ms), "max_ms": round(max(ms), 3)}
+
+
+async def _drain_background_tasks():
+    """Wait for work a handler left running (e.g. ticket resolution metrics)"""
+    current = asyncio.current_task()
+    pending = [
+        task
+        for task in asyncio.all_tasks()
+        if task is not current and "_track_metrics" in repr(task.get_coro())
+    ]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    request: Request,
+    concurrency: int,
+    total: int,
+    offset: int = 0,
+) -> Dict:
+    """Send ``total`` requests from ``concurrency`` workers and summarize them.
+
+    Requests are numbered from ``offset``; the number picks the request's inputs.
+    """
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < total:
+            index = issued
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await request(client, offset + index)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await _drain_background_tasks()
+    loop_lag = await monitor.stop()
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 2),
+        "latency": percentiles(latencies),
+        "loop_lag": loop_lag,
+    }
+
+
+def scenario_requests(users: List[Dict], batch_size: int) -> Dict[str, Request]:
+    """The request each scenario sends for its ``index``-th call"""
+    queries = keystrokes(users, typists=max(1, len(users) // 10))
+
+    def pick(index: int, count: int) -> List[Dict]:
+        start = (index * count) % len(users)
+        return [users[(start + i) % len(users)] for i in range(count)]
+
+    def generate_outreach(client, index):
+        return client.post(
+            "/api/generate-outreach",
+            json={
+                "request": "Follow up on their recent order",
+                "customer_id": pick(index, 1)[0]["id"],
+            },
+        )
+
+    def batch_outreach(client, index):
+        return client.post(
+            "/api/generate-batch-outreach",
+            json={
+                "users": [
+                    {"id": user["id"], "email": user["email"]}
+                    for user in pick(index, batch_size)
+                ],
+                "prompt": "Announce the spring collection",
+            },
+        )
+
+    def send_batch_emails(client, index):
+        return client.post(
+            "/api/send-batch-emails",
+            json={
+                "drafts": [
+                    {
+                        "userId": user["id"],
+                        "email": user["email"],
+                        "subject": "Spring collection",
+                        "content": "Our spring collection is here.",
+                    }
+                    for user in pick(index, batch_size)
+                ]
+            },
+        )
+
+    def users_search(client, index):
+        return client.get(
+            "/api/users/search", params={"q": queries[index % len(queries)]}
+        )
+
+    def resolve(client, index):
+        user_index = (index // 2) % len(users)
+        return client.post(
+            "/api/resolution/resolve",
+            json={
+                "command": "Offer an exchange and close the ticket",
+                "ticket_id": f"ticket-{user_index}-{index % 2}",
+            },
+        )
+
+    return {
+        "generate_outreach": generate_outreach,
+        "batch_outreach": batch_outreach,
+        "send_batch_emails": send_batch_emails,
+        "users_search": users_search,
+        "resolve": resolve,
+    }
+
+
+@contextlib.contextmanager
+def fake_backends(args) -> Iterator[Dict]:
+    """Point the app's shared clients at the fakes, restoring them on exit.
+
+    LangSmith tracing and batch job recovery are off while it is open.
+    Yields the fakes by name, plus the seeded users.
+    """
+    supabase = fakes.FakeSupabase(latency=args.db_latency)
+    users = fakes.seed_crm(supabase, args.customers)
+    mail = fakes.FakeMailServer(latency=args.mail_latency)
+    langsmith = fakes.FakeLangSmithClient()
+    transport = email_utils.mail_transport
+    saved = (
+        transport.base_url,
+        transport.api_key,
+        email_utils.MAILGUN_API_KEY,
+        telemetry.telemetry._client_factory,
+        user_search.search_cache,
+        main.RECOVER_JOBS,
+    )
+    tracing = os.environ.get("LANGCHAIN_TRACING_V2")
+
+    # The fakes never trace; keep LangSmith's decorators from trying to
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    main.RECOVER_JOBS = False
+    db.set_supabase(supabase)
+    transport.base_url = mail.start()
+    transport.api_key = email_utils.MAILGUN_API_KEY = "benchmark"
+    telemetry.telemetry._client_factory = lambda: langsmith
+    user_search.search_cache = UserSearchCache()
+
+    def model():
+        fake = fakes.FakeChatModel(
+            latency=args.llm_latency,
+            tokens_per_second=args.tokens_per_second,
+            tokens=args.tokens,
+        )
+        return cached_chat_model(fake, mode=args.llm_cache)
+
+    embeddings = fakes.fake_embeddings()
+    outreach_agent = OutreachAgent(
+        embeddings=embeddings,
+        vector_store=fakes.fake_vector_store(embeddings),
+        context_cache=CustomerContextCache(MemoryContextStore()),
+        model=model(),
+    )
+    resolution_agent = ResolutionAgent(model=model(), client=langsmith, tracing=False)
+
+    overrides = main.app.dependency_overrides
+    overrides[get_outreach_agent] = lambda: outreach_agent
+    overrides[get_resolution_agent] = lambda: resolution_agent
+    overrides[get_user_id] = lambda: users[0]["id"]
+    try:
+        yield {
+            "supabase": supabase,
+            "mail": mail,
+            "langsmith": langsmith,
+            "users": users,
+        }
+    finally:
+        for dependency in (get_outreach_agent, get_resolution_agent, get_user_id):
+            overrides.pop(dependency, None)
+        mail.stop()
+        db.set_supabase(None)
+        (
+            transport.base_url,
+            transport.api_key,
+            email_utils.MAILGUN_API_KEY,
+            telemetry.telemetry._client_factory,
+            user_search.search_cache,
+            main.RECOVER_JOBS,
+        ) = saved
+        if tracing is None:
+            os.environ.pop("LANGCHAIN_TRACING_V2", None)
+        else:
+            os.environ["LANGCHAIN_TRACING_V2"] = tracing
+
+
+async def run(args) -> Dict:
+    results: Dict[str, List[Dict]] = {}
+    with fake_backends(args) as backends:
+        scenarios = scenario_requests(backends["users"], args.batch_size)
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(
+                app=main.app, base_url="http://benchmark", timeout=None
+            ) as client:
+                for name in args.scenarios:
+                    # Each level gets fresh inputs rather than the previous
+                    # level's, which the app's caches would already hold
+                    results[name], offset = [], 0
+                    for concurrency in args.concurrency:
+                        results[name].append(
+                            await drive(
+                                client,
+                                scenarios[name],
+                                concurrency,
+                                args.requests,
+                                offset,
+                            )
+                        )
+                        offset += args.requests
+
+    return {
+        "config": {
+            "customers": args.customers,
+            "requests": args.requests,
+            "batch_size": args.batch_size,
+            "llm_latency": args.llm_latency,
+            "tokens": args.tokens,
+            "tokens_per_second": args.tokens_per_second,
+            "llm_cache": args.llm_cache,
+            "db_latency": args.db_latency,
+            "mail_latency": args.mail_latency,
+        },
+        "scenarios": results,
+        "backends": {
+            "database_queries": backends["supabase"].queries,
+            "emails_sent": backends["mail"].messages,
+            "langsmith_calls": backends["langsmith"].calls,
+        },
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        type=lambda value: [name for name in value.split(",") if name],
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,8,32",
+        type=lambda value: [int(level) for level in value.split(",")],
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--llm-cache", default="off")
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--mail-latency", type=float, default=0.05)
+    parser.add_argument("--output")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios {sorted(unknown)}. Use any of {SCENARIOS}")
+    return args
+
+
+def main_cli(argv: Optional[List[str]] = None) -> Dict:
+    args = parse_args(argv)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with contextlib.nullcontext() if args.verbose else quiet:
+        report = asyncio.run(run(args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,141 @@
+"""
+Benchmark /users/search keystroke latency against a 100k-user fixture.
+
+The fixture lives in memory behind a stand-in for the ``search_users`` RPC
+that behaves like the trigram-indexed query: queries of 3+ characters
+intersect trigram posting lists, shorter ones scan every user, and results
+are ranked and limited the same way. Each simulated user types names and
+email fragments one character at a time; every keystroke is one search.
+
+    python -m benchmarks.user_search --users 100000 --typists 200
+
+Prints JSON with per-keystroke latency percentiles with and without the
+autocomplete cache, and how many searches reached the database.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from utils import repositories, user_search
+from utils.user_search import UserSearchCache, rank_users
+
+FIRST_NAMES = [
+    "ada", "alan", "grace", "linus", "margaret", "dennis", "barbara", "ken",
+    "frances", "edsger", "radia", "john", "katherine", "donald", "hedy", "tim",
+]  # fmt: skip
+LAST_NAMES = [
+    "lovelace", "turing", "hopper", "torvalds", "hamilton", "ritchie", "liskov",
+    "thompson", "allen", "dijkstra", "perlman", "backus", "johnson", "knuth",
+]  # fmt: skip
+
+
+def make_users(count: int, seed: int = 7) -> List[Dict]:
+    rng = random.Random(seed)
+    users = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        suffix = "".join(rng.choices(string.ascii_lowercase, k=4))
+        users.append(
+            {
+                "id": f"user-{i}",
+                "name": f"{first.title()} {last.title()} {suffix}",
+                "email": f"{first}.{last}.{suffix}{i}@example.com",
+                "avatar_url": None,
+            }
+        )
+    return users
+
+
+def _trigrams(text: str):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class IndexedUserTable:
+    """In-memory users with a trigram index, answering like the RPC"""
+
+    def __init__(self, users: List[Dict]):
+        self.users = users
+        self.text = [f"{u['name']}\n{u['email']}".lower() for u in users]
+        self.index = defaultdict(list)
+        for position, text in enumerate(self.text):
+            for trigram in _trigrams(text):
+                self.index[trigram].append(position)
+        self.queries = 0
+
+    async def search(self, query: str, limit: int) -> List[Dict]:
+        return self.find(query, limit)
+
+    def find(self, query: str, limit: int) -> List[Dict]:
+        self.queries += 1
+        query = query.lower()
+        trigrams = _trigrams(query)
+        if trigrams:
+            postings = sorted((self.index.get(t, []) for t in trigrams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = range(len(self.users))
+        matches = [self.users[i] for i in candidates if query in self.text[i]]
+        return rank_users(matches, query)[:limit]
+
+
+def keystrokes(users: List[Dict], typists: int, seed: int = 11) -> List[str]:
+    """Prefixes typed by each simulated user, in order"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(typists):
+        user = rng.choice(users)
+        target = rng.choice([user["name"].split()[0], user["email"].split("@")[0]])
+        queries.extend(target[:end].lower() for end in range(1, len(target) + 1))
+    return queries
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def at(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+    return {"p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99)}
+
+
+async def run(queries: List[str], table: IndexedUserTable, cached: bool) -> Dict:
+    user_search.search_cache = UserSearchCache(ttl=3600 if cached else 0)
+    table.queries = 0
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        await user_search.search_users(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {**percentiles(latencies), "database_queries": table.queries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--typists", type=int, default=200)
+    args = parser.parse_args()
+
+    build_start = time.perf_counter()
+    users = make_users(args.users)
+    table = IndexedUserTable(users)
+    repositories.search_users = table.search
+    queries = keystrokes(users, args.typists)
+
+    report = {
+        "users": args.users,
+        "keystrokes": len(queries),
+        "fixture_seconds": round(time.perf_counter() - build_start, 2),
+        "uncached": asyncio.run(run(queries, table, cached=False)),
+        "cached": asyncio.run(run(queries, table, cached=True)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Success criteria compiled once into a rule set.
+
+``CriteriaMatcher`` compiles each criterion once: its normalized text and
+word set, and the rule for it with its phrase lists as tuples (quantity
+patterns are compiled once per target). A response is normalized once into
+a ``PreparedResponse`` shared by every criterion; it is only split into
+words when all of a criterion's words occur in it as substrings::
+
+    matcher = compile_criteria(test_case.success_criteria)
+    results = matcher.score(response, test_case)
+
+Rule types are registered with ``@rule_type`` and the criteria they answer
+are listed in ``CRITERIA_RULES``. Results match the original
+``OutreachEvaluator._check_criterion`` strategy by strategy.
+"""
+
+import functools
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+from evaluation.test_cases import TestCase
+
+RULE_TYPES: Dict[str, Callable[..., "Rule"]] = {}
+
+
+def rule_type(name: str):
+    """Register a rule class under ``name`` for use in ``CRITERIA_RULES``"""
+
+    def register(cls):
+        cls.type = name
+        RULE_TYPES[name] = cls
+        return cls
+
+    return register
+
+
+class PreparedResponse:
+    """A response normalized once and shared by every criterion"""
+
+    __slots__ = ("text", "_words")
+
+    def __init__(self, response: str):
+        self.text = response.strip().lower()
+        self._words: Optional[FrozenSet[str]] = None
+
+    @property
+    def words(self) -> FrozenSet[str]:
+        """The whitespace-separated words, split on first use only"""
+        if self._words is None:
+            self._words = frozenset(self.text.split())
+        return self._words
+
+
+class Rule:
+    """A criterion-specific check, compiled once"""
+
+    type = "rule"
+
+    def check(self, response: PreparedResponse, test_case: Optional[TestCase]) -> bool:
+        raise NotImplementedError
+
+
+@rule_type("any_phrase")
+class AnyPhrase(Rule):
+    """Met if any of the phrases occurs in the response"""
+
+    def __init__(self, phrases: Sequence[str]):
+        self.phrases = tuple(phrases)
+
+    def check(self, response, test_case):
+        text = response.text
+        for phrase in self.phrases:
+            if phrase in text:
+                return True
+        return False
+
+
+@rule_type("all_groups")
+class AllGroups(Rule):
+    """Met if every group has at least one phrase in the response"""
+
+    def __init__(self, groups: Sequence[Sequence[str]]):
+        self.patterns = [AnyPhrase(group) for group in groups]
+
+    def check(self, response, test_case):
+        return all(pattern.check(response, test_case) for pattern in self.patterns)
+
+
+@functools.lru_cache(maxsize=256)
+def _quantity_pattern(target_quantity: str) -> re.Pattern:
+    return re.compile(
+        "|".join(
+            [
+                rf"\b{target_quantity}\s*(?:units?|items?|pieces?|stock)\b",
+                rf"\bset\s*(?:to|at)\s*{target_quantity}\b",
+                rf"\bupdated\s*(?:to)?\s*{target_quantity}\b",
+            ]
+        )
+    )
+
+
+@rule_type("quantity")
+class QuantityUpdate(Rule):
+    """Met if the response states the stock quantity the test case expects"""
+
+    def check(self, response, test_case):
+        target_quantity = None
+        for change in getattr(test_case, "expected_db_changes", ()):
+            if (
+                change.table == "inventory"
+                and change.operation == "UPDATE"
+                and "stock_quantity" in change.fields
+            ):
+                target_quantity = change.fields["stock_quantity"]
+                break
+
+        if target_quantity is None:
+            return False
+        return _quantity_pattern(str(target_quantity)).search(response.text) is not None
+
+
+# Criterion (lowercased) -> (rule type, arguments)
+CRITERIA_RULES = {
+    "professional tone": (
+        "any_phrase",
+        ["best regards", "sincerely", "thank you", "regards", "please", "kindly"],
+    ),
+    "correctly identifies product": (
+        "all_groups",
+        [["denim", "jeans"], ["blue", "blu"], ["32", "size 32"]],
+    ),
+    "updates correct quantity": ("quantity",),
+    "provides reasoning": (
+        "any_phrase",
+        ["because", "since", "as", "therefore", "this ensures", "this will"],
+    ),
+    "verifies return eligibility": (
+        "any_phrase",
+        ["within", "window", "eligible", "qualify", "can return", "days ago"],
+    ),
+    "mentions return window": ("any_phrase", ["30-day", "30 day"]),
+    "explains return process": (
+        "any_phrase",
+        ["shipping label", "refund", "email", "process", "initiated", "return"],
+    ),
+    "offers size exchange": (
+        "any_phrase",
+        [
+            "different size",
+            "exchange",
+            "another size",
+            "size exchange",
+            "order a different",
+        ],
+    ),
+}
+
+
+def rule_for(criterion: str) -> Optional[Rule]:
+    """The rule answering a normalized criterion, if it has one"""
+    if criterion in CRITERIA_RULES:
+        name, *args = CRITERIA_RULES[criterion]
+        return RULE_TYPES[name](*args)
+    if "references" in criterion:
+        # "References brand-specific sizing" -> any of the words after the first
+        return AnyPhrase(criterion.split()[1:])
+    return None
+
+
+class CompiledCriterion:
+    """One criterion with its three strategies prepared"""
+
+    __slots__ = ("text", "words", "rule")
+
+    def __init__(self, criterion: str):
+        self.text = criterion.strip().lower()
+        self.words = tuple(set(self.text.split()))
+        self.rule = rule_for(self.text)
+
+    def check(self, response: PreparedResponse, test_case: Optional[TestCase]) -> bool:
+        text = response.text
+        # Strategy 1: direct substring match
+        if self.text in text:
+            return True
+        # Strategy 2: every word of the criterion appears in the response
+        # (words must at least be substrings before the response is split)
+        if all(word in text for word in self.words) and response.words.issuperset(
+            self.words
+        ):
+            return True
+        # Strategy 3: the criterion's own rule
+        if self.rule is not None:
+            return self.rule.check(response, test_case)
+        return False
+
+
+class CriteriaMatcher:
+    """Answers a fixed list of criteria for many responses"""
+
+    def __init__(self, criteria: Iterable[str]):
+        self.criteria = list(criteria)
+        self.compiled = {c: CompiledCriterion(c) for c in self.criteria}
+        self._ordered = [self.compiled[c] for c in self.criteria]
+
+    def prepare(self, response: str) -> PreparedResponse:
+        """Normalize a response once for all criteria"""
+        return PreparedResponse(response)
+
+    def check(
+        self,
+        response,
+        criterion: str,
+        test_case: Optional[TestCase] = None,
+    ) -> bool:
+        """Whether ``response`` (text or prepared) meets ``criterion``"""
+        if not isinstance(response, PreparedResponse):
+            response = PreparedResponse(response)
+        compiled = self.compiled.get(criterion)
+        if compiled is None:
+            compiled = compile_criteria([criterion]).compiled[criterion]
+        return compiled.check(response, test_case)
+
+    def score(self, response: str, test_case: Optional[TestCase] = None) -> List[bool]:
+        """Whether ``response`` meets each criterion, in order"""
+        prepared = PreparedResponse(response)
+        return [compiled.check(prepared, test_case) for compiled in self._ordered]
+
+    def score_batch(
+        self,
+        responses: Sequence[str],
+        test_cases: Optional[Sequence[Optional[TestCase]]] = None,
+    ) -> List[List[bool]]:
+        """Score N responses against every criterion: one row per response.
+
+        ``test_cases`` pairs each response with its test case (needed by
+        rules such as the expected quantity); omit it if no rule needs one.
+        """
+        if test_cases is None:
+            test_cases = [None] * len(responses)
+        ordered = self._ordered
+        return [
+            [compiled.check(prepared, test_case) for compiled in ordered]
+            for prepared, test_case in zip(map(PreparedResponse, responses), test_cases)
+        ]
+
+
+@functools.lru_cache(maxsize=128)
+def _compile(criteria: tuple) -> CriteriaMatcher:
+    return CriteriaMatcher(criteria)
+
+
+def compile_criteria(criteria: Iterable[str]) -> CriteriaMatcher:
+    """The matcher for a list of criteria, compiled once per distinct list"""
+    return _compile(tuple(criteria))
@@ -9,9 +9,9 @@ import time
 import uuid
 import logging
 from datetime import datetime
-import re
 
 from config.langsmith_config import langsmith_config
+from evaluation.criteria import compile_criteria
 from evaluation.test_cases import TestCase, ExpectedDatabaseChange
 
 # Configure logging
@@ -69,10 +69,12 @@ class OutreachEvaluator:
         # Store the actual response for manual review
         test_case.actual_response = generated_response
 
-        # Check each success criterion
+        # Check each success criterion against one scan of the response
+        matcher = compile_criteria(test_case.success_criteria)
+        prepared = matcher.prepare(generated_response)
         criteria_results = []
         for criterion in test_case.success_criteria:
-            is_met = self._check_criterion(generated_response, criterion, test_case)
+            is_met = matcher.check(prepared, criterion, test_case)
             logger.info(f"Criterion '{criterion}': {'✓' if is_met else '✗'}")
             criteria_results.append({"criterion": criterion, "met": is_met})
 
@@ -153,159 +155,9 @@ class OutreachEvaluator:
     ) -> bool:
         """
         Check if a response meets a specific criterion.
-        Uses multiple strategies to check if the criterion is met.
+        Uses multiple strategies to check if the criterion is met
+        (see evaluation.criteria for the compiled rules).
         """
-        # Clean and normalize the text
-        response = response.strip().lower()
-        criterion = criterion.strip().lower()
-
-        # Strategy 1: Direct substring match
-        if criterion in response:
-            return True
-
-        # Strategy 2: Check for word presence
-        response_words = set(response.split())
-        criterion_words = set(criterion.split())
-
-        # If all words in the criterion appear in the response
-        if criterion_words.issubset(response_words):
-            return True
-
-        # Strategy 3: Check for specific criteria
-        if criterion == "professional tone":
-            professional_phrases = [
-                "best regards",
-                "sincerely",
-                "thank you",
-                "regards",
-                "please",
-                "kindly",
-            ]
-            return any(phrase in response for phrase in professional_phrases)
-
-        if criterion == "correctly identifies product":
-            logger.info("Checking product identification...")
-            logger.info(f"Context: {test_case.context}")
-            logger.info(f"Response: {response}")
-
-            # Extract product details from context
-            product_details = []
-            if "product_id" in test_case.context:
-                # Parse product ID (e.g., "DNM32-BLU" -> "denim", "blue", "32")
-                pid = test_case.context["product_id"].lower()
-                parts = re.findall(r"[a-z]+|\d+", pid)
-                product_details.extend(parts)
-                logger.info(f"Product ID parts: {parts}")
-
-            # Add all string values from context
-            context_values = [
-                str(v).lower()
-                for v in test_case.context.values()
-                if isinstance(v, (str, int))
-            ]
-            product_details.extend(context_values)
-            logger.info(f"All product details: {product_details}")
-
-            # Check for key product identifiers
-            # For inventory update, we need the product type, color, and size
-            product_type_terms = ["denim", "jeans"]
-            color_terms = ["blue", "blu"]
-            size_terms = ["32", "size 32"]
-
-            has_product_type = any(term in response for term in product_type_terms)
-            has_color = any(term in response for term in color_terms)
-            has_size = any(term in response for term in size_terms)
-
-            logger.info(
-                f"Product type found: {has_product_type}, "
-                f"Color found: {has_color}, "
-                f"Size found: {has_size}"
-            )
-
-            return has_product_type and has_color and has_size
-
-        if criterion == "updates correct quantity":
-            logger.info("Checking quantity update...")
-            # Find the target quantity from the database changes
-            target_quantity = None
-            for change in test_case.expected_db_changes:
-                if (
-                    change.table == "inventory"
-                    and change.operation == "UPDATE"
-                    and "stock_quantity" in change.fields
-                ):
-                    target_quantity = change.fields["stock_quantity"]
-                    break
-
-            if target_quantity is None:
-                logger.warning("No target quantity found in expected database changes")
-                return False
-
-            logger.info(f"Looking for quantity: {target_quantity}")
-
-            # Look for the quantity in the response
-            quantity_patterns = [
-                rf"\b{target_quantity}\s*(?:units?|items?|pieces?|stock)\b",
-                rf"\bset\s*(?:to|at)\s*{target_quantity}\b",
-                rf"\bupdated\s*(?:to)?\s*{target_quantity}\b",
-            ]
-
-            for pattern in quantity_patterns:
-                if re.search(pattern, response):
-                    logger.info(f"Found quantity match with pattern: {pattern}")
-                    return True
-
-            return False
-
-        if "references" in criterion:
-            # Check if specific references are included
-            reference_terms = criterion.split()[1:]  # Skip the word "references"
-            return any(term.lower() in response for term in reference_terms)
-
-        if criterion == "provides reasoning":
-            reasoning_indicators = [
-                "because",
-                "since",
-                "as",
-                "therefore",
-                "this ensures",
-                "this will",
-            ]
-            return any(indicator in response for indicator in reasoning_indicators)
-
-        if criterion == "verifies return eligibility":
-            eligibility_terms = [
-                "within",
-                "window",
-                "eligible",
-                "qualify",
-                "can return",
-                "days ago",
-            ]
-            return any(term in response for term in eligibility_terms)
-
-        if criterion == "mentions return window":
-            return "30-day" in response or "30 day" in response
-
-        if criterion == "explains return process":
-            process_terms = [
-                "shipping label",
-                "refund",
-                "email",
-                "process",
-                "initiated",
-                "return",
-            ]
-            return any(term in response for term in process_terms)
-
-        if criterion == "offers size exchange":
-            exchange_terms = [
-                "different size",
-                "exchange",
-                "another size",
-                "size exchange",
-                "order a different",
-            ]
-            return any(term in response for term in exchange_terms)
-
-        return False
+        return compile_criteria(test_case.success_criteria).check(
+            response, criterion, test_case
+        )
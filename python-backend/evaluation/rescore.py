@@ -0,0 +1,255 @@
+"""
+Re-score stored responses offline against the current success criteria.
+
+Streams a JSONL file of ``{"test_case_id": ..., "response": ...}`` records,
+scores them in chunks on a process pool with the same compiled criteria
+``OutreachEvaluator.evaluate_response`` uses, and writes results as chunks
+finish:
+
+    python -m evaluation.rescore responses.jsonl --output scores.jsonl \\
+        --summary summary.json --workers 8
+
+``--output`` gets one line per record, in input order, carrying the
+record's input ``line`` number and its ``id`` when it has one, so scores
+can be joined back to their source records. ``--summary`` is
+rewritten after every chunk with the aggregates so far: per test case, the
+number of responses, mean success rate and the rate at which each
+criterion is met. Only ``--chunk-size`` x ``2 * --workers`` records are in
+memory at a time, whatever the input size.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from evaluation.criteria import compile_criteria
+from evaluation.test_cases import (
+    TestCase,
+    create_inventory_update_test,
+    create_return_process_test,
+    create_size_recommendation_test,
+)
+
+RESCORE_CHUNK_SIZE = int(os.getenv("RESCORE_CHUNK_SIZE", "1000"))
+
+# (line number, raw line) pairs
+Chunk = List[Tuple[int, str]]
+Aggregate = Dict[str, Dict]
+
+
+def load_test_cases() -> Dict[str, TestCase]:
+    """The evaluation test cases by ID"""
+    test_cases = [
+        create_inventory_update_test(),
+        create_size_recommendation_test(),
+        create_return_process_test(),
+    ]
+    return {test_case.id: test_case for test_case in test_cases}
+
+
+# Built once per worker process by _init_worker
+_test_cases: Optional[Dict[str, TestCase]] = None
+
+
+def _init_worker():
+    global _test_cases
+    _test_cases = load_test_cases()
+
+
+def score_record(record: Dict, test_cases: Dict[str, TestCase]) -> Dict:
+    """Score one stored response against its test case's criteria"""
+    test_case = test_cases.get(record.get("test_case_id"))
+    if test_case is None:
+        raise ValueError(f"Unknown test case '{record.get('test_case_id')}'")
+    response = record.get("response")
+    if not isinstance(response, str):
+        raise ValueError("Record has no response text")
+
+    met = compile_criteria(test_case.success_criteria).score(response, test_case)
+    return {
+        "test_case_id": test_case.id,
+        "success_rate": sum(met) / len(met) if met else 0.0,
+        "criteria": dict(zip(test_case.success_criteria, met)),
+    }
+
+
+def score_chunk(chunk: Chunk) -> Tuple[List[str], Aggregate]:
+    """Score a chunk of raw JSONL lines in a worker process.
+
+    Returns the output lines and the chunk's aggregate, so only small
+    summaries and the output travel back to the parent.
+    """
+    if _test_cases is None:
+        _init_worker()
+    output, aggregate = [], new_aggregate()
+    for line_number, line in chunk:
+        result = {"line": line_number}
+        try:
+            record = json.loads(line)
+            if isinstance(record, dict) and "id" in record:
+                result["id"] = record["id"]
+            scores = score_record(record, _test_cases)
+        except Exception as e:
+            aggregate["errors"] += 1
+            result["error"] = str(e)
+        else:
+            add_result(aggregate, scores)
+            result.update(scores)
+        output.append(json.dumps(result))
+    return output, aggregate
+
+
+# ---------------------------------------------------------------------------
+# Aggregates
+# ---------------------------------------------------------------------------
+
+
+def new_aggregate() -> Aggregate:
+    return {"records": 0, "errors": 0, "test_cases": {}}
+
+
+def add_result(aggregate: Aggregate, result: Dict):
+    aggregate["records"] += 1
+    totals = aggregate["test_cases"].setdefault(
+        result["test_case_id"], {"responses": 0, "success_sum": 0.0, "criteria": {}}
+    )
+    totals["responses"] += 1
+    totals["success_sum"] += result["success_rate"]
+    for criterion, met in result["criteria"].items():
+        totals["criteria"][criterion] = totals["criteria"].get(criterion, 0) + met
+
+
+def merge_aggregates(total: Aggregate, part: Aggregate):
+    total["records"] += part["records"]
+    total["errors"] += part["errors"]
+    for test_case_id, totals in part["test_cases"].items():
+        into = total["test_cases"].setdefault(
+            test_case_id, {"responses": 0, "success_sum": 0.0, "criteria": {}}
+        )
+        into["responses"] += totals["responses"]
+        into["success_sum"] += totals["success_sum"]
+        for criterion, met in totals["criteria"].items():
+            into["criteria"][criterion] = into["criteria"].get(criterion, 0) + met
+
+
+def summarize(aggregate: Aggregate, seconds: float) -> Dict:
+    """Rates per test case and criterion from the running totals"""
+    lines = aggregate["records"] + aggregate["errors"]
+    return {
+        "records": aggregate["records"],
+        "errors": aggregate["errors"],
+        "seconds": round(seconds, 3),
+        "records_per_second": round(lines / seconds, 1) if seconds else 0,
+        "test_cases": {
+            test_case_id: {
+                "responses": totals["responses"],
+                "success_rate": totals["success_sum"] / totals["responses"],
+                "criteria": {
+                    criterion: met / totals["responses"]
+                    for criterion, met in totals["criteria"].items()
+                },
+            }
+            for test_case_id, totals in sorted(aggregate["test_cases"].items())
+        },
+    }
+
+
+def _write_summary(path: str, summary: Dict):
+    # Write then rename, so readers never see a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+
+def read_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[Chunk]:
+    """Group non-blank lines into chunks of (line number, line) pairs"""
+    numbered = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+    while True:
+        batch = list(islice(numbered, chunk_size))
+        if not batch:
+            return
+        yield batch
+
+
+def rescore(
+    lines: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = RESCORE_CHUNK_SIZE,
+    output: Optional[TextIO] = None,
+    summary_path: Optional[str] = None,
+) -> Dict:
+    """Score every record in ``lines`` and return the summary.
+
+    At most ``2 * workers`` chunks are read ahead of the one being written,
+    which keeps memory bounded and output in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = new_aggregate()
+    start = time.perf_counter()
+    pending = deque()
+
+    def collect(future):
+        output_lines, aggregate = future.result()
+        if output is not None:
+            output.write("\n".join(output_lines) + "\n")
+        merge_aggregates(total, aggregate)
+        if summary_path:
+            _write_summary(summary_path, summarize(total, time.perf_counter() - start))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for chunk in read_chunks(lines, chunk_size):
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+
+    summary = summarize(total, time.perf_counter() - start)
+    if summary_path:
+        _write_summary(summary_path, summary)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("input", help="JSONL of {test_case_id, response}; - for stdin")
+    parser.add_argument("--output", help="Write per-record scores (JSONL) here")
+    parser.add_argument("--summary", help="Keep the aggregated summary (JSON) here")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=RESCORE_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = open(args.output, "w") if args.output else None
+    try:
+        summary = rescore(
+            source,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            output=output,
+            summary_path=args.summary,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not None:
+            output.close()
+
+    print(json.dumps(summary, indent=2))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,94 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 from routes.outreach import router as outreach_router
 from routes.resolution import router as resolution_router
+from utils.email_utils import mail_transport
+from utils.telemetry import telemetry
+from agents import get_outreach_agent, get_resolution_agent
+from agents.outreach_jobs import job_queue, recover_batch_jobs
+from utils.context_cache import get_customer_context_cache
+from utils.metrics import registry
+from utils.singleflight import context_flight
+from utils.user_search import search_cache
 
 # Load environment variables
 load_dotenv()
 
+# Build the agents during startup instead of on the first request
+PRELOAD_AGENTS = os.getenv("PRELOAD_AGENTS", "false").lower() == "true"
+
+# Pick up batch outreach jobs left unfinished by a previous process
+RECOVER_JOBS = os.getenv("OUTREACH_JOB_RECOVERY", "true").lower() == "true"
+
+
+# Export the shared caches' and queues' counters with the request metrics
+cache_events = registry.counter(
+    "backend_cache_events_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+for result in ("hits", "misses", "coalesced"):
+    cache_events.set_function(
+        lambda result=result: context_flight.stats()[result],
+        cache="singleflight",
+        result=result,
+    )
+for result in ("hits", "misses", "patches", "invalidations"):
+    cache_events.set_function(
+        lambda result=result: get_customer_context_cache().stats()[result],
+        cache="customer_context",
+        result=result,
+    )
+for result in ("hits", "prefix_hits", "misses"):
+    cache_events.set_function(
+        lambda result=result: getattr(search_cache, result),
+        cache="user_search",
+        result=result,
+    )
+
+telemetry_records = registry.counter(
+    "backend_telemetry_records_total", "LangSmith records by outcome", ["outcome"]
+)
+for outcome in ("sent", "failed", "dropped", "spilled"):
+    telemetry_records.set_function(
+        lambda outcome=outcome: getattr(telemetry, outcome), outcome=outcome
+    )
+
+registry.gauge(
+    "backend_outreach_jobs_active", "Batch outreach jobs queued or running"
+).set_function(lambda: job_queue.active_jobs)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open long-lived clients on startup and close them on shutdown."""
+    await mail_transport.start()
+    # Fail now rather than on the first request if the context cache backend
+    # is misconfigured (e.g. redis without the redis package)
+    get_customer_context_cache()
+    if PRELOAD_AGENTS:
+        get_outreach_agent()
+        get_resolution_agent()
+    if RECOVER_JOBS:
+        try:
+            await recover_batch_jobs()
+        except Exception as e:
+            print(f"Error recovering batch outreach jobs: {str(e)}")
+    yield
+    await job_queue.close()
+    await mail_transport.close()
+    # Send any telemetry still queued before the process exits, on its own
+    # thread rather than the database executor
+    await asyncio.to_thread(telemetry.close)
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="OutreachGPT API",
     description="API for generating personalized customer outreach messages",
     version="1.0.0",
@@ -42,6 +122,14 @@ async def root():
     return {"status": "healthy", "message": "OutreachGPT API is running"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
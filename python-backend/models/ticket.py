@@ -0,0 +1,51 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+# Columns for a snapshot: the ticket with its customer and interactions joined
+TICKET_SNAPSHOT_COLUMNS = """
+    *,
+    customer:users!tickets_customer_id_fkey (
+        id,
+        name,
+        email
+    ),
+    interactions (
+        id,
+        created_at,
+        type,
+        content,
+        author_id
+    )
+"""
+
+
+class TicketCustomer(BaseModel):
+    id: str
+    name: Optional[str] = None
+    email: Optional[str] = None
+
+
+class TicketInteraction(BaseModel):
+    id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    type: Optional[str] = None
+    content: Any = None
+    author_id: Optional[str] = None
+
+
+class TicketSnapshot(BaseModel):
+    """A ticket as read once for the resolution pipeline"""
+
+    id: str
+    title: str
+    description: Optional[str] = None
+    status: str
+    priority: Optional[str] = None
+    created_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+    customer_id: Optional[str] = None
+    assigned_to_id: Optional[str] = None
+    metadata: Optional[dict] = None
+    customer: Optional[TicketCustomer] = None
+    interactions: List[TicketInteraction] = []
@@ -1,11 +1,24 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncIterator, List, Optional, Dict
 from pydantic import BaseModel
 from datetime import datetime
+import asyncio
+import json
 import uuid
-from utils.email_utils import send_email
-from utils.db import supabase
-from agents import agent
+from utils.email_utils import send_bulk_emails
+from utils import repositories
+from utils.email_log_writer import EmailLogWriter
+from utils.singleflight import context_flight
+from utils import user_search
+from agents import get_outreach_agent
+from agents.outreach_jobs import (
+    create_batch_job,
+    draft_from_result,
+    draft_log_row,
+    get_batch_job,
+    resume_batch_job,
+)
 
 router = APIRouter()
 
@@ -53,10 +66,27 @@ class BatchEmailResponse(BaseModel):
     success: bool
     sent_count: int
     errors: Optional[List[Dict[str, str]]] = None
+    results: Optional[List[Dict]] = None
+
+
+def get_batch_outreach_agent(request: Request, background: bool = Query(False)):
+    """The OutreachAgent for an inline batch, or None for a background job.
+
+    Background jobs build their own agent in the worker. Overrides of
+    ``get_outreach_agent`` still apply.
+    """
+    if background:
+        return None
+    factory = request.app.dependency_overrides.get(
+        get_outreach_agent, get_outreach_agent
+    )
+    return factory()
 
 
 @router.post("/generate-outreach")
-async def generate_outreach(request: OutreachRequest):
+async def generate_outreach(
+    request: OutreachRequest, agent=Depends(get_outreach_agent)
+):
     """Generate a personalized outreach message for a single customer"""
     try:
         result = await agent.generate_outreach(
@@ -68,8 +98,20 @@ async def generate_outreach(request: OutreachRequest):
 
 
 @router.post("/generate-batch-outreach", response_model=BatchOutreachResponse)
-async def generate_batch_outreach(request: BatchOutreachRequest):
-    """Generate personalized outreach messages for multiple users"""
+async def generate_batch_outreach(
+    request: BatchOutreachRequest,
+    stream: bool = Query(False),
+    background: bool = Query(False),
+    agent=Depends(get_batch_outreach_agent),
+):
+    """Generate personalized outreach messages for multiple users.
+
+    With ``?stream=true`` the response is NDJSON: one line per draft as soon
+    as it and its email_logs row exist, then a summary line. With
+    ``?background=true`` the batch is queued as a job and its status is
+    returned immediately with a 202; poll ``/batch-jobs/{job_id}`` for
+    progress.
+    """
     print(f"\n=== Starting batch outreach generation ===")
     print(f"Request data: {request}")
 
@@ -79,37 +121,26 @@ async def generate_batch_outreach(request: BatchOutreachRequest):
     if not request.prompt:
         raise HTTPException(status_code=422, detail="No prompt provided in request")
 
+    if background:
+        try:
+            status = await create_batch_job(
+                request.users, request.prompt, request.options
+            )
+        except Exception as e:
+            print(f"Error queueing batch outreach job: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+        return JSONResponse(status_code=202, content=status)
+
     try:
         # Create a batch session to track this operation
         batch_id = str(uuid.uuid4())
-        session_data = {
-            "customer_ids": [user["id"] for user in request.users],
-            "prompt": request.prompt,
-            "timestamp": datetime.now().isoformat(),
-        }
+        session_id = await _create_batch_session(request, batch_id)
 
-        # Create an outreach session for tracking
-        session_response = (
-            supabase.table("agent_outreach_sessions")
-            .insert(
-                {
-                    "customer_id": request.users[0]["id"],  # Primary target
-                    "status": "ACTIVE",
-                    "session_goals": {
-                        "type": "batch_outreach",
-                        "prompt": request.prompt,
-                        "target_count": len(request.users),
-                    },
-                    "metadata": {
-                        "batch_id": batch_id,
-                        "all_targets": [user["id"] for user in request.users],
-                    },
-                }
+        if stream:
+            return StreamingResponse(
+                _stream_batch_outreach(agent, request, batch_id, session_id),
+                media_type="application/x-ndjson",
             )
-            .execute()
-        )
-
-        session_id = session_response.data[0]["id"]
 
         # Format requests for the agent
         requests = [
@@ -120,62 +151,41 @@ async def generate_batch_outreach(request: BatchOutreachRequest):
         # Generate drafts using the agent
         results = await agent.generate_batch_outreach(requests, request.options)
 
-        # Store drafts in email_logs and prepare response
+        # Store drafts in email_logs (buffered multi-row inserts) and prepare response
         drafts = []
-        for user, result in zip(request.users, results):
-            try:
-                if "error" in result:
-                    draft_content = f"Error: {result['error']}"
-                    status = "error"
-                else:
-                    draft_content = result["response"]
-                    status = "draft"
-
-                # Log the email draft
-                email_log = {
-                    "recipient_email": user["email"],
-                    "status": "FAILED",  # Start with FAILED
-                    "ai_draft": draft_content,
-                    "source": "AI",
-                    "error_message": result.get("error") if "error" in result else None,
-                    "created_at": datetime.now().isoformat(),
-                }
+        async with EmailLogWriter() as log_writer:
+            for index, (user, result) in enumerate(zip(request.users, results)):
+                try:
+                    # Log the email draft
+                    await log_writer.add(index, draft_log_row(user, result))
 
-                log_response = supabase.table("email_logs").insert(email_log).execute()
+                    drafts.append(draft_from_result(user, result))
 
-                drafts.append(
-                    {
-                        "userId": user["id"],
-                        "content": draft_content,
-                        "status": status,
-                        "email_log_id": (
-                            log_response.data[0]["id"] if log_response.data else None
-                        ),
-                    }
-                )
+                except Exception as e:
+                    print(f"Error processing result for user {user['id']}: {str(e)}")
+                    drafts.append(
+                        {
+                            "userId": user["id"],
+                            "content": f"Error: {str(e)}",
+                            "status": "error",
+                        }
+                    )
 
-            except Exception as e:
-                print(f"Error processing result for user {user['id']}: {str(e)}")
-                drafts.append(
-                    {
-                        "userId": user["id"],
-                        "content": f"Error: {str(e)}",
-                        "status": "error",
-                    }
+        for index, draft in enumerate(drafts):
+            if draft["status"] == "error" and index not in log_writer.ids:
+                continue
+            if index in log_writer.errors:
+                print(
+                    f"Error processing result for user {draft['userId']}: {log_writer.errors[index]}"
                 )
+                draft["content"] = f"Error: {log_writer.errors[index]}"
+                draft["status"] = "error"
+            else:
+                draft["email_log_id"] = log_writer.ids.get(index)
 
         # Update session status
-        supabase.table("agent_outreach_sessions").update(
-            {
-                "status": "COMPLETED",
-                "completion_metrics": {
-                    "total_processed": len(drafts),
-                    "successful": len([d for d in drafts if d["status"] != "error"]),
-                    "failed": len([d for d in drafts if d["status"] == "error"]),
-                    "completed_at": datetime.now().isoformat(),
-                },
-            }
-        ).eq("id", session_id).execute()
+        successful = len([d for d in drafts if d["status"] != "error"])
+        await _complete_batch_session(session_id, len(drafts), successful)
 
         response = BatchOutreachResponse(
             drafts=drafts,
@@ -184,7 +194,7 @@ async def generate_batch_outreach(request: BatchOutreachRequest):
                 "session_id": session_id,
                 "timestamp": datetime.now().isoformat(),
                 "total_drafts": len(drafts),
-                "successful_drafts": len([d for d in drafts if d["status"] != "error"]),
+                "successful_drafts": successful,
             },
         )
         return response
@@ -198,24 +208,178 @@ async def generate_batch_outreach(request: BatchOutreachRequest):
 
         # Update session status if we have a session_id
         if "session_id" in locals():
-            try:
-                supabase.table("agent_outreach_sessions").update(
-                    {
-                        "status": "FAILED",
-                        "completion_metrics": {
-                            "error": str(e),
-                            "failed_at": datetime.now().isoformat(),
-                        },
-                    }
-                ).eq("id", session_id).execute()
-            except Exception as update_error:
-                print(f"Error updating session status: {str(update_error)}")
+            await _fail_batch_session(session_id, e)
+
+        raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/batch-jobs/{job_id}")
+async def get_batch_job_status(job_id: str, include_drafts: bool = Query(False)):
+    """Get the progress of a background batch outreach job"""
+    try:
+        status = await get_batch_job(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if status is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+
+    if include_drafts:
+        log_ids = [
+            entry["email_log_id"]
+            for entry in status["customers"].values()
+            if entry.get("email_log_id")
+        ]
+        logs = await repositories.get_email_logs(log_ids, "id, ai_draft")
+        drafts = {log["id"]: log["ai_draft"] for log in logs}
+        for entry in status["customers"].values():
+            entry["content"] = drafts.get(entry.get("email_log_id"))
+    return status
+
+
+@router.post("/batch-jobs/{job_id}/resume")
+async def resume_batch_job_route(job_id: str):
+    """Queue an interrupted or failed batch outreach job again"""
+    try:
+        status = await resume_batch_job(job_id)
+    except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if status is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return status
+
+
+async def _create_batch_session(request: BatchOutreachRequest, batch_id: str) -> str:
+    """Create the outreach session that tracks a batch and return its ID"""
+    session_rows = await repositories.create_outreach_session(
+        {
+            "customer_id": request.users[0]["id"],  # Primary target
+            "status": "ACTIVE",
+            "session_goals": {
+                "type": "batch_outreach",
+                "prompt": request.prompt,
+                "target_count": len(request.users),
+            },
+            "metadata": {
+                "batch_id": batch_id,
+                "all_targets": [user["id"] for user in request.users],
+            },
+        }
+    )
+    return session_rows[0]["id"]
+
+
+async def _complete_batch_session(session_id: str, total: int, successful: int):
+    """Mark a batch session completed with its draft counts"""
+    await repositories.update_outreach_session(
+        session_id,
+        {
+            "status": "COMPLETED",
+            "completion_metrics": _completion_metrics(total, successful),
+        },
+    )
+
+
+def _completion_metrics(total: int, successful: int) -> Dict:
+    return {
+        "total_processed": total,
+        "successful": successful,
+        "failed": total - successful,
+        "completed_at": datetime.now().isoformat(),
+    }
+
+
+async def _fail_batch_session(session_id: str, error: Exception):
+    """Mark a batch session failed, logging rather than raising on error"""
+    try:
+        await repositories.update_outreach_session(
+            session_id,
+            {
+                "status": "FAILED",
+                "completion_metrics": {
+                    "error": str(error),
+                    "failed_at": datetime.now().isoformat(),
+                },
+            },
+        )
+    except Exception as update_error:
+        print(f"Error updating session status: {str(update_error)}")
+
+
+async def _stream_batch_outreach(
+    agent, request: BatchOutreachRequest, batch_id: str, session_id: str
+) -> AsyncIterator[str]:
+    """Yield NDJSON lines for a batch as its drafts are generated and logged.
+
+    Drafts that finish together are logged with one multi-row insert before
+    their lines are written, so every line carries its email_log_id. Only the
+    running counts are kept between steps. If the client disconnects, the
+    session is marked failed.
+    """
+    requests = [
+        {"customer_id": user["id"], "request": request.prompt} for user in request.users
+    ]
+    total = successful = 0
+    # Set once the session is marked completed or failed
+    closed = False
+
+    try:
+        async for finished in agent.iter_batch_outreach(requests, request.options):
+            log_writer = EmailLogWriter()
+            drafts = {}
+            for index, result in finished:
+                user = request.users[index]
+                drafts[index] = draft_from_result(user, result)
+                await log_writer.add(index, draft_log_row(user, result))
+            await log_writer.flush()
+
+            for index, draft in drafts.items():
+                if index in log_writer.errors:
+                    draft["content"] = f"Error: {log_writer.errors[index]}"
+                    draft["status"] = "error"
+                else:
+                    draft["email_log_id"] = log_writer.ids.get(index)
+                total += 1
+                successful += draft["status"] != "error"
+                yield json.dumps({"type": "draft", **draft}) + "\n"
+
+        await _complete_batch_session(session_id, total, successful)
+        closed = True
+        yield json.dumps(
+            {
+                "type": "summary",
+                "batch_id": batch_id,
+                "session_id": session_id,
+                "timestamp": datetime.now().isoformat(),
+                "total_drafts": total,
+                "successful_drafts": successful,
+                "completion_metrics": _completion_metrics(total, successful),
+            }
+        ) + "\n"
+
+    except Exception as e:
+        print(f"Error streaming batch outreach: {str(e)}")
+        await _fail_batch_session(session_id, e)
+        closed = True
+        yield json.dumps(
+            {
+                "type": "error",
+                "batch_id": batch_id,
+                "session_id": session_id,
+                "error": str(e),
+                "total_drafts": total,
+            }
+        ) + "\n"
+
+    finally:
+        if not closed:
+            # The client went away mid-stream (CancelledError or GeneratorExit).
+            # An await here can be cancelled again, so update from a new task
+            error = ConnectionError(f"Client disconnected after {total} drafts")
+            asyncio.create_task(_fail_batch_session(session_id, error))
 
 
 @router.get("/customer-context/{customer_id}")
-async def get_customer_context(customer_id: str):
+async def get_customer_context(customer_id: str, agent=Depends(get_outreach_agent)):
     """Get the full context for a customer"""
     try:
         context = await agent.get_customer_context(customer_id)
@@ -258,41 +422,8 @@ async def search_users(q: str = Query(..., min_length=1)):
     print(f"Search query: {q}")
 
     try:
-        # Search in Supabase using the correct OR syntax
-        print("Executing Supabase query...")
-        response = (
-            supabase.table("users")
-            .select("id, name, email, avatar_url")
-            .ilike("name", f"%{q}%")
-            .execute()
-        )
-        print(f"Raw Supabase response: {response}")
-
-        name_matches = response.data if response and hasattr(response, "data") else []
-
-        # Search by email in a separate query
-        email_response = (
-            supabase.table("users")
-            .select("id, name, email, avatar_url")
-            .ilike("email", f"%{q}%")
-            .execute()
-        )
-
-        email_matches = (
-            email_response.data
-            if email_response and hasattr(email_response, "data")
-            else []
-        )
-
-        # Combine and deduplicate results
-        all_users = name_matches + [
-            user
-            for user in email_matches
-            if user["id"] not in [u["id"] for u in name_matches]
-        ]
-
-        # Limit to 10 results
-        users = all_users[:10]
+        # One indexed query with the limit pushed down, or the autocomplete cache
+        users = await user_search.search_users(q)
 
         print(f"Found {len(users)} users")
         return [
@@ -320,33 +451,34 @@ async def send_batch_emails(request: BatchEmailRequest):
     try:
         sent_count = 0
         errors = []
+        results = []
+
+        # Send everything through the pooled, rate limited bulk pipeline
+        send_results = await send_bulk_emails(
+            [
+                {"to": draft.email, "subject": draft.subject, "body": draft.content}
+                for draft in request.drafts
+            ]
+        )
 
-        for draft in request.drafts:
-            try:
-                # Update existing email log or create new one
+        async with EmailLogWriter() as log_writer:
+            for index, (draft, send_result) in enumerate(
+                zip(request.drafts, send_results)
+            ):
                 email_log_data = {
                     "recipient_email": draft.email,
-                    "status": "FAILED",  # Start with FAILED, update to SENT on success
+                    "status": "SENT" if send_result.success else "FAILED",
                     "ai_draft": draft.content,
                     "source": "AI",
                     "sent_at": datetime.now().isoformat(),
                     "error_message": None,  # Will be updated if there's an error
                 }
 
-                # Try to send the email using the send_email function
-                try:
-                    await send_email(
-                        to=draft.email,
-                        subject=draft.subject,
-                        body=draft.content,
-                    )
-
-                    email_log_data["status"] = "SENT"
+                if send_result.success:
                     sent_count += 1
                     print(f"Successfully sent email to {draft.email}")
-
-                except Exception as e:
-                    error_msg = f"Failed to send email: {str(e)}"
+                else:
+                    error_msg = f"Failed to send email: {send_result.error}"
                     print(error_msg)
                     email_log_data["error_message"] = error_msg
                     errors.append(
@@ -357,19 +489,32 @@ async def send_batch_emails(request: BatchEmailRequest):
                         }
                     )
 
-                # Update or create email log
-                supabase.table("email_logs").insert(email_log_data).execute()
-
-            except Exception as e:
-                print(f"Error processing draft for user {draft.userId}: {str(e)}")
-                errors.append(
-                    {"userId": draft.userId, "email": draft.email, "error": str(e)}
+                results.append(
+                    {
+                        "userId": draft.userId,
+                        "email": draft.email,
+                        "success": send_result.success,
+                        "status": send_result.status,
+                        "attempts": send_result.attempts,
+                        "error": send_result.error,
+                    }
                 )
 
+                # Buffer the email log; rows are written as multi-row inserts
+                await log_writer.add(index, email_log_data)
+
+        for index, error in log_writer.errors.items():
+            draft = request.drafts[index]
+            print(f"Error processing draft for user {draft.userId}: {error}")
+            errors.append(
+                {"userId": draft.userId, "email": draft.email, "error": error}
+            )
+
         return BatchEmailResponse(
             success=len(errors) == 0,
             sent_count=sent_count,
             errors=errors if errors else None,
+            results=results,
         )
 
     except Exception as e:
@@ -378,49 +523,16 @@ async def send_batch_emails(request: BatchEmailRequest):
 
 
 async def get_ticket_data(ticket_id: str):
-    """Fetch ticket data from Supabase."""
+    """Fetch ticket data from Supabase.
+
+    Concurrent requests for the same ticket share one fetch, and the result
+    is reused briefly (see ``utils.singleflight``).
+    """
     try:
-        # First try to get the ticket with joined data
-        response = (
-            supabase.table("tickets")
-            .select(
-                """
-                *,
-                customer:users!tickets_customer_id_fkey (
-                    id,
-                    name,
-                    email
-                ),
-                assigned_to:users!tickets_assigned_to_id_fkey (
-                    id,
-                    name,
-                    email
-                )
-                """
-            )
-            .eq("id", ticket_id)
-            .single()
-            .execute()
+        ticket_data = await context_flight.load(
+            "ticket", ticket_id, lambda: _load_ticket_data(ticket_id)
         )
 
-        ticket_data = response.data
-
-        # If customer data is not properly joined, fetch it separately
-        if (
-            ticket_data
-            and ticket_data.get("customer_id")
-            and not ticket_data.get("customer")
-        ):
-            customer_response = (
-                supabase.table("users")
-                .select("id, name, email")
-                .eq("id", ticket_data["customer_id"])
-                .single()
-                .execute()
-            )
-            if customer_response.data:
-                ticket_data["customer"] = customer_response.data
-
         if not ticket_data:
             raise HTTPException(status_code=404, detail="Ticket not found")
 
@@ -430,6 +542,40 @@ async def get_ticket_data(ticket_id: str):
         raise HTTPException(status_code=404, detail=f"Ticket not found: {str(e)}")
 
 
+async def _load_ticket_data(ticket_id: str) -> Optional[Dict]:
+    # First try to get the ticket with joined data
+    ticket_data = await repositories.get_ticket(
+        ticket_id,
+        """
+        *,
+        customer:users!tickets_customer_id_fkey (
+            id,
+            name,
+            email
+        ),
+        assigned_to:users!tickets_assigned_to_id_fkey (
+            id,
+            name,
+            email
+        )
+        """,
+    )
+
+    # If customer data is not properly joined, fetch it separately
+    if (
+        ticket_data
+        and ticket_data.get("customer_id")
+        and not ticket_data.get("customer")
+    ):
+        customer = await repositories.get_user(
+            ticket_data["customer_id"], "id, name, email"
+        )
+        if customer:
+            ticket_data["customer"] = customer
+
+    return ticket_data
+
+
 @router.get("/tickets/{ticket_id}")
 async def get_ticket(ticket_id: str):
     """Get ticket data including customer information."""
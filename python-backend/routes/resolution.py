@@ -1,11 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict
-from agents.resolution_agent import ResolutionAgent
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Optional
+import json
+import os
+from agents import get_resolution_agent
 from utils.auth import get_user_id
 from pydantic import BaseModel
 
 router = APIRouter()
-resolution_agent = ResolutionAgent()
+
+# Most tickets one /resolve-batch call may resolve
+RESOLUTION_BATCH_MAX_TICKETS = int(os.getenv("RESOLUTION_BATCH_MAX_TICKETS", "500"))
 
 
 class ResolutionCommand(BaseModel):
@@ -15,7 +20,9 @@ class ResolutionCommand(BaseModel):
 
 @router.post("/resolve")
 async def resolve_ticket(
-    command: ResolutionCommand, user_id: str = Depends(get_user_id)
+    command: ResolutionCommand,
+    user_id: str = Depends(get_user_id),
+    resolution_agent=Depends(get_resolution_agent),
 ) -> Dict:
     """Process a natural language command to resolve a ticket"""
     try:
@@ -26,3 +33,78 @@ async def resolve_ticket(
     except Exception as e:
         print(f"Error in resolve_ticket route: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+class BatchTicketCommand(BaseModel):
+    ticket_id: str
+    command: Optional[str] = None
+
+
+class BatchResolutionCommand(BaseModel):
+    """Tickets to resolve, by ID or with their own commands.
+
+    ``command`` applies to every ticket that doesn't bring its own.
+    """
+
+    command: Optional[str] = None
+    ticket_ids: List[str] = []
+    tickets: List[BatchTicketCommand] = []
+
+
+@router.post("/resolve-batch")
+async def resolve_tickets(
+    request: BatchResolutionCommand,
+    user_id: str = Depends(get_user_id),
+    resolution_agent=Depends(get_resolution_agent),
+) -> Dict:
+    """Resolve many tickets at once with a shared or per-ticket command"""
+    commands: Dict[str, str] = {}
+    tickets = [
+        BatchTicketCommand(ticket_id=ticket_id) for ticket_id in request.ticket_ids
+    ]
+    for ticket in tickets + request.tickets:
+        command = ticket.command or request.command
+        if not command:
+            raise HTTPException(
+                status_code=422, detail=f"No command for ticket {ticket.ticket_id}"
+            )
+        commands[ticket.ticket_id] = command
+
+    if not commands:
+        raise HTTPException(status_code=422, detail="No tickets to resolve")
+    if len(commands) > RESOLUTION_BATCH_MAX_TICKETS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {RESOLUTION_BATCH_MAX_TICKETS} tickets per batch",
+        )
+
+    try:
+        return await resolution_agent.resolve_tickets(
+            list(commands.items()), author_id=user_id
+        )
+    except Exception as e:
+        print(f"Error in resolve_tickets route: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/resolve/stream")
+async def stream_resolve_ticket(
+    command: ResolutionCommand,
+    user_id: str = Depends(get_user_id),
+    resolution_agent=Depends(get_resolution_agent),
+) -> StreamingResponse:
+    """Resolve a ticket, streaming the resolution as Server-Sent Events"""
+    events = resolution_agent.stream_command(
+        command=command.command, ticket_id=command.ticket_id, author_id=user_id
+    )
+    return StreamingResponse(
+        _format_sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _format_sse(events: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    """Encode agent events in the text/event-stream format"""
+    async for event in events:
+        yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
@@ -38,6 +38,11 @@ if __name__ == "__main__":
         if summary["total_tests"] > 0:
             success_rate = (summary["successful_tests"] / summary["total_tests"]) * 100
             print(f"Success Rate: {success_rate:.1f}%")
+            if "wall_time" in summary:
+                print(
+                    f"Wall Time: {summary['wall_time']:.2f}s "
+                    f"({summary['throughput']:.2f} cases/s)"
+                )
             print("\nCriteria Scores:")
             for criterion, score in summary.get("criteria_scores", {}).items():
                 print(f"{criterion}: {score:.2f}")
@@ -0,0 +1,121 @@
+"""
+Tests for token verification and the verified-token cache.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from utils import auth
+
+SECRET = "test-secret"
+
+
+def make_token(sub="user-1", expires_in=3600, key=SECRET, algorithm="HS256"):
+    claims = {"sub": sub, "aud": "authenticated", "exp": int(time.time()) + expires_in}
+    return jwt.encode(claims, key, algorithm=algorithm)
+
+
+@pytest.fixture(autouse=True)
+def local_auth(monkeypatch):
+    """No local verification configured and an empty token cache"""
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", None)
+    monkeypatch.setattr(auth, "SUPABASE_JWKS_URL", None)
+    monkeypatch.setattr(auth, "_jwks", None)
+    monkeypatch.setattr(auth, "token_cache", auth.TTLCache(max_size=10, ttl=300))
+
+
+@pytest.fixture
+def auth_server(monkeypatch):
+    """Stands in for supabase.auth.get_user; records the tokens it checks"""
+    checked = []
+
+    def get_user(token):
+        checked.append(token)
+        return SimpleNamespace(user=SimpleNamespace(id="server-user"))
+
+    client = SimpleNamespace(auth=SimpleNamespace(get_user=get_user))
+    monkeypatch.setattr(auth, "get_supabase", lambda: client)
+    return checked
+
+
+def test_hs256_tokens_are_verified_locally_and_cached(monkeypatch, auth_server):
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    token = make_token(expires_in=60)
+
+    assert asyncio.run(auth.get_user_id(f"Bearer {token}")) == "user-1"
+    assert auth_server == []
+
+    # Cached for the token's remaining lifetime, not the 300 s default
+    (expires_at, user_id), *_ = auth.token_cache._entries.values()
+    assert user_id == "user-1"
+    assert expires_at - time.monotonic() <= 60
+
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", "rotated")
+    assert asyncio.run(auth.get_user_id(f"Bearer {token}")) == "user-1"
+
+
+def test_expired_tokens_are_rejected(monkeypatch, auth_server):
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(auth.get_user_id(make_token(expires_in=-10)))
+
+    assert error.value.status_code == 401
+    assert error.value.detail == "Token has expired"
+    assert auth_server == []
+
+
+def test_unverifiable_tokens_fall_back_to_the_auth_server(monkeypatch, auth_server):
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    token = make_token(key="another-secret")
+
+    assert asyncio.run(auth.get_user_id(token)) == "server-user"
+    assert auth_server == [token]
+
+
+def test_jwks_fetch_failure_falls_back_to_the_auth_server(monkeypatch, auth_server):
+    async def unreachable():
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(auth, "SUPABASE_JWKS_URL", "https://auth.invalid/jwks")
+    monkeypatch.setattr(auth, "_get_jwks", unreachable)
+
+    assert asyncio.run(auth.verify_token_locally(make_token())) is None
+    assert asyncio.run(auth.get_user_id(make_token())) == "server-user"
+
+
+def test_jwks_refresh_failure_reuses_the_last_keys(monkeypatch, auth_server):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = (
+        private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+    async def unreachable():
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(auth, "SUPABASE_JWKS_URL", "https://auth.invalid/jwks")
+    monkeypatch.setattr(auth, "_get_jwks", unreachable)
+    monkeypatch.setattr(
+        auth, "_jwks", {"keys": [jwk.construct(public_pem, "RS256").to_dict()]}
+    )
+    token = make_token(key=private_pem, algorithm="RS256")
+
+    assert asyncio.run(auth.get_user_id(token)) == "user-1"
+    assert auth_server == []
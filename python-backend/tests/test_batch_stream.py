@@ -0,0 +1,128 @@
+"""
+Tests for the NDJSON streaming mode of /generate-batch-outreach.
+"""
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from agents import get_outreach_agent
+from main import app
+from routes.outreach import BatchOutreachRequest, _stream_batch_outreach
+from utils import repositories
+
+
+class StubBatchAgent:
+    """Yields canned drafts in two steps, failing one customer"""
+
+    async def iter_batch_outreach(self, requests, options=None):
+        yield [(1, {"customer_id": "u1", "response": "Hello u1"})]
+        yield [
+            (0, {"customer_id": "u0", "response": "Hello u0"}),
+            (2, {"customer_id": "u2", "error": "No user data"}),
+        ]
+
+
+def test_stream_writes_a_line_per_draft_then_a_summary(monkeypatch):
+    inserts, session_updates = [], []
+
+    async def create_outreach_session(data):
+        return [{"id": "session-1"}]
+
+    async def update_outreach_session(session_id, data):
+        session_updates.append(data)
+        return [data]
+
+    async def insert_email_logs(rows):
+        inserts.append(rows)
+        return [{"id": f"log-{row['recipient_email']}"} for row in rows]
+
+    monkeypatch.setattr(
+        repositories, "create_outreach_session", create_outreach_session
+    )
+    monkeypatch.setattr(
+        repositories, "update_outreach_session", update_outreach_session
+    )
+    monkeypatch.setattr(repositories, "insert_email_logs", insert_email_logs)
+
+    app.dependency_overrides[get_outreach_agent] = StubBatchAgent
+    try:
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/generate-batch-outreach?stream=true",
+                json={
+                    "users": [
+                        {"id": f"u{i}", "email": f"u{i}@example.com"} for i in range(3)
+                    ],
+                    "prompt": "Say hello",
+                },
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [line["type"] for line in lines] == ["draft", "draft", "draft", "summary"]
+    assert [line["userId"] for line in lines[:3]] == ["u1", "u0", "u2"]
+    assert lines[0]["email_log_id"] == "log-u1@example.com"
+    assert lines[2]["status"] == "error"
+    assert lines[3]["total_drafts"] == 3
+    assert lines[3]["successful_drafts"] == 2
+    # One multi-row insert per step, each before its lines were written
+    assert [len(rows) for rows in inserts] == [1, 2]
+    assert session_updates[-1]["status"] == "COMPLETED"
+    assert session_updates[-1]["completion_metrics"]["failed"] == 1
+
+
+class EndlessBatchAgent:
+    """Yields one draft, then waits until the client goes away"""
+
+    async def iter_batch_outreach(self, requests, options=None):
+        yield [(0, {"customer_id": "u0", "response": "Hello u0"})]
+        await asyncio.Event().wait()
+
+
+def test_disconnect_marks_the_session_failed(monkeypatch):
+    session_updates = []
+
+    async def update_outreach_session(session_id, data):
+        session_updates.append((session_id, data))
+        return [data]
+
+    async def insert_email_logs(rows):
+        return [{"id": "log-1"} for _ in rows]
+
+    monkeypatch.setattr(
+        repositories, "update_outreach_session", update_outreach_session
+    )
+    monkeypatch.setattr(repositories, "insert_email_logs", insert_email_logs)
+    request = BatchOutreachRequest(
+        users=[{"id": "u0", "email": "u0@example.com"}], prompt="Say hello"
+    )
+
+    async def consume(stream):
+        async for _ in stream:
+            pass
+
+    async def main():
+        # Closed between lines (GeneratorExit)
+        stream = _stream_batch_outreach(EndlessBatchAgent(), request, "b1", "s1")
+        await stream.__anext__()
+        await stream.aclose()
+
+        # Cancelled while waiting for drafts (CancelledError)
+        stream = _stream_batch_outreach(EndlessBatchAgent(), request, "b2", "s2")
+        task = asyncio.create_task(consume(stream))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0.01)  # let the session updates run
+
+    asyncio.run(main())
+
+    assert sorted(session_id for session_id, _ in session_updates) == ["s1", "s2"]
+    for _, data in session_updates:
+        assert data["status"] == "FAILED"
+        assert "Client disconnected after" in data["completion_metrics"]["error"]
@@ -0,0 +1,44 @@
+"""
+Tests for the in-process TTL/LRU cache.
+"""
+
+import time
+
+from utils.cache import TTLCache
+
+
+def test_entries_expire_after_ttl():
+    """Values disappear once their TTL has passed"""
+    cache = TTLCache(max_size=10, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert "a" not in cache
+
+
+def test_per_entry_ttl_is_capped_by_cache_ttl():
+    """A per-entry TTL can shorten but never extend the cache TTL"""
+    cache = TTLCache(max_size=10, ttl=0.05)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2, ttl=100)
+    cache.set("expired", 3, ttl=-1)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert "expired" not in cache
+    time.sleep(0.04)
+    assert cache.get("long") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Reading an entry protects it from eviction"""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
@@ -0,0 +1,123 @@
+"""
+Tests for the bounded concurrency helpers.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from utils.concurrency import AdaptiveTokenBucket, iter_bounded, run_bounded
+
+
+def test_run_bounded_preserves_input_order():
+    """Results come back in input order even when later items finish first"""
+
+    async def worker(n):
+        await asyncio.sleep(0.01 * (5 - n))
+        return n * 10
+
+    results = asyncio.run(run_bounded(list(range(5)), worker, concurrency=5))
+    assert results == [0, 10, 20, 30, 40]
+
+
+def test_run_bounded_limits_concurrency_and_scales():
+    """No more than `concurrency` calls are in flight at once"""
+    in_flight = 0
+    peak = 0
+
+    async def worker(n):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return n
+
+    start = time.perf_counter()
+    asyncio.run(run_bounded(list(range(20)), worker, concurrency=5))
+    elapsed = time.perf_counter() - start
+
+    assert peak == 5
+    # 20 items / 5 workers = 4 rounds of 50ms, far below 20 sequential calls
+    assert elapsed < 0.5
+
+
+def test_run_bounded_isolates_failures_and_timeouts():
+    """Errors and timeouts are mapped per item without aborting the batch"""
+
+    async def worker(n):
+        if n == 1:
+            raise ValueError("boom")
+        if n == 2:
+            await asyncio.sleep(1)
+        return n
+
+    results = asyncio.run(
+        run_bounded(
+            [0, 1, 2, 3],
+            worker,
+            concurrency=4,
+            timeout=0.05,
+            on_error=lambda n, e: f"error: {e}",
+        )
+    )
+    assert results[0] == 0
+    assert results[1] == "error: boom"
+    assert results[2].startswith("error: Timed out")
+    assert results[3] == 3
+
+
+def test_run_bounded_raises_without_error_handler():
+    """Without on_error the first failure propagates"""
+
+    async def worker(n):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(run_bounded([1, 2], worker, concurrency=2))
+
+
+def test_iter_bounded_yields_as_calls_finish():
+    """Fast items are yielded before slow ones and errors become results"""
+
+    async def worker(n):
+        await asyncio.sleep(0.01 * n)
+        if n == 2:
+            raise ValueError("bad item")
+        return n * 10
+
+    async def collect():
+        steps = []
+        async for finished in iter_bounded(
+            iter([3, 1, 2, 0]),
+            worker,
+            concurrency=2,
+            on_error=lambda item, e: str(e),
+        ):
+            steps.append(finished)
+        return steps
+
+    steps = asyncio.run(collect())
+    flat = [pair for step in steps for pair in step]
+    assert flat[0] == (1, 10)
+    assert sorted(flat) == [(0, 30), (1, 10), (2, "bad item"), (3, 0)]
+
+
+def test_adaptive_bucket_backs_off_and_recovers():
+    """Rate limits halve the rate and pause callers; successes raise it again"""
+    bucket = AdaptiveTokenBucket(rate=4, max_rate=5, increase=0.5)
+
+    bucket.on_rate_limited(retry_after=0.05)
+    assert bucket.rate == 2
+
+    async def wait():
+        start = time.perf_counter()
+        await bucket.acquire()
+        return time.perf_counter() - start
+
+    assert asyncio.run(wait()) >= 0.05
+
+    for _ in range(10):
+        bucket.on_success()
+    assert bucket.rate == 5
@@ -0,0 +1,51 @@
+"""
+Tests for the token-budgeted context builder.
+"""
+
+from datetime import datetime
+
+from utils.context_builder import ContextBuilder, compact, count_tokens, format_date
+
+
+def test_sections_are_filled_in_rank_order_within_budget():
+    """Lower-ranked sections are dropped first and the result fits the budget"""
+    builder = ContextBuilder(budget=60)
+    builder.header("Customer: Ada <ada@example.com>")
+    builder.section("Open tickets", [f"ticket {i} " + "x" * 40 for i in range(3)])
+    builder.section("Recent interactions", ["interaction " + "y" * 40])
+    builder.section("Preferences", ["likes denim"])
+
+    context = builder.build()
+
+    assert context.startswith("Customer: Ada")
+    assert "Open tickets:" in context
+    assert "Preferences" not in context
+    assert context.omitted > 0
+    assert "more entries omitted" in context
+    assert context.tokens == count_tokens(context)
+    assert context.tokens <= context.budget + count_tokens("\n(9 more entries omitted)")
+
+
+def test_fields_are_compacted_and_truncated():
+    """Nested content is serialized on one line and long text is cut"""
+    assert compact({"a": [1, 2], "b": "two  words"}) == '{"a":[1,2],"b":"two words"}'
+
+    long_text = "word " * 500
+    truncated = compact(long_text, max_chars=50)
+    assert len(truncated) == 50
+    assert truncated.endswith("…")
+
+
+def test_empty_sections_use_placeholder_and_context_is_a_str():
+    context = ContextBuilder().section("Open tickets", [], empty="none").build()
+
+    assert context == "Open tickets: none"
+    assert isinstance(context, str)
+    assert context.omitted == 0
+
+
+def test_dates_render_the_same_from_datetimes_and_strings():
+    """Both agents' prompts show a timestamp as its date"""
+    assert format_date(datetime(2025, 1, 24, 10, 30)) == "2025-01-24"
+    assert format_date("2025-01-24T10:30:00+00:00") == "2025-01-24"
+    assert format_date(None) == "unknown date"
@@ -0,0 +1,121 @@
+"""
+Tests for the versioned customer-context cache.
+"""
+
+import asyncio
+import sys
+
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from agents.outreach_agent import OutreachAgent
+from utils import repositories
+from utils.context_cache import (
+    CustomerContextCache,
+    MemoryContextStore,
+    RedisContextStore,
+)
+from utils.vector_store import LocalVectorStore
+
+
+def make_agent(cache: CustomerContextCache) -> OutreachAgent:
+    """An OutreachAgent with a fresh cache and an in-process vector store"""
+    agent = OutreachAgent.__new__(OutreachAgent)
+    agent.context_cache = cache
+    agent.vector_store = LocalVectorStore(DeterministicFakeEmbedding(size=8))
+    return agent
+
+
+def test_repeat_context_skips_queries_and_own_writes_patch_it(monkeypatch):
+    queries = []
+
+    async def get_user(user_id, columns="*"):
+        queries.append("user")
+        return {"id": user_id, "name": "Ada", "email": "ada@example.com"}
+
+    async def list_customer_tickets(customer_id, limit):
+        queries.append("tickets")
+        return [{"id": "t1", "title": "Torn seam", "status": "OPEN"}]
+
+    async def list_author_interactions(author_id, limit):
+        queries.append("interactions")
+        return []
+
+    async def insert_interactions(rows):
+        return [{**row, "created_at": "2025-01-24T10:00:00"} for row in rows]
+
+    monkeypatch.setattr(repositories, "get_user", get_user)
+    monkeypatch.setattr(repositories, "list_customer_tickets", list_customer_tickets)
+    monkeypatch.setattr(
+        repositories, "list_author_interactions", list_author_interactions
+    )
+    monkeypatch.setattr(repositories, "insert_interactions", insert_interactions)
+
+    cache = CustomerContextCache(MemoryContextStore(ttl=60))
+    agent = make_agent(cache)
+
+    async def main():
+        first = await agent.get_customer_context("c1")
+        second = await agent.get_customer_context("c1")
+        await agent.store_interaction("c1", "Spring denim is here", True)
+        await cache.update_ticket("c1", "t1", {"status": "RESOLVED"})
+        return first, second, await agent.get_customer_context("c1")
+
+    first, second, patched = asyncio.run(main())
+
+    assert queries == ["user", "tickets", "interactions"]
+    assert first == second
+    assert "Spring denim is here" in patched
+    assert "Open tickets: none" in patched
+    assert cache.stats() == {"hits": 2, "misses": 1, "patches": 2, "invalidations": 0}
+
+
+def test_load_that_raced_a_write_is_not_stored():
+    cache = CustomerContextCache(MemoryContextStore(ttl=60))
+
+    async def main():
+        version, rows = await cache.lookup("c1")
+        assert rows is None
+        # A write lands while the rows are being fetched
+        await cache.invalidate("c1")
+        await cache.store(
+            "c1", version, {"user": {}, "tickets": [], "interactions": []}
+        )
+        return await cache.lookup("c1")
+
+    version, rows = asyncio.run(main())
+
+    assert version == 1
+    assert rows is None
+
+
+def test_patch_without_a_cached_entry_just_invalidates():
+    cache = CustomerContextCache(MemoryContextStore(ttl=60))
+
+    asyncio.run(cache.add_interactions("c1", [{"content": "hi"}], limit=5))
+
+    assert cache.stats()["invalidations"] == 1
+    assert asyncio.run(cache.lookup("c1"))[1] is None
+
+
+def test_memory_store_keeps_versions_bounded():
+    store = MemoryContextStore(max_size=2, ttl=60)
+
+    async def main():
+        for customer_id in ("c1", "c2", "c3", "c4"):
+            await store.bump(customer_id)
+        return [await store.get(customer_id) for customer_id in ("c1", "c4")]
+
+    evicted, latest = asyncio.run(main())
+
+    assert len(store._versions) == 2
+    assert evicted == (0, None)
+    assert latest == (1, None)
+
+
+def test_redis_backend_without_the_package_fails_clearly(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+
+    with pytest.raises(RuntimeError, match="pip install redis"):
+        RedisContextStore()
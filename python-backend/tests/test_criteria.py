@@ -0,0 +1,46 @@
+"""
+Tests for the compiled success criteria.
+"""
+
+from benchmarks.criteria import legacy_check_criterion, make_responses
+from evaluation.criteria import compile_criteria
+from evaluation.test_cases import (
+    create_inventory_update_test,
+    create_return_process_test,
+    create_size_recommendation_test,
+)
+
+EDGE_RESPONSES = [
+    "",
+    "Your BLU jeans, size 32, were updated to 15.",
+    "Stock set at 15 for the denim line. Kindly confirm.",
+    "We noted your customer preferences and brand-specific sizing.",
+    "Professional tone",
+    "tone professional",
+]
+
+
+def test_matches_the_original_checks():
+    responses = make_responses(300) + EDGE_RESPONSES
+    for test_case in [
+        create_inventory_update_test(),
+        create_size_recommendation_test(),
+        create_return_process_test(),
+    ]:
+        criteria = test_case.success_criteria + ["Customer preferences", ""]
+        matcher = compile_criteria(criteria)
+
+        rows = matcher.score_batch(responses, [test_case] * len(responses))
+
+        assert rows == [
+            [legacy_check_criterion(r, c, test_case) for c in criteria]
+            for r in responses
+        ]
+
+
+def test_criteria_outside_the_rule_set_are_still_checked():
+    matcher = compile_criteria(["Professional tone"])
+    test_case = create_return_process_test()
+
+    assert matcher.check("Eligible within 30 days", "Verifies return eligibility")
+    assert not matcher.check("Hello", "Mentions return window", test_case)
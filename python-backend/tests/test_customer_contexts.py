@@ -0,0 +1,119 @@
+"""
+Tests for loading many customers' context rows in bulk.
+"""
+
+import asyncio
+
+from agents import outreach_agent
+from agents.outreach_agent import CONTEXT_ROW_LIMIT, OutreachAgent
+from benchmarks.fakes import FakeSupabase
+from utils import db, repositories
+from utils.context_cache import CustomerContextCache, MemoryContextStore
+
+
+def make_agent() -> OutreachAgent:
+    """An OutreachAgent that formats contexts as the raw rows it was given"""
+    agent = OutreachAgent.__new__(OutreachAgent)
+    agent.context_cache = CustomerContextCache(MemoryContextStore())
+    agent.format_customer_context = lambda user, tickets, interactions: {
+        "user": user["id"],
+        "tickets": [ticket["id"] for ticket in tickets],
+        "interactions": [interaction["id"] for interaction in interactions],
+    }
+    return agent
+
+
+def test_group_latest_keeps_limit_per_key_in_order():
+    rows = [
+        {"id": "t5", "customer_id": "c1"},
+        {"id": "t4", "customer_id": "c2"},
+        {"id": "t3", "customer_id": "c1"},
+        {"id": "t2", "customer_id": "c1"},
+        {"id": "t1", "customer_id": None},
+    ]
+
+    grouped = OutreachAgent._group_latest(rows, "customer_id", limit=2)
+
+    assert grouped == {
+        "c1": [rows[0], rows[2]],
+        "c2": [rows[1]],
+        None: [rows[4]],
+    }
+    assert OutreachAgent._group_latest(None, "customer_id") == {}
+
+
+def test_contexts_are_loaded_per_chunk_with_a_row_cap(monkeypatch):
+    calls = []
+
+    async def get_users(user_ids, columns="*"):
+        calls.append(("users", list(user_ids)))
+        return [{"id": user_id} for user_id in user_ids if user_id != "ghost"]
+
+    async def list_tickets_for_customers(customer_ids, limit):
+        calls.append(("tickets", list(customer_ids), limit))
+        return [
+            {"id": f"{customer_id}-t{i}", "customer_id": customer_id}
+            for customer_id in customer_ids
+            for i in range(limit)
+        ]
+
+    async def list_interactions_for_authors(author_ids, limit):
+        calls.append(("interactions", list(author_ids), limit))
+        return [{"id": f"{author_ids[0]}-i", "author_id": author_ids[0]}]
+
+    monkeypatch.setattr(repositories, "get_users", get_users)
+    monkeypatch.setattr(
+        repositories, "list_tickets_for_customers", list_tickets_for_customers
+    )
+    monkeypatch.setattr(
+        repositories, "list_interactions_for_authors", list_interactions_for_authors
+    )
+    monkeypatch.setattr(outreach_agent, "CONTEXT_BULK_CHUNK_SIZE", 2)
+
+    agent = make_agent()
+    contexts = asyncio.run(agent.get_customer_contexts(["c1", "c2", "c1", "ghost"]))
+
+    assert calls == [
+        ("users", ["c1", "c2"]),
+        ("tickets", ["c1", "c2"], CONTEXT_ROW_LIMIT),
+        ("interactions", ["c1", "c2"], CONTEXT_ROW_LIMIT),
+        ("users", ["ghost"]),
+        ("tickets", ["ghost"], CONTEXT_ROW_LIMIT),
+        ("interactions", ["ghost"], CONTEXT_ROW_LIMIT),
+    ]
+    assert contexts["c1"] == {
+        "user": "c1",
+        "tickets": [f"c1-t{i}" for i in range(CONTEXT_ROW_LIMIT)],
+        "interactions": ["c1-i"],
+    }
+    assert contexts["c2"]["interactions"] == []
+    assert contexts["ghost"] == "No user data available"
+
+    # Found customers are cached; a second call makes no queries
+    calls.clear()
+    asyncio.run(agent.get_customer_contexts(["c1", "c2"]))
+    assert calls == []
+
+
+def test_busy_customers_do_not_crowd_out_others():
+    """Rows are capped per customer, so one customer's history can't fill the read"""
+    supabase = FakeSupabase()
+    supabase.seed("users", [{"id": "busy"}, {"id": "quiet"}])
+    supabase.seed(
+        "tickets",
+        [
+            {"id": f"busy-{i}", "customer_id": "busy", "created_at": f"2025-02-{i:02}"}
+            for i in range(1, 28)
+        ]
+        + [{"id": "quiet-1", "customer_id": "quiet", "created_at": "2025-01-01"}],
+    )
+
+    db.set_supabase(supabase)
+    try:
+        rows = asyncio.run(
+            repositories.list_tickets_for_customers(["busy", "quiet"], 3)
+        )
+    finally:
+        db.set_supabase(None)
+
+    assert [row["id"] for row in rows] == ["busy-27", "busy-26", "busy-25", "quiet-1"]
@@ -0,0 +1,83 @@
+"""
+Tests for buffering email_logs rows into multi-row inserts.
+"""
+
+import asyncio
+
+from utils import repositories
+from utils.email_log_writer import EmailLogWriter
+
+
+class FakeEmailLogs:
+    """Records inserts and hands out sequential IDs"""
+
+    def __init__(self, fail_bulk=False, bad_recipient=None):
+        self.bulk_inserts = []
+        self.single_inserts = []
+        self.fail_bulk = fail_bulk
+        self.bad_recipient = bad_recipient
+        self.next_id = 0
+
+    def _created(self, row):
+        self.next_id += 1
+        return {**row, "id": f"log-{self.next_id}"}
+
+    async def insert_email_logs(self, rows):
+        self.bulk_inserts.append(rows)
+        if self.fail_bulk:
+            raise RuntimeError("bulk insert rejected")
+        return [self._created(row) for row in rows]
+
+    async def insert_email_log(self, row):
+        self.single_inserts.append(row)
+        if row["recipient_email"] == self.bad_recipient:
+            raise RuntimeError("invalid row")
+        return [self._created(row)]
+
+
+def install(monkeypatch, logs: FakeEmailLogs):
+    monkeypatch.setattr(repositories, "insert_email_logs", logs.insert_email_logs)
+    monkeypatch.setattr(repositories, "insert_email_log", logs.insert_email_log)
+
+
+def row(email):
+    return {"recipient_email": email, "status": "SENT"}
+
+
+def test_rows_are_flushed_as_multi_row_inserts_and_mapped_to_ids(monkeypatch):
+    logs = FakeEmailLogs()
+    install(monkeypatch, logs)
+
+    async def main():
+        async with EmailLogWriter(max_rows=3, max_delay=60) as writer:
+            for index, email in enumerate(["a@x.com", "b@x.com", "a@x.com", "c@x.com"]):
+                await writer.add(index, row(email))
+            # The fourth row is still buffered until the block exits
+            assert len(logs.bulk_inserts) == 1
+        return writer
+
+    writer = asyncio.run(main())
+
+    assert [len(rows) for rows in logs.bulk_inserts] == [3, 1]
+    assert logs.single_inserts == []
+    assert writer.ids == {0: "log-1", 1: "log-2", 2: "log-3", 3: "log-4"}
+    assert writer.errors == {}
+
+
+def test_failed_bulk_insert_is_retried_row_by_row(monkeypatch):
+    logs = FakeEmailLogs(fail_bulk=True, bad_recipient="bad@x.com")
+    install(monkeypatch, logs)
+
+    async def main():
+        writer = EmailLogWriter(max_rows=10, max_delay=60)
+        await writer.add("draft-1", row("a@x.com"))
+        await writer.add("draft-2", row("bad@x.com"))
+        await writer.add("draft-3", row("c@x.com"))
+        return writer, await writer.flush()
+
+    writer, flushed = asyncio.run(main())
+
+    assert len(logs.bulk_inserts) == 1
+    assert len(logs.single_inserts) == 3
+    assert flushed == {"draft-1": "log-1", "draft-2": None, "draft-3": "log-2"}
+    assert writer.errors == {"draft-2": "invalid row"}
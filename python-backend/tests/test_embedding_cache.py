@@ -0,0 +1,64 @@
+"""
+Tests for the content-hash embedding cache.
+"""
+
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from utils.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake embeddings that record every call"""
+
+    model = "fake-embedding"
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97)] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def test_identical_texts_are_embedded_once():
+    """Repeated queries for the same prompt hit the cache"""
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, disk_path=None)
+
+    first = cached.embed_query("shared prompt")
+    for _ in range(5):
+        assert cached.embed_query("shared prompt") == first
+
+    assert base.calls == [["shared prompt"]]
+    assert cached.hits == 5
+
+
+def test_embed_documents_batches_only_distinct_misses():
+    """Cache misses are sent in one call, deduplicated and in order"""
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, disk_path=None)
+    cached.embed_query("a")
+
+    vectors = cached.embed_documents(["a", "bb", "ccc", "bb"])
+
+    assert base.calls == [["a"], ["bb", "ccc"]]
+    assert vectors[1] == vectors[3]
+    assert vectors[0] == cached.embed_query("a")
+
+
+def test_disk_store_survives_a_new_cache(tmp_path):
+    """Vectors written to disk are reused by a fresh cache instance"""
+    path = str(tmp_path / "embeddings.sqlite")
+    first = CachedEmbeddings(CountingEmbeddings(), disk_path=path)
+    expected = first.embed_documents(["persisted text"])
+
+    base = CountingEmbeddings()
+    second = CachedEmbeddings(base, disk_path=path)
+
+    assert second.embed_query("persisted text") == expected[0]
+    assert base.calls == []
@@ -22,6 +22,7 @@ from langchain.callbacks.manager import CallbackManager
 from .test_cases import get_test_cases, get_evaluation_criteria
 from agents.outreach_agent import OutreachAgent
 from langchain.schema import StrOutputParser
+from utils.concurrency import AdaptiveTokenBucket, run_bounded
 import asyncio
 
 
@@ -35,6 +36,17 @@ if not os.getenv("LANGCHAIN_API_KEY"):
 
 PROJECT_NAME = "outreach_gpt_evaluation"
 
+# Evaluation runs in parallel: cases in flight, starting rate of new cases
+# (adapted to the API's rate limits), and time allowed per case
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "4"))
+EVAL_RATE_PER_SECOND = float(os.getenv("EVAL_RATE_PER_SECOND", "2"))
+EVAL_CASE_TIMEOUT_SECONDS = float(os.getenv("EVAL_CASE_TIMEOUT_SECONDS", "60"))
+EVAL_MAX_RETRIES = int(os.getenv("EVAL_MAX_RETRIES", "3"))
+
+# Re-runs of unchanged cases are served from the completion cache; use
+# "record" to refresh it or "off" to always call the model
+EVAL_LLM_CACHE_MODE = os.getenv("EVAL_LLM_CACHE_MODE", "cache")
+
 os.environ["LANGCHAIN_TRACING_V2"] = "true"
 os.environ["LANGCHAIN_PROJECT"] = PROJECT_NAME
 os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
@@ -44,7 +56,11 @@ print(f"✓ Tracing enabled for project: {PROJECT_NAME}")
 
 
 class OutreachEvaluator:
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or EVAL_WORKERS
+        self.rate_limiter = AdaptiveTokenBucket(EVAL_RATE_PER_SECOND)
+        self.run_stats: Optional[Dict] = None
+
         try:
             self.client = Client()
 
@@ -100,7 +116,9 @@ class OutreachEvaluator:
             raise
 
         # Init agent with tracing
-        self.agent = OutreachAgent(callbacks=self.callback_manager)
+        self.agent = OutreachAgent(
+            callbacks=self.callback_manager, llm_cache_mode=EVAL_LLM_CACHE_MODE
+        )
 
         # Test cases
         self.test_cases = get_test_cases()
@@ -166,10 +184,15 @@ class OutreachEvaluator:
             return "context_error"
         elif "field" in e or "database" in e:
             return "field_update_error"
-        elif "timeout" in e:
+        elif "timeout" in e or "timed out" in e:
             return "timeout_error"
         return "other"
 
+    def _is_rate_limited(self, error_str: str) -> bool:
+        """Whether a failed case was rejected by an API rate limit"""
+        e = error_str.lower()
+        return "rate limit" in e or "ratelimit" in e or "429" in e
+
     # ----------------------------------------------------------------------
     # Add Example to Queue + Evaluate
     # ----------------------------------------------------------------------
@@ -312,7 +335,7 @@ class OutreachEvaluator:
                     "preferences", {}
                 ),
                 "test_case_id": str(uuid.uuid4()),
-                "test_variation": "original",
+                "test_variation": test_case.get("variation", "original"),
             }
 
             try:
@@ -324,7 +347,7 @@ class OutreachEvaluator:
                             "similar_interactions": "No similar interactions found",
                         }
                     ),
-                    timeout=60,
+                    timeout=EVAL_CASE_TIMEOUT_SECONDS,
                 )
                 metrics["response_time"] = time.time() - start_time
 
@@ -360,7 +383,9 @@ class OutreachEvaluator:
                 }
 
             except asyncio.TimeoutError:
-                raise Exception("Test case timed out after 60 seconds")
+                raise Exception(
+                    f"Test case timed out after {EVAL_CASE_TIMEOUT_SECONDS:g} seconds"
+                )
 
         except Exception as e:
             error_str = str(e)
@@ -388,9 +413,65 @@ class OutreachEvaluator:
         test_case["variation"] = variation
         return await self.run_test_case(test_case)
 
+    def evaluation_jobs(self) -> List[tuple]:
+        """Every (test_case, variation, request) to run, in report order"""
+        jobs = []
+        for test_case in self.test_cases:
+            request = test_case["request"]
+            jobs.extend(
+                [
+                    (test_case, "original", request),
+                    (test_case, "formal", self.create_formal_variation(request)),
+                    (test_case, "casual", self.create_casual_variation(request)),
+                    (test_case, "detailed", self.create_detailed_variation(request)),
+                ]
+            )
+        return jobs
+
+    async def _run_job(self, job: tuple) -> Dict:
+        """Run one case, retrying it while the API is rate limiting us"""
+        test_case, variation, request = job
+        for attempt in range(EVAL_MAX_RETRIES + 1):
+            await self.rate_limiter.acquire()
+            if variation == "original":
+                run = self.run_test_case(test_case)
+            else:
+                run = self.run_variation(test_case, variation, request)
+            try:
+                result = await asyncio.wait_for(run, timeout=EVAL_CASE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                return self._failed_result(
+                    test_case,
+                    f"Test case timed out after {EVAL_CASE_TIMEOUT_SECONDS:g} seconds",
+                )
+
+            error = result.get("error")
+            if not error:
+                self.rate_limiter.on_success()
+            elif self._is_rate_limited(error) and attempt < EVAL_MAX_RETRIES:
+                self.rate_limiter.on_rate_limited()
+                print(
+                    f"  ⚠ Rate limited on {test_case['name']} ({variation}), retrying"
+                )
+                continue
+            return result
+
+    def _failed_result(self, test_case: Dict, error: str) -> Dict:
+        return {
+            "test_case": test_case["name"],
+            "error": error,
+            "action_correct": False,
+            "field_update_success": False,
+            "response_time": 0.0,
+        }
+
     async def run_all_tests(self) -> List[Dict]:
         results = []
-        print("\nStarting test suite execution...")
+        jobs = self.evaluation_jobs()
+        print(
+            f"\nStarting test suite execution: {len(jobs)} cases, "
+            f"{self.workers} workers..."
+        )
 
         parent_run_id = None
         # Optionally create a "parent run"
@@ -411,27 +492,21 @@ class OutreachEvaluator:
             print(f"Warning: Failed to create parent run in LangSmith: {str(e)}")
 
         try:
-            for i, test_case in enumerate(self.test_cases, 1):
-                print(f"\nTest Case {i}/{len(self.test_cases)}: {test_case['name']}")
-                print("-" * 50)
-
-                # Original
-                result = await self.run_test_case(test_case)
-                results.append(result)
-                await asyncio.sleep(1)
-
-                # Variations
-                variations = [
-                    ("formal", self.create_formal_variation(test_case["request"])),
-                    ("casual", self.create_casual_variation(test_case["request"])),
-                    ("detailed", self.create_detailed_variation(test_case["request"])),
-                ]
-                for variation_name, modified_req in variations:
-                    variation_result = await self.run_variation(
-                        test_case, variation_name, modified_req
-                    )
-                    results.append(variation_result)
-                    await asyncio.sleep(1)
+            # Cases run concurrently; results keep the order of `jobs`
+            start_time = time.perf_counter()
+            results = await run_bounded(
+                jobs,
+                self._run_job,
+                concurrency=self.workers,
+                on_error=lambda job, e: self._failed_result(job[0], str(e)),
+            )
+            wall_time = time.perf_counter() - start_time
+            self.run_stats = {
+                "workers": self.workers,
+                "wall_time": wall_time,
+                "throughput": len(results) / wall_time if wall_time else 0,
+                "final_rate_per_second": self.rate_limiter.rate,
+            }
 
             # Summarize
             summary = self.generate_summary_report(results)
@@ -449,6 +524,8 @@ class OutreachEvaluator:
                             ).get("average", 0),
                             "error_rate": summary.get("failed_tests", 0)
                             / summary.get("total_tests", 1),
+                            "wall_time": summary.get("wall_time", 0),
+                            "throughput": summary.get("throughput", 0),
                         },
                     )
                 except Exception as e:
@@ -477,12 +554,16 @@ class OutreachEvaluator:
         """More detailed phrasing."""
         return f"{request} - I need specific details and comprehensive information about this."
 
-    def generate_summary_report(self, results: List[Dict]) -> Dict:
+    def generate_summary_report(
+        self, results: List[Dict], run_stats: Optional[Dict] = None
+    ) -> Dict:
+        """Summarize results; includes wall time and throughput of the last run"""
         total_tests = len(results)
         successful_tests = len([r for r in results if not r.get("error")])
         failed_tests = total_tests - successful_tests
+        run_stats = run_stats or getattr(self, "run_stats", None)
 
-        return {
+        summary = {
             "total_tests": total_tests,
             "successful_tests": successful_tests,
             "failed_tests": failed_tests,
@@ -505,6 +586,11 @@ class OutreachEvaluator:
                 ),
             },
         }
+        if run_stats:
+            summary["wall_time"] = run_stats["wall_time"]
+            summary["throughput"] = run_stats["throughput"]
+            summary["workers"] = run_stats["workers"]
+        return summary
 
 
 async def main():
@@ -523,6 +609,12 @@ async def main():
         print(f"Average: {summary['response_times']['average']:.2f} seconds")
         print(f"Max: {summary['response_times']['max']:.2f} seconds")
         print(f"Min: {summary['response_times']['min']:.2f} seconds")
+    if "wall_time" in summary:
+        print(f"\nWall Time: {summary['wall_time']:.2f} seconds")
+        print(
+            f"Throughput: {summary['throughput']:.2f} cases/second "
+            f"({summary['workers']} workers)"
+        )
 
     return summary
 
@@ -0,0 +1,137 @@
+"""
+Tests for the exact-match completion cache.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+
+from utils.llm_cache import (
+    CacheMissError,
+    MemoryCompletionStore,
+    SQLiteCompletionStore,
+    cached_chat_model,
+)
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CountingChatModel(BaseChatModel):
+    """Fake chat model that answers with a call counter"""
+
+    temperature: float = 0.7
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting"
+
+    @property
+    def _identifying_params(self):
+        return {"model_name": "counting", "temperature": self.temperature}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        self.calls += 1
+        text = f"reply {self.calls} to {messages[-1].content}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        self.calls += 1
+        for word in ["streamed", " ", "reply"]:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+
+def test_cache_is_off_unless_enabled():
+    """Without LLM_CACHE_MODE, models are used as they are"""
+    env = {k: v for k, v in os.environ.items() if not k.startswith("LLM_CACHE")}
+    script = (
+        "from utils.llm_cache import cached_chat_model; "
+        "from tests.test_llm_cache import CountingChatModel; "
+        "model = CountingChatModel(); "
+        "assert cached_chat_model(model) is model"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_identical_calls_hit_and_changed_prompts_miss():
+    """Key covers the rendered messages and the model's temperature"""
+    base = CountingChatModel()
+    model = cached_chat_model(base, mode="cache", store=MemoryCompletionStore())
+    chain = ChatPromptTemplate.from_messages([("human", "{question}")]) | model
+
+    first = chain.invoke({"question": "hi"})
+    assert chain.invoke({"question": "hi"}).content == first.content
+    assert base.calls == 1
+    assert model.hits == 1
+
+    chain.invoke({"question": "hello"})
+    assert base.calls == 2
+
+    warmer = cached_chat_model(
+        CountingChatModel(temperature=0.9), mode="cache", store=model.store
+    )
+    assert warmer.cache_key([HumanMessage(content="hi")]) != model.cache_key(
+        [HumanMessage(content="hi")]
+    )
+
+
+def test_record_then_replay_offline(tmp_path):
+    """Recorded completions replay from SQLite without calling the model"""
+    path = str(tmp_path / "llm.sqlite")
+    messages: List = [HumanMessage(content="resolve ticket 1")]
+
+    recorder = cached_chat_model(
+        CountingChatModel(), mode="record", store=SQLiteCompletionStore(path)
+    )
+    recorded = recorder.invoke(messages).content
+
+    offline = CountingChatModel()
+    replay = cached_chat_model(
+        offline, mode="replay", store=SQLiteCompletionStore(path, ttl=0)
+    )
+    assert replay.invoke(messages).content == recorded
+    assert offline.calls == 0
+
+    with pytest.raises(CacheMissError):
+        replay.invoke([HumanMessage(content="never recorded")])
+
+
+def test_streaming_is_recorded_and_served_as_one_chunk():
+    base = CountingChatModel()
+    model = cached_chat_model(base, mode="cache", store=MemoryCompletionStore())
+
+    async def stream():
+        return [chunk.content async for chunk in model.astream("hi")]
+
+    assert asyncio.run(stream()) == ["streamed", " ", "reply"]
+    assert asyncio.run(stream()) == ["streamed reply"]
+    assert base.calls == 1
+
+
+def test_sqlite_store_expires_and_evicts(tmp_path):
+    store = SQLiteCompletionStore(str(tmp_path / "llm.sqlite"), max_size=2, ttl=60)
+    for key in ["a", "b", "c"]:
+        store.set(key, key)
+
+    assert store.get("a") is None
+    assert store.get("c") == "c"
+
+    store.ttl = -1
+    assert store.get("c") is None
+    assert store.get("c", ignore_ttl=True) == "c"
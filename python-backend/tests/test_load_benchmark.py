@@ -0,0 +1,68 @@
+"""
+Smoke test for the offline load benchmark and its fake backends.
+"""
+
+import os
+
+import main
+from benchmarks import fakes
+from benchmarks.load import SCENARIOS, main_cli
+from models.ticket import TICKET_SNAPSHOT_COLUMNS
+from utils import db, email_utils
+
+
+def test_fake_supabase_serves_joined_ticket_snapshots():
+    supabase = fakes.FakeSupabase()
+    fakes.seed_crm(supabase, 3)
+
+    ticket = (
+        supabase.table("tickets")
+        .select(TICKET_SNAPSHOT_COLUMNS)
+        .eq("id", "ticket-1-0")
+        .maybe_single()
+        .execute()
+        .data
+    )
+
+    assert ticket["customer"]["id"] == "user-1"
+    assert set(ticket["customer"]) == {"id", "name", "email"}
+    assert [i["id"] for i in ticket["interactions"]] == [
+        "interaction-1-0-0",
+        "interaction-1-0-1",
+    ]
+
+
+def test_every_scenario_runs_offline_and_reports_json(tmp_path):
+    output = tmp_path / "load.json"
+    tracing = os.environ.get("LANGCHAIN_TRACING_V2")
+    recover_jobs = main.RECOVER_JOBS
+    report = main_cli(
+        [
+            "--concurrency=1,2",
+            "--requests=2",
+            "--customers=50",
+            "--batch-size=2",
+            "--llm-latency=0",
+            "--tokens=5",
+            "--tokens-per-second=10000",
+            "--db-latency=0",
+            "--mail-latency=0",
+            f"--output={output}",
+        ]
+    )
+
+    assert list(report["scenarios"]) == SCENARIOS
+    for results in report["scenarios"].values():
+        assert [r["concurrency"] for r in results] == [1, 2]
+        assert all(r["errors"] == 0 for r in results)
+        assert set(results[0]["latency"]) == {"p50_ms", "p95_ms", "p99_ms"}
+        assert "max_ms" in results[0]["loop_lag"]
+    assert report["backends"]["emails_sent"] > 0
+    assert output.read_text().startswith("{")
+
+    # The app's shared clients are restored afterwards
+    assert db._client is None
+    assert email_utils.mail_transport.base_url.startswith("https://")
+    # ...and so are the settings it overrides
+    assert os.environ.get("LANGCHAIN_TRACING_V2") == tracing
+    assert main.RECOVER_JOBS == recover_jobs
@@ -0,0 +1,113 @@
+"""
+Tests for the pooled Mailgun transport against a local fake HTTP server.
+"""
+
+import asyncio
+
+from aiohttp import web
+
+from utils.mail_transport import MailTransport
+
+
+async def start_fake_mailgun(handler):
+    """Start a local aiohttp server that answers the messages endpoint"""
+    app = web.Application()
+    app.router.add_post("/v3/{domain}/messages", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/v3"
+
+
+def test_bulk_send_reuses_connections_and_reports_per_recipient():
+    """Every message is sent over the pooled session with per-recipient results"""
+    peers = set()
+
+    async def handler(request):
+        form = await request.post()
+        peers.add(request.transport.get_extra_info("peername"))
+        assert request.headers["Authorization"].startswith("Basic ")
+        if form["to"] == "bad@example.com":
+            return web.Response(status=400, text="invalid recipient")
+        return web.json_response({"id": f"<{form['to']}>", "message": "Queued"})
+
+    async def run():
+        runner, base_url = await start_fake_mailgun(handler)
+        transport = MailTransport("key", "example.com", base_url, max_connections=2)
+        try:
+            messages = [{"to": f"user{i}@example.com"} for i in range(10)]
+            messages.append({"to": "bad@example.com"})
+            return await transport.send_bulk(
+                messages, concurrency=2, rate_per_second=1000
+            )
+        finally:
+            await transport.close()
+            await runner.cleanup()
+
+    results = asyncio.run(run())
+
+    assert [r.to for r in results][:2] == ["user0@example.com", "user1@example.com"]
+    assert all(r.success for r in results[:10])
+    assert results[0].response["id"] == "<user0@example.com>"
+    assert not results[10].success
+    assert results[10].status == 400
+    # Keep-alive: 11 requests over at most 2 pooled connections
+    assert len(peers) <= 2
+
+
+def test_bulk_send_retries_after_rate_limit():
+    """A 429 pauses the pipeline and the message is retried"""
+    calls = {"count": 0}
+
+    async def handler(request):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            return web.Response(
+                status=429, text="slow down", headers={"Retry-After": "0.05"}
+            )
+        return web.json_response({"message": "Queued"})
+
+    async def run():
+        runner, base_url = await start_fake_mailgun(handler)
+        transport = MailTransport("key", "example.com", base_url)
+        try:
+            return await transport.send_bulk(
+                [{"to": "user@example.com"}], rate_per_second=1000, max_retries=2
+            )
+        finally:
+            await transport.close()
+            await runner.cleanup()
+
+    (result,) = asyncio.run(run())
+
+    assert result.success
+    assert result.attempts == 2
+    assert calls["count"] == 2
+
+
+def test_bulk_send_gives_up_after_max_retries():
+    """Persistent 429s are reported as a failure for that recipient"""
+
+    async def handler(request):
+        return web.Response(
+            status=429, text="slow down", headers={"Retry-After": "0.01"}
+        )
+
+    async def run():
+        runner, base_url = await start_fake_mailgun(handler)
+        transport = MailTransport("key", "example.com", base_url)
+        try:
+            return await transport.send_bulk(
+                [{"to": "user@example.com"}], rate_per_second=1000, max_retries=1
+            )
+        finally:
+            await transport.close()
+            await runner.cleanup()
+
+    (result,) = asyncio.run(run())
+
+    assert not result.success
+    assert result.status == 429
+    assert result.attempts == 2
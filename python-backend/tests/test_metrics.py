@@ -0,0 +1,72 @@
+"""
+Tests for the in-process metrics and the /metrics endpoint.
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.metrics import MetricsRegistry, timed, operations_total, stage_seconds
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram(
+        "test_latency_seconds", "Test latency", ["stage"], buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage="llm")
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == [
+        "# HELP test_latency_seconds Test latency",
+        "# TYPE test_latency_seconds histogram",
+    ]
+    assert 'test_latency_seconds_bucket{stage="llm",le="0.1"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="llm",le="1"} 3' in lines
+    assert 'test_latency_seconds_bucket{stage="llm",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_sum{stage="llm"} 3.65' in lines
+    assert 'test_latency_seconds_count{stage="llm"} 4' in lines
+
+
+def test_counters_gauges_and_label_escaping():
+    registry = MetricsRegistry()
+    errors = registry.counter("test_errors_total", "Errors", ["reason"])
+    errors.inc(reason='bad "quote"')
+    errors.inc(2, reason='bad "quote"')
+    registry.gauge("test_depth", "Depth").set_function(lambda: 7)
+
+    text = registry.render()
+
+    assert 'test_errors_total{reason="bad \\"quote\\""} 3' in text
+    assert "test_depth 7" in text
+
+
+def test_timed_counts_returned_failures_and_exposes_metrics():
+    @timed("test_operation")
+    async def operation(ok: bool):
+        return {"success": ok}
+
+    asyncio.run(operation(True))
+    asyncio.run(operation(False))
+
+    assert operations_total.value(operation="test_operation", outcome="success") == 1
+    assert operations_total.value(operation="test_operation", outcome="error") == 1
+
+    with stage_seconds.time(operation="test_operation", stage="llm"):
+        pass
+
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'backend_operations_total{operation="test_operation",outcome="error"} 1'
+        in response.text
+    )
+    assert 'stage="llm",le="0.005"} 1' in response.text
+    assert 'backend_cache_events_total{cache="singleflight",result="hits"}' in (
+        response.text
+    )
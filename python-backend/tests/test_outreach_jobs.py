@@ -0,0 +1,196 @@
+"""
+Tests for background batch outreach jobs using the local job queue.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import agents
+from agents import get_outreach_agent, outreach_jobs
+from main import app
+from utils import repositories
+
+
+class InMemorySessions:
+    """Stand-in for the outreach session and email_logs repositories"""
+
+    def __init__(self, monkeypatch):
+        self.sessions = {}
+        self.email_logs = []
+        for name in (
+            "create_outreach_session",
+            "update_outreach_session",
+            "get_outreach_session",
+            "list_outreach_sessions",
+            "insert_email_logs",
+        ):
+            monkeypatch.setattr(repositories, name, getattr(self, name))
+
+    async def create_outreach_session(self, session):
+        row = {"id": str(uuid.uuid4()), **session}
+        self.sessions[row["id"]] = row
+        return [row]
+
+    async def update_outreach_session(self, session_id, values):
+        self.sessions[session_id].update(values)
+        return [self.sessions[session_id]]
+
+    async def get_outreach_session(self, session_id, columns="*"):
+        return self.sessions.get(session_id)
+
+    async def list_outreach_sessions(self, status, columns="*"):
+        return [row for row in self.sessions.values() if row["status"] == status]
+
+    async def insert_email_logs(self, rows):
+        created = []
+        for row in rows:
+            self.email_logs.append(row)
+            created.append({"id": f"log-{len(self.email_logs)}"})
+        return created
+
+
+class StubBatchAgent:
+    """Drafts every request, optionally crashing after ``fail_after`` drafts"""
+
+    def __init__(self, fail_after=None):
+        self.generated = []
+        self.fail_after = fail_after
+
+    async def iter_batch_outreach(self, requests, options=None):
+        for index, request in enumerate(requests):
+            if self.fail_after is not None and len(self.generated) >= self.fail_after:
+                raise RuntimeError("worker crashed")
+            self.generated.append(request["customer_id"])
+            yield [(index, {"customer_id": request["customer_id"], "response": "Hi"})]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(outreach_jobs, "JOB_CHUNK_SIZE", 2)
+    monkeypatch.setattr(
+        outreach_jobs,
+        "job_queue",
+        outreach_jobs.LocalJobQueue(outreach_jobs.run_batch_job),
+    )
+    return InMemorySessions(monkeypatch)
+
+
+USERS = [{"id": f"u{i}", "email": f"u{i}@example.com"} for i in range(5)]
+
+
+class RecordingQueue:
+    """Records queued job IDs without running them"""
+
+    def __init__(self):
+        self.enqueued = []
+
+    async def enqueue(self, job_id):
+        self.enqueued.append(job_id)
+
+
+def test_background_route_queues_a_job_and_returns_its_status(store, monkeypatch):
+    queue = RecordingQueue()
+    monkeypatch.setattr(outreach_jobs, "job_queue", queue)
+
+    def no_agent():
+        raise AssertionError("background batches don't build an agent")
+
+    app.dependency_overrides[get_outreach_agent] = no_agent
+    try:
+        response = TestClient(app).post(
+            "/api/generate-batch-outreach?background=true",
+            json={"users": USERS, "prompt": "Say hi"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 202
+    status = response.json()
+    assert queue.enqueued == [status["job_id"]]
+    assert status["status"] == "queued"
+    assert status["total"] == 5
+    assert store.sessions[status["job_id"]]["status"] == "ACTIVE"
+
+
+def test_job_runs_in_background_and_reports_progress(store, monkeypatch):
+    agent = StubBatchAgent()
+    monkeypatch.setattr(agents, "get_outreach_agent", lambda: agent)
+
+    async def run():
+        queued = await outreach_jobs.create_batch_job(USERS, "Say hi")
+        assert queued["status"] == "queued"
+        assert queued["processed"] == 0
+        await outreach_jobs.job_queue.join()
+        await outreach_jobs.job_queue.close()
+        return await outreach_jobs.get_batch_job(queued["job_id"])
+
+    status = asyncio.run(run())
+
+    assert status["status"] == "completed"
+    assert status["session_status"] == "COMPLETED"
+    assert status["processed"] == status["total"] == 5
+    assert status["progress"] == 1.0
+    assert all(entry["email_log_id"] for entry in status["customers"].values())
+    assert len(store.email_logs) == 5
+
+
+def test_interrupted_job_resumes_after_last_completed_customer(store, monkeypatch):
+    crashing = StubBatchAgent(fail_after=3)
+    monkeypatch.setattr(agents, "get_outreach_agent", lambda: crashing)
+
+    async def run_until_failure():
+        queued = await outreach_jobs.create_batch_job(USERS, "Say hi")
+        await outreach_jobs.job_queue.join()
+        return queued["job_id"]
+
+    async def resume(job_id):
+        await outreach_jobs.resume_batch_job(job_id)
+        await outreach_jobs.job_queue.join()
+        await outreach_jobs.job_queue.close()
+        return await outreach_jobs.get_batch_job(job_id)
+
+    job_id = asyncio.run(run_until_failure())
+    failed = store.sessions[job_id]
+    assert failed["status"] == "FAILED"
+    # The first chunk was fully logged; the half-done second chunk wasn't kept
+    assert sorted(failed["completion_metrics"]["customers"]) == ["u0", "u1"]
+
+    healthy = StubBatchAgent()
+    monkeypatch.setattr(agents, "get_outreach_agent", lambda: healthy)
+    status = asyncio.run(resume(job_id))
+
+    assert healthy.generated == ["u2", "u3", "u4"]
+    assert status["status"] == "completed"
+    assert sorted(status["customers"]) == [user["id"] for user in USERS]
+
+
+def test_recovery_picks_up_stale_active_jobs(store, monkeypatch):
+    agent = StubBatchAgent()
+    monkeypatch.setattr(agents, "get_outreach_agent", lambda: agent)
+    monkeypatch.setattr(outreach_jobs, "JOB_STALE_SECONDS", 0)
+
+    async def run():
+        # A job recorded by a process that died before running it
+        session = (
+            await repositories.create_outreach_session(
+                {
+                    "status": "ACTIVE",
+                    "session_goals": {"type": outreach_jobs.JOB_TYPE, "prompt": "Hi"},
+                    "metadata": {"batch_id": "b1", "users": USERS},
+                    "completion_metrics": {"customers": {}},
+                }
+            )
+        )[0]
+        recovered = await outreach_jobs.recover_batch_jobs()
+        await outreach_jobs.job_queue.join()
+        await outreach_jobs.job_queue.close()
+        return session["id"], recovered
+
+    job_id, recovered = asyncio.run(run())
+
+    assert recovered == [job_id]
+    assert store.sessions[job_id]["status"] == "COMPLETED"
+    assert len(agent.generated) == 5
@@ -0,0 +1,171 @@
+"""
+Tests for the repository layer's queries against a recording Supabase client.
+"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeResponse
+from utils import db, repositories
+
+
+class RecordingQuery:
+    """Records every builder call; ``execute`` files the request"""
+
+    def __init__(self, client: "RecordingClient", call: tuple):
+        self.client = client
+        self.calls = [call]
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            self.calls.append((method, *args, *([kwargs] if kwargs else [])))
+            return self
+
+        return call
+
+    def execute(self) -> FakeResponse:
+        self.client.requests.append(self.calls)
+        return FakeResponse(self.client.data)
+
+
+class RecordingClient:
+    """Stands in for the Supabase client, answering every request with ``data``"""
+
+    def __init__(self):
+        self.requests = []
+        self.data = None
+
+    def table(self, name: str) -> RecordingQuery:
+        return RecordingQuery(self, ("table", name))
+
+    def rpc(self, name: str, params: dict) -> RecordingQuery:
+        return RecordingQuery(self, ("rpc", name, params))
+
+
+@pytest.fixture
+def client():
+    client = RecordingClient()
+    db.set_supabase(client)
+    yield client
+    db.set_supabase(None)
+
+
+def test_reads_use_the_right_table_columns_and_filters(client):
+    client.data = {"id": "u1", "email": "ada@example.com"}
+    assert asyncio.run(repositories.get_user("u1", "email")) == client.data
+
+    client.data = [{"id": "t1"}]
+    asyncio.run(repositories.get_tickets(["t1", "t2"], "id, status"))
+    asyncio.run(repositories.list_customer_tickets("c1", 5))
+    asyncio.run(repositories.list_outreach_sessions("ACTIVE", "id"))
+
+    assert client.requests == [
+        [
+            ("table", "users"),
+            ("select", "email"),
+            ("eq", "id", "u1"),
+            ("maybe_single",),
+        ],
+        [("table", "tickets"), ("select", "id, status"), ("in_", "id", ["t1", "t2"])],
+        [
+            ("table", "tickets"),
+            ("select", "*"),
+            ("eq", "customer_id", "c1"),
+            ("order", "created_at", {"desc": True}),
+            ("limit", 5),
+        ],
+        [
+            ("table", "agent_outreach_sessions"),
+            ("select", "id"),
+            ("eq", "status", "ACTIVE"),
+        ],
+    ]
+
+
+def test_writes_send_their_payload_to_the_right_table(client):
+    client.data = [{"id": "row-1"}]
+
+    asyncio.run(repositories.update_ticket("t1", {"status": "RESOLVED"}))
+    asyncio.run(repositories.insert_interactions([{"ticket_id": "t1"}]))
+    created = asyncio.run(repositories.insert_email_logs([{"status": "SENT"}]))
+    asyncio.run(repositories.update_outreach_session("s1", {"status": "COMPLETED"}))
+
+    assert created == [{"id": "row-1"}]
+    assert client.requests == [
+        [
+            ("table", "tickets"),
+            ("update", {"status": "RESOLVED"}),
+            ("eq", "id", "t1"),
+        ],
+        [("table", "interactions"), ("insert", [{"ticket_id": "t1"}])],
+        [("table", "email_logs"), ("insert", [{"status": "SENT"}])],
+        [
+            ("table", "agent_outreach_sessions"),
+            ("update", {"status": "COMPLETED"}),
+            ("eq", "id", "s1"),
+        ],
+    ]
+
+
+def test_rpc_wrappers_send_their_function_name_and_arguments(client):
+    client.data = ["t1"]
+    resolutions = [{"ticket_id": "t1", "resolution_text": "Refunded"}]
+
+    asyncio.run(repositories.search_users("ada", 10))
+    asyncio.run(repositories.list_tickets_for_customers(["c1", "c2"], 5))
+    asyncio.run(repositories.list_interactions_for_authors(["c1"], 3))
+    resolved = asyncio.run(
+        repositories.resolve_tickets(resolutions, "agent-1", "2025-01-26T10:00:00")
+    )
+
+    assert resolved == ["t1"]
+    assert client.requests == [
+        [("rpc", "search_users", {"query": "ada", "max_results": 10})],
+        [
+            (
+                "rpc",
+                "latest_customer_tickets",
+                {"customer_ids": ["c1", "c2"], "per_customer": 5},
+            )
+        ],
+        [
+            (
+                "rpc",
+                "latest_author_interactions",
+                {"author_ids": ["c1"], "per_author": 3},
+            )
+        ],
+        [
+            (
+                "rpc",
+                "resolve_tickets",
+                {
+                    "resolutions": resolutions,
+                    "resolved_by": "agent-1",
+                    "resolved_at": "2025-01-26T10:00:00",
+                },
+            )
+        ],
+    ]
+
+
+def test_empty_inputs_and_responses(client):
+    async def main():
+        return [
+            await repositories.get_users([]),
+            await repositories.get_tickets([]),
+            await repositories.list_tickets_for_customers([], 5),
+            await repositories.list_interactions_for_authors([], 5),
+            await repositories.resolve_tickets([], "agent-1", "2025-01-26"),
+            await repositories.insert_interactions([]),
+            await repositories.insert_email_logs([]),
+            await repositories.get_email_logs([]),
+        ]
+
+    assert asyncio.run(main()) == [[]] * 8
+    assert client.requests == []
+
+    # A request that matched nothing
+    assert asyncio.run(repositories.get_ticket("t1")) is None
+    assert asyncio.run(repositories.get_users(["u1"])) == []
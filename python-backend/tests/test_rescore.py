@@ -0,0 +1,66 @@
+"""
+Tests for offline re-scoring of stored responses.
+"""
+
+import json
+
+from evaluation.criteria import compile_criteria
+from evaluation.rescore import load_test_cases, main
+
+RESPONSES = [
+    ("INV001", "Blue denim jeans, size 32: stock set to 15 units. Best regards"),
+    ("RET001", "You are within the 30-day window; we can exchange the size."),
+    ("SZR001", "I recommend a Large because our fit runs slim."),
+]
+
+
+def test_rescore_streams_chunks_in_order_and_aggregates(tmp_path):
+    source = tmp_path / "responses.jsonl"
+    records = [
+        {"id": f"r{index}", "test_case_id": test_case_id, "response": response}
+        for index, (test_case_id, response) in enumerate(RESPONSES * 3)
+    ]
+    lines = [json.dumps(record) for record in records]
+    lines.insert(4, "not json")
+    lines.insert(6, json.dumps({"test_case_id": "MISSING", "response": "hi"}))
+    lines.insert(2, "")
+    source.write_text("\n".join(lines) + "\n\n")
+    output = tmp_path / "scores.jsonl"
+    summary_path = tmp_path / "summary.json"
+
+    summary = main(
+        [
+            str(source),
+            "--workers=2",
+            "--chunk-size=2",
+            f"--output={output}",
+            f"--summary={summary_path}",
+        ]
+    )
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(rows) == 11
+    assert rows[4] == {"line": 6, "error": "Expecting value: line 1 column 1 (char 0)"}
+    assert rows[6] == {"line": 8, "error": "Unknown test case 'MISSING'"}
+
+    # Every row points back at its source line, and its record's ID if any
+    source_lines = source.read_text().splitlines()
+    for row in rows:
+        if "id" in row:
+            assert json.loads(source_lines[row["line"] - 1])["id"] == row["id"]
+    assert [row["id"] for row in rows if "id" in row] == [r["id"] for r in records]
+
+    test_cases = load_test_cases()
+    scored = [row for row in rows if "error" not in row]
+    for row, record in zip(scored, records):
+        test_case = test_cases[record["test_case_id"]]
+        met = compile_criteria(test_case.success_criteria).score(
+            record["response"], test_case
+        )
+        assert row["criteria"] == dict(zip(test_case.success_criteria, met))
+
+    assert (summary["records"], summary["errors"]) == (9, 2)
+    inventory = summary["test_cases"]["INV001"]
+    assert inventory["responses"] == 3
+    assert inventory["criteria"]["Updates correct quantity"] == 1.0
+    assert json.loads(summary_path.read_text())["test_cases"] == summary["test_cases"]
@@ -0,0 +1,266 @@
+"""
+Tests for resolving many tickets with one transactional write.
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from agents import get_resolution_agent
+from agents import resolution_agent as resolution_module
+from agents.resolution_agent import ResolutionAgent
+from main import app
+from utils import repositories
+from utils.auth import get_user_id
+from utils.mail_transport import SendResult
+
+
+def ticket_row(ticket_id: str, email: str = None, status: str = "OPEN"):
+    return {
+        "id": ticket_id,
+        "title": f"Ticket {ticket_id}",
+        "status": status,
+        "customer_id": f"c-{ticket_id}",
+        "customer": {"id": f"c-{ticket_id}", "email": email} if email else None,
+        "interactions": [],
+    }
+
+
+class FakeChain:
+    async def ainvoke(self, inputs):
+        if inputs["command"] == "fail":
+            raise RuntimeError("model unavailable")
+        await asyncio.sleep(0)
+        return f"Resolved: {inputs['command']}"
+
+
+class FakeTickets:
+    """Ticket reads and the resolve_tickets RPC, recording every call.
+
+    ``changes`` maps ticket IDs to the status another writer gives them
+    between the read and the write, or None if they are deleted. The write
+    doesn't return the ``unsaved`` IDs, as if their interaction wasn't
+    inserted.
+    """
+
+    def __init__(self, rows, changes=None, unsaved=(), fail_write=False):
+        self.rows = {row["id"]: row for row in rows}
+        self.changes = changes or {}
+        self.unsaved = set(unsaved)
+        self.fail_write = fail_write
+        self.gets = []
+        self.writes = []
+
+    async def get_tickets(self, ticket_ids, columns="*"):
+        self.gets.append(list(ticket_ids))
+        return [row for row in self.rows.values() if row["id"] in ticket_ids]
+
+    async def resolve_tickets(self, resolutions, author_id, resolved_at):
+        self.writes.append((resolutions, author_id))
+        for ticket_id, status in self.changes.items():
+            if status is None:
+                del self.rows[ticket_id]
+            else:
+                self.rows[ticket_id] = {**self.rows[ticket_id], "status": status}
+        if self.fail_write:
+            raise RuntimeError("connection reset")
+        resolved = []
+        for resolution in resolutions:
+            row = self.rows.get(resolution["ticket_id"])
+            if row is None or row["status"] in ("RESOLVED", "CLOSED"):
+                continue
+            if row["id"] not in self.unsaved:
+                resolved.append(row["id"])
+        return resolved
+
+
+def install(monkeypatch, tickets: FakeTickets, sent: list, email_logs: list):
+    async def insert_email_logs(rows):
+        email_logs.append(rows)
+        return rows
+
+    async def send_bulk_emails(messages):
+        sent.extend(messages)
+        return [SendResult(to=m["to"], success=True, status=200) for m in messages]
+
+    monkeypatch.setattr(repositories, "get_tickets", tickets.get_tickets)
+    monkeypatch.setattr(repositories, "resolve_tickets", tickets.resolve_tickets)
+    monkeypatch.setattr(repositories, "insert_email_logs", insert_email_logs)
+    monkeypatch.setattr(resolution_module, "send_bulk_emails", send_bulk_emails)
+
+
+def make_agent() -> ResolutionAgent:
+    agent = ResolutionAgent.__new__(ResolutionAgent)
+    agent.chain = FakeChain()
+    agent._create_run_feedback = lambda run_id, metrics: None
+    return agent
+
+
+def run_batch(agent, commands):
+    async def main():
+        result = await agent.resolve_tickets(commands, "worker-1")
+        await asyncio.sleep(0.01)  # let the background emails go out
+        return result
+
+    return asyncio.run(main())
+
+
+def test_resolve_tickets_writes_once_and_keeps_order(monkeypatch):
+    rows = [
+        ticket_row("t1", "a@example.com"),
+        ticket_row("t2"),
+        ticket_row("t3"),
+        ticket_row("t4", status="CLOSED"),
+    ]
+    tickets, sent, email_logs = FakeTickets(rows), [], []
+    install(monkeypatch, tickets, sent, email_logs)
+
+    result = run_batch(
+        make_agent(),
+        [
+            ("t3", "refund"),
+            ("missing", "refund"),
+            ("t2", "fail"),
+            ("t4", "refund"),
+            ("t1", "swap"),
+        ],
+    )
+
+    assert [r["ticket_id"] for r in result["results"]] == [
+        "t3",
+        "missing",
+        "t2",
+        "t4",
+        "t1",
+    ]
+    assert [r["success"] for r in result["results"]] == [
+        True,
+        False,
+        False,
+        False,
+        True,
+    ]
+    assert result["results"][3]["error"] == resolution_module.ALREADY_RESOLVED
+    assert result["resolved"] == 2 and result["failed"] == 3
+    assert result["emails_queued"] == 1
+
+    assert tickets.gets == [["t3", "missing", "t2", "t4", "t1"]]
+    assert len(tickets.writes) == 1
+    resolutions, author_id = tickets.writes[0]
+    assert author_id == "worker-1"
+    assert [r["ticket_id"] for r in resolutions] == ["t3", "t1"]
+    assert resolutions[1]["resolution_text"] == "Resolved: swap"
+
+    assert [m["to"] for m in sent] == ["a@example.com"]
+    assert sent[0]["subject"] == "Resolution: Ticket t1"
+    assert email_logs[0][0]["status"] == "SENT"
+
+
+def test_tickets_the_write_skips_are_reported_with_their_reason(monkeypatch):
+    rows = [
+        ticket_row("t1", "a@example.com"),
+        ticket_row("t2", "b@example.com"),
+        ticket_row("t3"),
+        ticket_row("t4"),
+    ]
+    tickets, sent, email_logs = (
+        FakeTickets(rows, changes={"t2": "RESOLVED", "t3": None}, unsaved={"t4"}),
+        [],
+        [],
+    )
+    install(monkeypatch, tickets, sent, email_logs)
+
+    result = run_batch(
+        make_agent(), [("t1", "swap"), ("t2", "swap"), ("t3", "swap"), ("t4", "swap")]
+    )
+
+    assert [r["success"] for r in result["results"]] == [True, False, False, False]
+    assert [r.get("error") for r in result["results"][1:]] == [
+        resolution_module.ALREADY_RESOLVED,
+        "Ticket not found: t3",
+        resolution_module.NOT_RESOLVED,
+    ]
+    # The skipped tickets' statuses are read again after the write
+    assert tickets.gets[-1] == ["t2", "t3", "t4"]
+    assert [m["to"] for m in sent] == ["a@example.com"]
+
+
+def test_failed_write_fails_every_ticket_and_drops_their_cache(monkeypatch):
+    rows = [ticket_row("t1", "a@example.com"), ticket_row("t2", "b@example.com")]
+    invalidated = []
+
+    async def invalidate(customer_id):
+        invalidated.append(customer_id)
+        if customer_id == "c-t1":
+            raise ConnectionError("cache unavailable")
+
+    cache = resolution_module.get_customer_context_cache()
+    monkeypatch.setattr(cache, "invalidate", invalidate)
+    tickets, sent, email_logs = FakeTickets(rows, fail_write=True), [], []
+    install(monkeypatch, tickets, sent, email_logs)
+
+    result = run_batch(make_agent(), [("t1", "swap"), ("t2", "swap")])
+
+    # The cache error is logged; the write error is what gets reported
+    assert result["success"] is False
+    assert [r["error"] for r in result["results"]] == ["connection reset"] * 2
+    assert all("resolution" not in r for r in result["results"])
+    assert sent == [] and result["emails_queued"] == 0
+    assert invalidated == ["c-t1", "c-t2"]
+
+
+def test_tickets_are_read_in_chunks_and_bad_rows_fail_alone(monkeypatch):
+    rows = [ticket_row("t1"), ticket_row("t2"), ticket_row("t3")]
+    del rows[1]["title"]
+    tickets, sent, email_logs = FakeTickets(rows), [], []
+    install(monkeypatch, tickets, sent, email_logs)
+    monkeypatch.setattr(resolution_module, "RESOLUTION_BATCH_CHUNK_SIZE", 2)
+
+    result = run_batch(
+        make_agent(), [("t1", "swap"), ("t2", "swap"), ("t1", "again"), ("t3", "swap")]
+    )
+
+    assert tickets.gets == [["t1", "t2"], ["t3"]]
+    assert [r["success"] for r in result["results"]] == [True, False, True, True]
+    assert result["results"][1]["error"].startswith("Invalid ticket data")
+    assert len(tickets.writes) == 1
+
+
+def test_resolve_batch_route_merges_shared_and_per_ticket_commands():
+    received = []
+
+    class Agent:
+        async def resolve_tickets(self, commands, author_id):
+            received.append((commands, author_id))
+            return {"success": True, "results": []}
+
+    app.dependency_overrides[get_resolution_agent] = lambda: Agent()
+    app.dependency_overrides[get_user_id] = lambda: "worker-1"
+    try:
+        client = TestClient(app)
+        response = client.post(
+            "/api/resolution/resolve-batch",
+            json={
+                "command": "Close after the outage",
+                "ticket_ids": ["t1", "t2", "t1"],
+                "tickets": [{"ticket_id": "t3", "command": "Offer a refund"}],
+            },
+        )
+        missing_command = client.post(
+            "/api/resolution/resolve-batch", json={"ticket_ids": ["t1"]}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert received == [
+        (
+            [
+                ("t1", "Close after the outage"),
+                ("t2", "Close after the outage"),
+                ("t3", "Offer a refund"),
+            ],
+            "worker-1",
+        )
+    ]
+    assert missing_command.status_code == 422
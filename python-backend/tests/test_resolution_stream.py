@@ -0,0 +1,106 @@
+"""
+Tests for the streaming resolve endpoint.
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+from fastapi.testclient import TestClient
+
+from agents import get_resolution_agent
+from agents.resolution_agent import ResolutionAgent
+from main import app
+from models.ticket import TicketSnapshot
+from utils.auth import get_user_id
+
+
+TICKET = TicketSnapshot(id="t1", title="Broken login", status="OPEN")
+
+
+class FakeChain:
+    """Streams a canned resolution one word at a time"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    async def astream(self, inputs):
+        for word in self.text.split(" "):
+            await asyncio.sleep(0)
+            yield word + " "
+
+
+def make_agent(snapshot: Optional[TicketSnapshot] = TICKET):
+    """A ResolutionAgent with a fake ticket, chain and metrics tracking"""
+    agent = ResolutionAgent.__new__(ResolutionAgent)
+    agent.chain = FakeChain("Reset your password from the login page")
+    agent.tracked = []
+
+    async def get_ticket_snapshot(ticket_id):
+        return snapshot
+
+    async def track_metrics(**kwargs):
+        agent.tracked.append(kwargs)
+
+    agent.get_ticket_snapshot = get_ticket_snapshot
+    agent._track_metrics = track_metrics
+    return agent
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: ") :], json.loads(data[len("data: ") :])))
+    return events
+
+
+def post_stream(agent):
+    app.dependency_overrides[get_resolution_agent] = lambda: agent
+    app.dependency_overrides[get_user_id] = lambda: "agent-user"
+    try:
+        with TestClient(app) as client:
+            return client.post(
+                "/api/resolution/resolve/stream",
+                json={"command": "resolve it", "ticket_id": "t1"},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_stream_emits_context_tokens_then_done():
+    """Tokens arrive before completion, and tracking starts after the stream"""
+    agent = make_agent()
+
+    response = post_stream(agent)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "context"
+    assert names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+
+    resolution = "".join(data["text"] for name, data in events if name == "token")
+    assert events[-1][1]["resolution"] == resolution
+    assert events[-1][1]["success"] is True
+    assert agent.tracked == [
+        {
+            "ticket_id": "t1",
+            "command": "resolve it",
+            "resolution": resolution,
+            "author_id": "agent-user",
+            "start_time": agent.tracked[0]["start_time"],
+            "snapshot": TICKET,
+        }
+    ]
+
+
+def test_stream_reports_missing_ticket():
+    """A missing ticket yields one error event and no tracking"""
+    agent = make_agent(snapshot=None)
+
+    events = parse_sse(post_stream(agent).text)
+
+    assert events == [("error", {"success": False, "error": "Ticket not found: t1"})]
+    assert agent.tracked == []
@@ -0,0 +1,101 @@
+"""
+Tests for single-flight coalescing of context fetches.
+"""
+
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_loads_share_one_fetch_and_reuse_it():
+    """Many callers for one key trigger a single loader call"""
+    flight = SingleFlight(ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": "t1"}
+
+    async def main():
+        results = await asyncio.gather(
+            *[flight.load("ticket", "t1", loader) for _ in range(20)]
+        )
+        again = await flight.load("ticket", "t1", loader)
+        return results, again
+
+    results, again = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(result == {"id": "t1"} for result in results)
+    assert again == {"id": "t1"}
+    assert flight.stats() == {"hits": 1, "misses": 1, "coalesced": 19, "inflight": 0}
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight(ttl=60)
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("supabase down")
+
+    async def main():
+        results = await asyncio.gather(
+            *[flight.load("ticket", "t1", failing) for _ in range(3)],
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await flight.load("ticket", "t1", failing)
+
+    asyncio.run(main())
+
+    assert len(attempts) == 2
+    assert flight.peek("ticket", "t1") is None
+
+
+def test_forget_and_prime_control_the_cache():
+    flight = SingleFlight(ttl=60)
+    flight.prime("customer_context", "c1", "primed")
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return "fresh"
+
+    assert asyncio.run(flight.load("customer_context", "c1", loader)) == "primed"
+
+    flight.forget("customer_context", "c1")
+    assert asyncio.run(flight.load("customer_context", "c1", loader)) == "fresh"
+    assert len(calls) == 1
+
+
+def test_forget_during_a_load_keeps_its_result_out_of_the_cache():
+    flight = SingleFlight(ttl=60)
+    versions = iter(["before write", "after write"])
+
+    async def main():
+        release = asyncio.Event()
+
+        async def slow_loader():
+            value = next(versions)
+            await release.wait()
+            return value
+
+        stale = asyncio.create_task(flight.load("ticket", "t1", slow_loader))
+        await asyncio.sleep(0)
+        flight.forget("ticket", "t1")  # the ticket was just written
+        release.set()
+
+        # The waiter still gets its answer, but it isn't reused
+        assert await stale == "before write"
+        assert flight.peek("ticket", "t1") is None
+        assert await flight.load("ticket", "t1", slow_loader) == "after write"
+        assert flight.peek("ticket", "t1") == "after write"
+
+    asyncio.run(main())
+    assert flight._generations == {}
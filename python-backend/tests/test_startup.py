@@ -0,0 +1,81 @@
+"""
+Tests that the API starts without building agents or connecting to services.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importing main used to build both agents; it now takes about a second,
+# mostly FastAPI and the Supabase client library
+IMPORT_BUDGET_SECONDS = 3.0
+
+# Modules only the agents need; importing any of them means something at
+# module level started building an agent or model client again
+LAZY_MODULES = [
+    "agents.outreach_agent",
+    "agents.resolution_agent",
+    "langchain",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_community",
+    "langsmith",
+    "openai",
+    "pinecone",
+    "numpy",
+]
+
+
+class StubOutreachAgent:
+    async def get_customer_context(self, customer_id: str) -> str:
+        return f"context for {customer_id}"
+
+
+def test_main_imports_without_credentials():
+    """The app module loads with no Supabase, Mailgun or OpenAI settings"""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(("SUPABASE", "MAILGUN", "OPENAI", "PINECONE"))
+    }
+    script = (
+        "import sys, main; "
+        f"loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]; "
+        "assert not loaded, f'imported at startup: {loaded}'"
+    )
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    assert result.returncode == 0, result.stderr
+    assert elapsed < IMPORT_BUDGET_SECONDS
+
+
+def test_routes_resolve_agents_through_dependencies():
+    """Agents are injected per request, so tests can override them"""
+    from agents import get_outreach_agent
+    from main import app
+
+    app.dependency_overrides[get_outreach_agent] = StubOutreachAgent
+    try:
+        with TestClient(app) as client:
+            assert client.get("/health").json() == {"status": "healthy"}
+            response = client.get("/api/customer-context/c1")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == {"context": "context for c1"}
+    assert get_outreach_agent.cache_info().currsize == 0
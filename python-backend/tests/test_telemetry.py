@@ -0,0 +1,118 @@
+"""
+Tests for the background telemetry queue.
+"""
+
+import threading
+import uuid
+
+from utils.telemetry import TelemetryQueue, coalesce
+
+
+class RecordingClient:
+    """Fake LangSmith client that records calls and the thread they ran on"""
+
+    def __init__(self, delay: threading.Event = None):
+        self.calls = []
+        self.threads = set()
+        self.delay = delay
+
+    def _record(self, method, *args, **kwargs):
+        if self.delay:
+            self.delay.wait()
+        self.threads.add(threading.current_thread().name)
+        self.calls.append((method, args, kwargs))
+
+    def create_run(self, *args, **kwargs):
+        self._record("create_run", *args, **kwargs)
+
+    def update_run(self, *args, **kwargs):
+        self._record("update_run", *args, **kwargs)
+
+    def create_feedback(self, *args, **kwargs):
+        self._record("create_feedback", *args, **kwargs)
+
+
+def test_updates_are_folded_into_the_create():
+    """A run created and completed in one batch is sent as a single create"""
+    run_id = uuid.uuid4()
+    batch = [
+        {"method": "create_run", "args": [], "kwargs": {"name": "run", "id": run_id}},
+        {
+            "method": "update_run",
+            "args": [],
+            "kwargs": {"run_id": run_id, "status": "running"},
+        },
+        {"method": "create_feedback", "args": [run_id], "kwargs": {"key": "score"}},
+        {"method": "update_run", "args": [run_id], "kwargs": {"status": "completed"}},
+        {"method": "update_run", "args": ["other"], "kwargs": {"status": "running"}},
+        {"method": "update_run", "args": ["other"], "kwargs": {"outputs": {"a": 1}}},
+    ]
+
+    merged = coalesce(batch)
+
+    assert [record["method"] for record in merged] == [
+        "create_run",
+        "create_feedback",
+        "update_run",
+    ]
+    assert merged[0]["kwargs"] == {"name": "run", "id": run_id, "status": "completed"}
+    assert merged[2]["kwargs"] == {"status": "running", "outputs": {"a": 1}}
+    assert batch[0]["kwargs"] == {"name": "run", "id": run_id}
+
+
+def test_calls_run_on_the_worker_thread():
+    """submit() returns immediately and the client is called off-thread"""
+    client = RecordingClient()
+    telemetry = TelemetryQueue(lambda: client, spill_path=None)
+
+    assert telemetry.submit("create_feedback", "run", key="score", score=1.0)
+    telemetry.submit("missing_method")
+    telemetry.flush()
+
+    assert client.calls == [
+        ("create_feedback", ("run",), {"key": "score", "score": 1.0})
+    ]
+    assert client.threads == {"telemetry"}
+    assert telemetry.sent == 1
+    assert telemetry.failed == 1
+    telemetry.close()
+
+
+def test_full_queue_spills_to_disk_and_replays(tmp_path):
+    """Records that don't fit are spilled and sent once the queue drains"""
+    release = threading.Event()
+    client = RecordingClient(delay=release)
+    telemetry = TelemetryQueue(
+        lambda: client, max_size=2, spill_path=str(tmp_path / "spill.jsonl")
+    )
+
+    accepted = [
+        telemetry.submit("create_feedback", f"run-{i}", key="k", score=i)
+        for i in range(10)
+    ]
+    release.set()
+    telemetry.close()
+
+    assert all(accepted)
+    assert telemetry.spilled > 0
+    assert telemetry.dropped == 0
+    assert sorted(args[0] for _, args, _ in client.calls) == sorted(
+        f"run-{i}" for i in range(10)
+    )
+    assert not (tmp_path / "spill.jsonl").exists()
+
+
+def test_full_queue_without_spill_drops():
+    """Without a spill path, overflow is counted and dropped"""
+    release = threading.Event()
+    client = RecordingClient(delay=release)
+    telemetry = TelemetryQueue(lambda: client, max_size=1, spill_path=None)
+
+    accepted = [
+        telemetry.submit("create_feedback", "run", key="k", score=i) for i in range(5)
+    ]
+    release.set()
+    telemetry.close()
+
+    assert accepted.count(False) == telemetry.dropped > 0
+    assert len(client.calls) == 5 - telemetry.dropped
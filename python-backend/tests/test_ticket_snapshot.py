@@ -0,0 +1,94 @@
+"""
+Tests for the single-read ticket snapshot used by the resolution pipeline.
+"""
+
+import asyncio
+
+from agents.resolution_agent import ResolutionAgent
+from utils import repositories
+
+TICKET_ROW = {
+    "id": "t-snapshot",
+    "title": "Torn seam",
+    "description": "The jacket seam came apart",
+    "status": "OPEN",
+    "priority": "HIGH",
+    "created_at": "2025-01-20T09:00:00+00:00",
+    "customer_id": "c1",
+    "customer": {"id": "c1", "name": "Ada", "email": "ada@example.com"},
+    "interactions": [
+        {
+            "id": "i1",
+            "created_at": "2025-01-21T09:00:00+00:00",
+            "type": "COMMENT",
+            "content": {"text": "Any update?"},
+        }
+    ],
+}
+
+
+class FakeChain:
+    def __init__(self):
+        self.inputs = []
+
+    async def ainvoke(self, inputs):
+        self.inputs.append(inputs)
+        return "We'll send a replacement"
+
+
+def test_resolve_reads_the_ticket_once_with_customer_joined(monkeypatch):
+    reads, updates, emails = [], [], []
+
+    async def get_ticket(ticket_id, columns="*"):
+        reads.append(columns)
+        return dict(TICKET_ROW)
+
+    async def update_ticket(ticket_id, values):
+        updates.append(values)
+        return [values]
+
+    async def insert_interaction(interaction):
+        return [interaction]
+
+    monkeypatch.setattr(repositories, "get_ticket", get_ticket)
+    monkeypatch.setattr(repositories, "update_ticket", update_ticket)
+    monkeypatch.setattr(repositories, "insert_interaction", insert_interaction)
+
+    agent = ResolutionAgent.__new__(ResolutionAgent)
+    agent.chain = FakeChain()
+    agent.tracked = []
+
+    async def track_metrics(**kwargs):
+        agent.tracked.append(kwargs)
+
+    async def send_resolution_email(to_email, **kwargs):
+        emails.append(to_email)
+        return True
+
+    agent._track_metrics = track_metrics
+    agent._create_run_feedback = lambda run_id, metrics: None
+    agent.send_resolution_email = send_resolution_email
+
+    async def main():
+        response = await agent.process_command("resolve it", "t-snapshot", "worker-1")
+        await asyncio.sleep(0)  # let the background tracking task start
+        snapshot = agent.tracked[0]["snapshot"]
+        result = await agent.resolve_ticket(
+            "t-snapshot", response["resolution"], "worker-1", snapshot
+        )
+        return response, result
+
+    response, result = asyncio.run(main())
+
+    assert response["success"] is True
+    assert result["success"] is True
+    assert len(reads) == 1
+    assert "customer:users" in reads[0] and "interactions" in reads[0]
+
+    context = agent.chain.inputs[0]["ticket_context"]
+    assert "Customer:\n- Ada <ada@example.com>" in context
+    assert "Any update?" in context
+
+    assert updates[0]["status"] == "RESOLVED"
+    assert emails == ["ada@example.com"]
+    assert result["ticket_data"]["customer"]["email"] == "ada@example.com"
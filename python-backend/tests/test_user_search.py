@@ -0,0 +1,58 @@
+"""
+Tests for the single-query user search and its autocomplete cache.
+"""
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import repositories, user_search
+from utils.user_search import UserSearchCache
+
+USERS = [
+    {"id": "1", "name": "Ada Lovelace", "email": "ada@example.com"},
+    {"id": "2", "name": "Grace Hopper", "email": "grace@adalabs.io"},
+    {"id": "3", "name": "Alan Turing", "email": "alan@example.com"},
+]
+
+
+def test_search_is_one_limited_query_per_new_prefix(monkeypatch):
+    calls = []
+
+    async def search_users(query, limit):
+        calls.append((query, limit))
+        return [
+            user
+            for user in USERS
+            if query.lower() in user["name"].lower()
+            or query.lower() in user["email"].lower()
+        ]
+
+    monkeypatch.setattr(repositories, "search_users", search_users)
+    monkeypatch.setattr(user_search, "search_cache", UserSearchCache(ttl=60))
+
+    with TestClient(app) as client:
+        for query in ["a", "ad", "Ada"]:
+            response = client.get("/api/users/search", params={"q": query})
+            assert response.status_code == 200
+
+    # "a" matched fewer than the limit, so the longer queries reuse it
+    assert calls == [("a", 10)]
+    assert [user["id"] for user in response.json()] == ["1", "2"]
+
+
+def test_full_prefix_results_are_not_reused():
+    cache = UserSearchCache(limit=2, ttl=60)
+    cache.set("a", USERS[:2])
+
+    assert cache.get("A") == USERS[:2]
+    assert cache.get("ad") is None
+    assert (cache.hits, cache.prefix_hits, cache.misses) == (1, 0, 1)
+
+
+def test_prefix_results_are_ranked_name_matches_first():
+    cache = UserSearchCache(ttl=60)
+    cache.set("a", list(reversed(USERS)))
+
+    rows = cache.get("ada")
+
+    assert [user["id"] for user in rows] == ["1", "2"]
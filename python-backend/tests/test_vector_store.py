@@ -0,0 +1,135 @@
+"""
+Tests for the in-process vector store backend.
+"""
+
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_core.embeddings import Embeddings
+
+from utils.vector_store import LocalVectorStore, create_vector_store
+
+embedding = DeterministicFakeEmbedding(size=64)
+
+
+def test_filtered_search_only_returns_matching_rows():
+    """customer_id and success filters are applied before ranking"""
+    store = LocalVectorStore(embedding)
+    store.add_texts(
+        ["denim follow-up", "jacket offer", "denim follow-up", "failed message"],
+        metadatas=[
+            {"customer_id": "c1", "success": True},
+            {"customer_id": "c1", "success": True},
+            {"customer_id": "c2", "success": True},
+            {"customer_id": "c1", "success": False},
+        ],
+    )
+
+    results = store.similarity_search_with_score(
+        "denim follow-up", k=3, filter={"customer_id": "c1", "success": True}
+    )
+
+    assert [doc.page_content for doc, _ in results] == [
+        "denim follow-up",
+        "jacket offer",
+    ]
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert all(doc.metadata["customer_id"] == "c1" for doc, _ in results)
+    assert store.similarity_search("anything", filter={"customer_id": "nobody"}) == []
+
+
+def test_persisted_index_is_memory_mapped_on_reload(tmp_path):
+    """Vectors and metadata written to disk are reloaded by a new store"""
+    path = str(tmp_path / "index")
+    store = LocalVectorStore(embedding, path=path)
+    store.add_texts(["first"], metadatas=[{"customer_id": "c1", "success": True}])
+    store.add_texts(["second"], metadatas=[{"customer_id": "c1", "success": True}])
+
+    reloaded = LocalVectorStore(embedding, path=path)
+
+    assert len(reloaded) == 2
+    assert isinstance(reloaded._matrix, np.memmap)
+    (doc,) = reloaded.similarity_search("second", k=1, filter={"customer_id": "c1"})
+    assert doc.page_content == "second"
+
+
+class ThreadSafeEmbedding(Embeddings):
+    """Deterministic like DeterministicFakeEmbedding, without its global seed"""
+
+    def embed_query(self, text):
+        seed = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).normal(size=64).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def test_concurrent_adds_and_searches_keep_rows_aligned():
+    """Executor threads can add and search at once without mixing up rows"""
+    embedding = ThreadSafeEmbedding()
+    store = LocalVectorStore(embedding)
+    customers = [f"c{i}" for i in range(8)]
+
+    def add(customer):
+        for batch in range(20):
+            store.add_texts(
+                [f"{customer} message {batch}-{i}" for i in range(3)],
+                metadatas=[{"customer_id": customer}] * 3,
+            )
+
+    def search(customer):
+        for _ in range(60):
+            for doc in store.similarity_search(
+                "message", k=3, filter={"customer_id": customer}
+            ):
+                assert doc.metadata["customer_id"] == customer
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = [pool.submit(add, c) for c in customers]
+        futures += [pool.submit(search, c) for c in customers]
+        for future in futures:
+            future.result()
+
+    assert len(store) == len(customers) * 20 * 3
+    expected = np.asarray(embedding.embed_documents(store._texts), dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert np.allclose(store._matrix[: len(store)], expected, atol=1e-5)
+
+
+def test_filtered_lookup_is_sub_millisecond():
+    """A k=3 customer-filtered lookup over 20k rows stays well under 1ms"""
+    store = LocalVectorStore(embedding)
+    rng = np.random.default_rng(0)
+    count = 20_000
+    vectors = rng.normal(size=(count, 64)).astype(np.float32)
+    store._dim = 64
+    for i in range(count):
+        store._register(
+            str(i), f"text {i}", {"customer_id": f"c{i % 500}", "success": True}
+        )
+    store._append_vectors(vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+
+    query = embedding.embed_query("lookup")
+    store.similarity_search_by_vector(query, k=3, filter={"customer_id": "c7"})
+
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        results = store.similarity_search_by_vector(
+            query, k=3, filter={"customer_id": "c7", "success": True}
+        )
+    per_lookup = (time.perf_counter() - start) / runs
+
+    assert len(results) == 3
+    assert per_lookup < 0.001
+
+
+def test_factory_selects_backend():
+    """The local backend needs no credentials; unknown names are rejected"""
+    assert isinstance(create_vector_store(embedding, backend="local"), LocalVectorStore)
+    with pytest.raises(ValueError):
+        create_vector_store(embedding, backend="nope")
@@ -1,6 +1,28 @@
 from fastapi import HTTPException, Header
-from typing import Optional
-from .db import supabase
+from typing import Dict, Optional
+from jose import jwt, JWTError, ExpiredSignatureError
+import aiohttp
+import hashlib
+import os
+import time
+from .cache import TTLCache
+from .db import get_supabase, run_blocking
+
+# Local JWT verification. Set SUPABASE_JWT_SECRET (HS256 projects) or
+# SUPABASE_JWKS_URL (asymmetric signing keys) to verify tokens without a
+# round trip to the auth server; otherwise every cache miss calls it.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+JWKS_REFRESH_SECONDS = float(os.getenv("SUPABASE_JWKS_REFRESH_SECONDS", "600"))
+
+# Verified tokens, keyed by a hash of the token and never kept past its exp
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+token_cache = TTLCache(max_size=AUTH_TOKEN_CACHE_SIZE, ttl=AUTH_TOKEN_CACHE_TTL)
+
+_jwks: Optional[Dict] = None
+_jwks_fetched_at = 0.0
 
 
 async def get_user_id(authorization: Optional[str] = Header(None)) -> str:
@@ -11,12 +33,83 @@ async def get_user_id(authorization: Optional[str] = Header(None)) -> str:
     try:
         # Remove 'Bearer ' prefix if present
         token = authorization.replace("Bearer ", "")
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+
+        user_id = token_cache.get(cache_key)
+        if user_id:
+            return user_id
 
-        # Verify the JWT token
-        response = supabase.auth.get_user(token)
-        if not response.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
+        # Verify locally against the signing secret/JWKS when configured
+        claims = await verify_token_locally(token)
+        if claims and claims.get("sub"):
+            user_id = claims["sub"]
+        else:
+            # Fall back to verifying the JWT token with the auth server
+            response = await run_blocking(get_supabase().auth.get_user, token)
+            if not response.user:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            user_id = response.user.id
+            claims = jwt.get_unverified_claims(token)
 
-        return response.user.id
+        token_cache.set(cache_key, user_id, ttl=_seconds_until_expiry(claims))
+        return user_id
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token has expired")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
+
+
+async def verify_token_locally(token: str) -> Optional[Dict]:
+    """Verify a JWT with the local secret or JWKS and return its claims.
+
+    Returns None when local verification isn't configured or the token can't
+    be verified locally, so the caller can fall back to the auth server. If
+    the JWKS can't be refreshed, the last keys fetched are used, if any.
+    Expired tokens raise ExpiredSignatureError.
+    """
+    if SUPABASE_JWT_SECRET:
+        key, algorithms = SUPABASE_JWT_SECRET, ["HS256"]
+    elif SUPABASE_JWKS_URL:
+        try:
+            key = await _get_jwks()
+        except Exception as e:
+            if _jwks is None:
+                print(f"Could not fetch JWKS, using auth server: {str(e)}")
+                return None
+            print(f"Could not refresh JWKS, using cached keys: {str(e)}")
+            key = _jwks
+        algorithms = ["RS256", "ES256"]
+    else:
+        return None
+
+    try:
+        return jwt.decode(
+            token, key, algorithms=algorithms, audience=SUPABASE_JWT_AUDIENCE
+        )
+    except ExpiredSignatureError:
+        raise
+    except JWTError as e:
+        print(f"Local token verification failed, using auth server: {str(e)}")
+        return None
+
+
+async def _get_jwks() -> Dict:
+    """Fetch the project's JWKS, refreshing it every JWKS_REFRESH_SECONDS"""
+    global _jwks, _jwks_fetched_at
+    if _jwks is None or time.monotonic() - _jwks_fetched_at > JWKS_REFRESH_SECONDS:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(SUPABASE_JWKS_URL) as response:
+                response.raise_for_status()
+                _jwks = await response.json()
+        _jwks_fetched_at = time.monotonic()
+    return _jwks
+
+
+def _seconds_until_expiry(claims: Optional[Dict]) -> Optional[float]:
+    """Seconds until the token's exp claim, or None if it has none"""
+    exp = (claims or {}).get("exp")
+    if exp is None:
+        return None
+    return float(exp) - time.time()
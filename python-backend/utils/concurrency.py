@@ -0,0 +1,195 @@
+"""
+Helpers for running async work over many items with bounded parallelism.
+"""
+
+import asyncio
+import time
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def run_bounded(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[R]],
+    concurrency: int,
+    timeout: Optional[float] = None,
+    on_error: Optional[Callable[[T, Exception], R]] = None,
+) -> List[R]:
+    """Run ``worker`` over ``items`` with at most ``concurrency`` calls in flight.
+
+    Results are returned in input order. Each call is bounded by ``timeout``
+    seconds when given. If ``on_error`` is provided, a failing or timed out
+    item is mapped to a result through it instead of aborting the batch.
+    """
+    if not items:
+        return []
+
+    results: List[Optional[R]] = [None] * len(items)
+    next_index = 0
+
+    async def drain():
+        nonlocal next_index
+        while next_index < len(items):
+            index = next_index
+            next_index += 1
+            item = items[index]
+            try:
+                results[index] = await _call(worker, item, timeout)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                results[index] = on_error(item, e)
+
+    workers = [
+        asyncio.create_task(drain())
+        for _ in range(max(1, min(concurrency, len(items))))
+    ]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        raise
+
+    return results
+
+
+async def iter_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    concurrency: int,
+    timeout: Optional[float] = None,
+    on_error: Optional[Callable[[T, Exception], R]] = None,
+) -> AsyncIterator[List[Tuple[int, R]]]:
+    """Like ``run_bounded``, but yield results as the calls finish.
+
+    Each step yields the ``(index, result)`` pairs of every call that finished
+    since the previous step, sorted by index. Items are pulled from ``items``
+    lazily and at most ``concurrency`` calls are in flight, so nothing is
+    held beyond the calls in progress and the results not yet consumed.
+    """
+    remaining = iter(enumerate(items))
+    pending = {}
+
+    def start_next():
+        entry = next(remaining, None)
+        if entry is not None:
+            task = asyncio.ensure_future(_call(worker, entry[1], timeout))
+            pending[task] = entry
+
+    for _ in range(max(1, concurrency)):
+        start_next()
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            finished = []
+            for task in done:
+                index, item = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    result = on_error(item, e)
+                finished.append((index, result))
+                start_next()
+            finished.sort(key=lambda pair: pair[0])
+            yield finished
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _call(
+    worker: Callable[[T], Awaitable[R]], item: T, timeout: Optional[float]
+) -> R:
+    if timeout is None:
+        return await worker(item)
+    try:
+        return await asyncio.wait_for(worker(item), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Timed out after {timeout} seconds")
+
+
+class TokenBucket:
+    """Async token bucket limiting how often an operation may start.
+
+    ``rate`` tokens are added per second up to ``capacity``. ``pause`` blocks
+    every caller for a while, e.g. after the upstream API answered 429.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for ``seconds`` and drop any saved burst"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+        self._updated_at = self._blocked_until
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket that settles on the rate an upstream API tolerates.
+
+    The rate grows by ``increase`` per second after every success, up to
+    ``max_rate``, and is multiplied by ``decrease`` (down to ``min_rate``)
+    whenever a call is rate limited, which also pauses every caller.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float = 0.1,
+        max_rate: Optional[float] = None,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+    ):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.increase = increase
+        self.decrease = decrease
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.pause(retry_after if retry_after is not None else 1 / self.rate)
@@ -0,0 +1,156 @@
+"""
+Token-budgeted assembly of prompt context.
+
+Sections are added in priority order and serialized as compact one-line
+entries. Entries are included until ``CONTEXT_TOKEN_BUDGET`` would be
+exceeded; the rest of that section and any lower-priority sections are
+summarized as omitted. Long free-text fields are truncated to
+``CONTEXT_FIELD_MAX_CHARS`` first, so one verbose ticket can't crowd out
+everything else.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_FIELD_MAX_CHARS = int(os.getenv("CONTEXT_FIELD_MAX_CHARS", "400"))
+CONTEXT_ENCODING = os.getenv("CONTEXT_ENCODING", "cl100k_base")
+
+# Rough characters-per-token ratio used when the tokenizer isn't available
+CHARS_PER_TOKEN = 4
+
+
+class PromptContext(str):
+    """Context text that also records its token usage.
+
+    It is a plain ``str`` for every existing caller; ``tokens`` is the size of
+    the text, ``budget`` the limit it was built under and ``omitted`` the
+    number of entries left out to stay within it.
+    """
+
+    tokens: int
+    budget: int
+    omitted: int
+
+    def __new__(cls, text: str, tokens: int, budget: int, omitted: int = 0):
+        context = super().__new__(cls, text)
+        context.tokens = tokens
+        context.budget = budget
+        context.omitted = omitted
+        return context
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(CONTEXT_ENCODING)
+    except Exception as e:
+        print(f"Tokenizer unavailable, estimating context tokens: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in ``text`` (estimated if tiktoken can't load)"""
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate(text: Any, max_chars: int = CONTEXT_FIELD_MAX_CHARS) -> str:
+    """Collapse whitespace and cut ``text`` to ``max_chars`` characters"""
+    text = " ".join(str(text).split())
+    if len(text) <= max_chars:
+        return text
+    return text[: max_chars - 1].rstrip() + "…"
+
+
+def compact(value: Any, max_chars: int = CONTEXT_FIELD_MAX_CHARS) -> str:
+    """Serialize a value on one line, JSON for dicts and lists"""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return truncate(value, max_chars)
+
+
+def format_date(value: Any) -> str:
+    """The ``YYYY-MM-DD`` part of a datetime or ISO timestamp"""
+    return str(value)[:10] if value else "unknown date"
+
+
+class ContextBuilder:
+    """Collect header lines and ranked sections, then render within a budget.
+
+    Header lines are always included. Sections are rendered in the order they
+    were added, so add the most important first.
+    """
+
+    def __init__(
+        self,
+        budget: int = CONTEXT_TOKEN_BUDGET,
+        max_field_chars: int = CONTEXT_FIELD_MAX_CHARS,
+    ):
+        self.budget = budget
+        self.max_field_chars = max_field_chars
+        self._header: List[str] = []
+        self._sections: List[tuple] = []
+
+    def header(self, line: str) -> "ContextBuilder":
+        self._header.append(line)
+        return self
+
+    def section(
+        self, title: str, entries: Iterable[str], empty: Optional[str] = None
+    ) -> "ContextBuilder":
+        """Add a section of one-line entries; ``empty`` is shown if it has none"""
+        self._sections.append((title, list(entries), empty))
+        return self
+
+    def field(self, value: Any) -> str:
+        """Compact a field value using this builder's truncation limit"""
+        return compact(value, self.max_field_chars)
+
+    def build(self) -> PromptContext:
+        lines = list(self._header)
+        used = count_tokens("\n".join(lines)) if lines else 0
+        omitted = 0
+
+        for title, entries, empty in self._sections:
+            if omitted:
+                omitted += len(entries)
+                continue
+
+            heading = f"{title}:"
+            if not entries:
+                if empty:
+                    line = f"{heading} {empty}"
+                    cost = count_tokens("\n" + line)
+                    if used + cost <= self.budget:
+                        lines.append(line)
+                        used += cost
+                continue
+
+            cost = count_tokens("\n" + heading)
+            if used + cost > self.budget:
+                omitted += len(entries)
+                continue
+            lines.append(heading)
+            used += cost
+
+            for index, entry in enumerate(entries):
+                line = f"- {entry}"
+                cost = count_tokens("\n" + line)
+                if used + cost > self.budget:
+                    omitted += len(entries) - index
+                    break
+                lines.append(line)
+                used += cost
+
+        if omitted:
+            lines.append(f"({omitted} more entries omitted)")
+
+        text = "\n".join(lines)
+        return PromptContext(text, count_tokens(text), self.budget, omitted)
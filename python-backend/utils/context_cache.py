@@ -0,0 +1,226 @@
+"""
+Versioned cache of the rows behind each customer's prompt context.
+
+The outreach agent builds a customer's context from three queries (user,
+latest tickets, latest interactions). Those rows are cached per customer so
+repeat outreach to the same customer skips the queries entirely.
+
+Writes made by this service go through the cache: a new interaction or a
+ticket update patches the cached rows in place, and anything else calls
+``invalidate``. Every write bumps the customer's version, and a load only
+stores its rows under the version it started with, so a fetch that raced a
+write can never put stale rows back. ``CUSTOMER_CONTEXT_CACHE_TTL`` bounds
+how long changes made outside this service (e.g. in the dashboard) take to
+show up; set it to 0 to disable the cache.
+
+``CUSTOMER_CONTEXT_CACHE_BACKEND`` is ``memory`` (per process) or ``redis``
+(shared between workers, ``REDIS_URL``). The ``redis`` package is not in
+requirements.txt; install it (``pip install redis``) to use that backend.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import TTLCache
+
+CUSTOMER_CONTEXT_CACHE_BACKEND = os.getenv("CUSTOMER_CONTEXT_CACHE_BACKEND", "memory")
+CUSTOMER_CONTEXT_CACHE_TTL = float(os.getenv("CUSTOMER_CONTEXT_CACHE_TTL", "300"))
+CUSTOMER_CONTEXT_CACHE_SIZE = int(os.getenv("CUSTOMER_CONTEXT_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# {"user": {...}, "tickets": [...], "interactions": [...]}, newest rows first
+ContextRows = Dict[str, Any]
+
+
+class MemoryContextStore:
+    """In-process store of versioned context rows.
+
+    Entries and versions are both bounded by ``max_size``. Like the Redis
+    store, versions are kept ten times longer than entries so an expired
+    version can't be reused by a slow load.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CUSTOMER_CONTEXT_CACHE_SIZE,
+        ttl: float = CUSTOMER_CONTEXT_CACHE_TTL,
+    ):
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+        self._versions = TTLCache(max_size=max_size, ttl=ttl * 10)
+
+    async def get(self, customer_id: str) -> Tuple[int, Optional[tuple]]:
+        return self._versions.get(customer_id, 0), self._entries.get(customer_id)
+
+    async def set(self, customer_id: str, version: int, rows: ContextRows):
+        self._entries.set(customer_id, (version, rows))
+
+    async def bump(self, customer_id: str) -> int:
+        self._entries.pop(customer_id)
+        version = self._versions.get(customer_id, 0) + 1
+        self._versions.set(customer_id, version)
+        return version
+
+
+class RedisContextStore:
+    """Redis-backed store shared by every worker.
+
+    Each customer has a version counter and a JSON entry. Entries expire
+    after the TTL; versions are kept longer so an expired version can't be
+    reused by a slow load.
+    """
+
+    def __init__(
+        self,
+        url: str = REDIS_URL,
+        ttl: float = CUSTOMER_CONTEXT_CACHE_TTL,
+        prefix: str = "customer_context",
+    ):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "CUSTOMER_CONTEXT_CACHE_BACKEND=redis needs the redis package; "
+                "install it with 'pip install redis' or use the memory backend"
+            ) from e
+
+        self._redis = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _keys(self, customer_id: str) -> Tuple[str, str]:
+        return (
+            f"{self.prefix}:version:{customer_id}",
+            f"{self.prefix}:entry:{customer_id}",
+        )
+
+    async def get(self, customer_id: str) -> Tuple[int, Optional[tuple]]:
+        version, entry = await self._redis.mget(*self._keys(customer_id))
+        if entry is not None:
+            entry = json.loads(entry)
+            entry = (entry["version"], entry["rows"])
+        return int(version or 0), entry
+
+    async def set(self, customer_id: str, version: int, rows: ContextRows):
+        if self.ttl <= 0:
+            return
+        _, entry_key = self._keys(customer_id)
+        await self._redis.set(
+            entry_key,
+            json.dumps({"version": version, "rows": rows}, default=str),
+            ex=max(1, int(self.ttl)),
+        )
+
+    async def bump(self, customer_id: str) -> int:
+        version_key, entry_key = self._keys(customer_id)
+        pipe = self._redis.pipeline()
+        pipe.incr(version_key)
+        pipe.expire(version_key, max(1, int(self.ttl)) * 10)
+        pipe.delete(entry_key)
+        version, _, _ = await pipe.execute()
+        return int(version)
+
+
+class CustomerContextCache:
+    """Customer context rows keyed by customer ID, with write-through updates.
+
+    ``lookup`` returns the customer's current version and their rows if a
+    cached entry matches it. Pass that version back to ``store`` once the
+    rows have been loaded; if a write happened meanwhile they are dropped.
+    """
+
+    def __init__(self, backend: Any):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.patches = 0
+        self.invalidations = 0
+
+    async def lookup(self, customer_id: str) -> Tuple[int, Optional[ContextRows]]:
+        version, entry = await self.backend.get(customer_id)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return version, entry[1]
+        self.misses += 1
+        return version, None
+
+    async def store(self, customer_id: str, version: int, rows: ContextRows):
+        current, _ = await self.backend.get(customer_id)
+        if current == version:
+            await self.backend.set(customer_id, version, rows)
+
+    async def invalidate(self, customer_id: Optional[str]):
+        """Drop a customer's rows after a write that can't be patched"""
+        if not customer_id:
+            return
+        self.invalidations += 1
+        await self.backend.bump(customer_id)
+
+    async def add_interactions(
+        self, customer_id: Optional[str], interactions: List[Dict], limit: int
+    ):
+        """Prepend newly inserted interactions, keeping the latest ``limit``"""
+
+        def patch(rows: ContextRows) -> ContextRows:
+            latest = list(interactions) + list(rows.get("interactions") or [])
+            return {**rows, "interactions": latest[:limit]}
+
+        await self._patch(customer_id, patch)
+
+    async def update_ticket(
+        self, customer_id: Optional[str], ticket_id: str, values: Dict
+    ):
+        """Apply a ticket update to the cached ticket, if it is one of them"""
+
+        def patch(rows: ContextRows) -> ContextRows:
+            tickets = [
+                {**ticket, **values} if ticket.get("id") == ticket_id else ticket
+                for ticket in rows.get("tickets") or []
+            ]
+            return {**rows, "tickets": tickets}
+
+        await self._patch(customer_id, patch)
+
+    async def _patch(
+        self, customer_id: Optional[str], patch: Callable[[ContextRows], ContextRows]
+    ):
+        if not customer_id:
+            return
+        current, entry = await self.backend.get(customer_id)
+        version = await self.backend.bump(customer_id)
+        # Only patch rows that were current, and only if no other write
+        # bumped the version in between
+        if entry is not None and entry[0] == current == version - 1:
+            self.patches += 1
+            await self.backend.set(customer_id, version, patch(entry[1]))
+        else:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "patches": self.patches,
+            "invalidations": self.invalidations,
+        }
+
+
+_cache: Optional[CustomerContextCache] = None
+
+
+def get_customer_context_cache() -> CustomerContextCache:
+    """Return the shared cache for CUSTOMER_CONTEXT_CACHE_BACKEND"""
+    global _cache
+    if _cache is None:
+        backend = CUSTOMER_CONTEXT_CACHE_BACKEND.lower()
+        if backend == "memory":
+            store = MemoryContextStore()
+        elif backend == "redis":
+            store = RedisContextStore()
+        else:
+            raise ValueError(
+                f"Unknown CUSTOMER_CONTEXT_CACHE_BACKEND '{backend}'. "
+                "Use 'memory' or 'redis'"
+            )
+        _cache = CustomerContextCache(store)
+    return _cache
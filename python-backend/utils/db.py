@@ -1,4 +1,8 @@
 from supabase import create_client, Client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import functools
 import os
 from dotenv import load_dotenv
 
@@ -9,15 +13,61 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError(
-        "Missing Supabase credentials. Please ensure SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are set in your .env file"
+# Size of the thread pool that runs blocking Supabase calls off the event loop
+SUPABASE_MAX_WORKERS = int(os.getenv("SUPABASE_MAX_WORKERS", "16"))
+
+_client: Optional[Client] = None
+
+
+def get_supabase() -> Client:
+    """Return the shared Supabase client, creating it on first use"""
+    global _client
+    if _client is not None:
+        return _client
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError(
+            "Missing Supabase credentials. Please ensure SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are set in your .env file"
+        )
+
+    try:
+        # Create a single Supabase client instance
+        _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        print("✓ Successfully connected to Supabase")
+    except Exception as e:
+        print(f"Error connecting to Supabase: {str(e)}")
+        raise
+    return _client
+
+
+def set_supabase(client: Optional[Client]):
+    """Replace the shared client (e.g. with a local stand-in in tests)"""
+    global _client
+    _client = client
+
+
+def __getattr__(name: str):
+    # Keep `from utils.db import supabase` working without connecting at import
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# The Supabase client is synchronous, so every call is offloaded to this
+# bounded executor instead of blocking the event loop for the round trip
+executor = ThreadPoolExecutor(
+    max_workers=SUPABASE_MAX_WORKERS, thread_name_prefix="supabase"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking Supabase call in the database thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(func, *args, **kwargs)
     )
 
-try:
-    # Create a single Supabase client instance
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print("✓ Successfully connected to Supabase")
-except Exception as e:
-    print(f"Error connecting to Supabase: {str(e)}")
-    raise
+
+async def execute(query):
+    """Execute a PostgREST query builder without blocking the event loop"""
+    return await run_blocking(query.execute)
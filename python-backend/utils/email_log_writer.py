@@ -0,0 +1,85 @@
+"""
+Buffered writer that turns many email_logs inserts into a few multi-row
+inserts.
+"""
+
+import os
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from . import repositories
+
+EMAIL_LOG_BATCH_SIZE = int(os.getenv("EMAIL_LOG_BATCH_SIZE", "500"))
+EMAIL_LOG_FLUSH_SECONDS = float(os.getenv("EMAIL_LOG_FLUSH_SECONDS", "2"))
+
+
+class EmailLogWriter:
+    """Buffer email_logs rows and flush them as multi-row inserts.
+
+    Rows are added under a caller-chosen key (e.g. the draft's position in the
+    batch). A flush happens when ``max_rows`` rows are buffered, when the
+    oldest buffered row is older than ``max_delay`` seconds, or explicitly via
+    ``flush``/leaving the ``async with`` block. The created IDs are collected
+    in ``ids`` and any per-row failure in ``errors``, both keyed the same way.
+
+    If a multi-row insert fails, the rows of that flush are retried one by one
+    so a single bad row only loses itself.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = EMAIL_LOG_BATCH_SIZE,
+        max_delay: float = EMAIL_LOG_FLUSH_SECONDS,
+    ):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.ids: Dict[Hashable, Optional[str]] = {}
+        self.errors: Dict[Hashable, str] = {}
+        self._buffer: List[Tuple[Hashable, Dict[str, Any]]] = []
+        self._first_buffered_at: Optional[float] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.flush()
+
+    async def add(self, key: Hashable, row: Dict[str, Any]):
+        """Buffer a row, flushing if a size or time threshold is reached"""
+        if not self._buffer:
+            self._first_buffered_at = time.monotonic()
+        self._buffer.append((key, row))
+
+        if (
+            len(self._buffer) >= self.max_rows
+            or time.monotonic() - self._first_buffered_at >= self.max_delay
+        ):
+            await self.flush()
+
+    async def flush(self) -> Dict[Hashable, Optional[str]]:
+        """Write every buffered row and return the IDs created by this flush"""
+        if not self._buffer:
+            return {}
+
+        pending, self._buffer = self._buffer, []
+        self._first_buffered_at = None
+        flushed: Dict[Hashable, Optional[str]] = {}
+
+        try:
+            created = await repositories.insert_email_logs([row for _, row in pending])
+            # PostgREST returns inserted rows in the order they were sent
+            for index, (key, _) in enumerate(pending):
+                flushed[key] = created[index]["id"] if index < len(created) else None
+        except Exception as e:
+            print(f"Bulk email log insert failed, retrying row by row: {str(e)}")
+            for key, row in pending:
+                try:
+                    created = await repositories.insert_email_log(row)
+                    flushed[key] = created[0]["id"] if created else None
+                except Exception as row_error:
+                    print(f"Failed to log email for {key}: {str(row_error)}")
+                    flushed[key] = None
+                    self.errors[key] = str(row_error)
+
+        self.ids.update(flushed)
+        return flushed
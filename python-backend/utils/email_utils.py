@@ -1,11 +1,13 @@
 import os
-import base64
+import json
 import aiohttp
 from datetime import datetime
 from fastapi import HTTPException
-from typing import Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from .db import supabase
+from . import repositories
+from .mail_transport import MailTransport, SendResult
+from .metrics import stage, timed
 
 # Load environment variables
 load_dotenv()
@@ -24,12 +26,11 @@ DEFAULT_FRONTEND_URL = (
 )
 FRONTEND_URL = os.getenv("FRONTEND_URL", DEFAULT_FRONTEND_URL)
 
-if not MAILGUN_API_KEY:
-    raise ValueError(
-        "Missing Mailgun API key. Please ensure MAILGUN_API_KEY is set in your .env file"
-    )
+# Shared pooled transport, started and closed by the FastAPI lifespan
+mail_transport = MailTransport(api_key=MAILGUN_API_KEY, domain=MAILGUN_DOMAIN)
 
 
+@timed("send_email")
 async def send_email(
     to: str,
     subject: str,
@@ -40,8 +41,92 @@ async def send_email(
     if not MAILGUN_API_KEY:
         raise HTTPException(status_code=500, detail="Mailgun API key not configured")
 
+    # Prepare form data
+    data = build_message(to, subject, body, ticket_id)
+
+    try:
+        with stage("send_email", "mailgun"):
+            response = await mail_transport.post_message(data)
+
+        if not response.ok:
+            print(f"Mailgun API error: {response.status} - {response.text}")
+            if response.status == 401:
+                raise HTTPException(
+                    status_code=401,
+                    detail="Email service authentication failed",
+                )
+            elif response.status == 429:
+                raise HTTPException(status_code=429, detail="Email rate limit exceeded")
+            else:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to send email: {response.text}",
+                )
+
+        # Log email in the database only if ticket_id is provided
+        if ticket_id:
+            try:
+                email_log = {
+                    "ticket_id": ticket_id,
+                    "recipient_email": to,
+                    "sent_at": datetime.utcnow().isoformat(),
+                    "status": "SENT",
+                    "source": "AI",
+                }
+                with stage("send_email", "db_write"):
+                    await repositories.insert_email_log(email_log)
+            except Exception as e:
+                print(f"Failed to log email: {e}")
+
+        return json.loads(response.text)
+
+    except aiohttp.ClientError as e:
+        print(f"Email sending failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to send email")
+
+
+async def send_bulk_emails(
+    messages: List[Dict[str, str]], **options
+) -> List[SendResult]:
+    """Send many emails through the pooled transport.
+
+    Each message is a dict with ``to``, ``subject``, ``body`` and an optional
+    ``ticket_id``. Returns one ``SendResult`` per message, in input order;
+    ``options`` are passed through to ``MailTransport.send_bulk``.
+    """
+    if not MAILGUN_API_KEY:
+        raise HTTPException(status_code=500, detail="Mailgun API key not configured")
+
+    return await mail_transport.send_bulk(
+        [
+            build_message(
+                message["to"],
+                message["subject"],
+                message["body"],
+                message.get("ticket_id"),
+            )
+            for message in messages
+        ],
+        **options,
+    )
+
+
+def build_message(
+    to: str, subject: str, body: str, ticket_id: Optional[str] = None
+) -> Dict[str, str]:
+    """Build the Mailgun form data for a single email"""
+    return {
+        "from": SENDER_EMAIL,
+        "to": to,
+        "subject": subject,
+        "html": build_email_html(body, ticket_id),
+    }
+
+
+def build_email_html(body: str, ticket_id: Optional[str] = None) -> str:
+    """Wrap the email body in the TicketAI HTML template"""
     # Create HTML email template with better styling and conditional ticket link
-    email_body = f"""
+    return f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -110,58 +195,6 @@ async def send_email(
     </html>
     """
 
-    # Prepare authentication
-    auth = base64.b64encode(f"api:{MAILGUN_API_KEY}".encode()).decode()
-
-    # Prepare form data
-    data = {"from": SENDER_EMAIL, "to": to, "subject": subject, "html": email_body}
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages",
-                headers={"Authorization": f"Basic {auth}"},
-                data=data,
-            ) as response:
-                response_text = await response.text()
-
-                if not response.ok:
-                    print(f"Mailgun API error: {response.status} - {response_text}")
-                    if response.status == 401:
-                        raise HTTPException(
-                            status_code=401,
-                            detail="Email service authentication failed",
-                        )
-                    elif response.status == 429:
-                        raise HTTPException(
-                            status_code=429, detail="Email rate limit exceeded"
-                        )
-                    else:
-                        raise HTTPException(
-                            status_code=500,
-                            detail=f"Failed to send email: {response_text}",
-                        )
-
-                # Log email in the database only if ticket_id is provided
-                if ticket_id:
-                    try:
-                        email_log = {
-                            "ticket_id": ticket_id,
-                            "recipient_email": to,
-                            "sent_at": datetime.utcnow().isoformat(),
-                            "status": "SENT",
-                            "source": "AI",
-                        }
-                        supabase.table("email_logs").insert(email_log).execute()
-                    except Exception as e:
-                        print(f"Failed to log email: {e}")
-
-                return await response.json()
-
-        except aiohttp.ClientError as e:
-            print(f"Email sending failed: {e}")
-            raise HTTPException(status_code=500, detail="Failed to send email")
-
 
 def generate_action_button(ticket_id: Optional[str] = None) -> str:
     """Generate the appropriate action button based on whether a ticket_id is provided"""
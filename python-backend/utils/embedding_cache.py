@@ -0,0 +1,127 @@
+"""
+Content-hash keyed cache in front of a LangChain embeddings model.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from .cache import TTLCache
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+
+
+class DiskEmbeddingStore:
+    """SQLite-backed store of embeddings keyed by content hash"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                keys,
+            ).fetchall()
+        return {key: array("f", blob).tolist() for key, blob in rows}
+
+    def set_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that never embeds the same text twice.
+
+    Vectors are cached in memory (LRU) and, when ``disk_path`` is set, in a
+    SQLite file that survives restarts. Keys are a SHA-256 of the model name
+    and the text. Queries and documents share one cache because the OpenAI
+    embedding models return the same vector for both.
+
+    ``embed_documents`` sends all cache misses to the wrapped model in a
+    single batched call.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_size: int = EMBEDDING_CACHE_SIZE,
+        disk_path: Optional[str] = EMBEDDING_CACHE_PATH,
+    ):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+        self.memory = TTLCache(max_size=max_size, ttl=float("inf"))
+        self.disk = DiskEmbeddingStore(disk_path) if disk_path else None
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode()).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+
+        for key in keys:
+            vector = self.memory.get(key)
+            if vector is not None:
+                vectors[key] = vector
+
+        if self.disk:
+            missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+            for key, vector in self.disk.get_many(missing).items():
+                self.memory.set(key, vector)
+                vectors[key] = vector
+
+        # Embed every distinct cache miss in one batched call
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in pending:
+                pending[key] = text
+
+        self.hits += len(texts) - len(pending)
+        self.misses += len(pending)
+
+        if pending:
+            embedded = self.embeddings.embed_documents(list(pending.values()))
+            new_vectors = dict(zip(pending.keys(), embedded))
+            for key, vector in new_vectors.items():
+                self.memory.set(key, vector)
+            if self.disk:
+                self.disk.set_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self.memory.get(key)
+        if vector is not None:
+            self.hits += 1
+            return vector
+        return self.embed_documents([text])[0]
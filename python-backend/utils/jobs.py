@@ -0,0 +1,86 @@
+"""
+In-process queue for background jobs.
+
+Jobs are identified by an ID whose state lives elsewhere (e.g. an outreach
+session row), so the queue only has to deliver IDs to a handler. A job that
+is already queued or running is not enqueued twice.
+"""
+
+import asyncio
+import os
+from typing import Awaitable, Callable, List, Optional, Set
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+
+class LocalJobQueue:
+    """Deliver job IDs to ``handler`` from asyncio worker tasks.
+
+    Workers are started on first use in the running event loop. Handler
+    errors are logged and don't stop the worker.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], Awaitable[None]],
+        workers: int = JOB_WORKERS,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._active: Set[str] = set()
+
+    async def start(self):
+        """Start the worker tasks in the running loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._active.clear()
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(max(1, self.workers))
+        ]
+
+    async def enqueue(self, job_id: str) -> bool:
+        """Queue a job. Returns False if it is already queued or running."""
+        await self.start()
+        if job_id in self._active:
+            return False
+        self._active.add(job_id)
+        await self._queue.put(job_id)
+        return True
+
+    def is_active(self, job_id: str) -> bool:
+        return job_id in self._active
+
+    @property
+    def active_jobs(self) -> int:
+        """Number of jobs queued or running"""
+        return len(self._active)
+
+    async def join(self):
+        """Wait until every queued job has been handled"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Cancel the workers. Unfinished jobs are resumed from their state."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.handler(job_id)
+            except Exception as e:
+                print(f"Error running job {job_id}: {str(e)}")
+            finally:
+                self._active.discard(job_id)
+                self._queue.task_done()
@@ -0,0 +1,329 @@
+"""
+Exact-match completion cache for the agents' chat models.
+
+``cached_chat_model(model)`` wraps a chat model so identical calls are served
+from a cache instead of the API. The key is a SHA-256 of the model's
+parameters (model name, temperature, ...), the stop words and the rendered
+message list, so any change to the prompt is a miss.
+
+``LLM_CACHE_MODE`` selects the behaviour:
+
+- ``cache``: serve hits, call the model and store on a miss.
+- ``record``: always call the model and store the result (overwriting).
+- ``replay``: only serve stored results; a miss raises ``CacheMissError``.
+  Use with the SQLite backend to run evaluations and benchmarks offline.
+- ``off`` (default): don't wrap the model. The agents sample at
+  temperature 0.7, so caching changes what users see; turn it on
+  explicitly for tests, benchmarks and evaluations.
+
+``LLM_CACHE_BACKEND`` is ``memory`` (LRU) or ``sqlite`` (``LLM_CACHE_PATH``).
+Both evict entries older than ``LLM_CACHE_TTL`` seconds, except in replay
+mode, and keep at most ``LLM_CACHE_SIZE`` entries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessageChunk,
+    BaseMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .cache import TTLCache
+
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+
+MODES = ("cache", "record", "replay", "off")
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a call has no recorded completion"""
+
+
+class MemoryCompletionStore:
+    """In-process LRU store of completions"""
+
+    def __init__(self, max_size: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str):
+        self._cache.set(key, value)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class SQLiteCompletionStore:
+    """SQLite-backed store of completions that survives restarts.
+
+    Expired rows are ignored on read. When more than ``max_size`` rows are
+    stored, the least recently used ones are deleted.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_size: int = LLM_CACHE_SIZE,
+        ttl: float = LLM_CACHE_TTL,
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, value TEXT, created_at REAL, used_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS completions_used_at ON completions (used_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if not ignore_ttl and now - created_at > self.ttl:
+                return None
+            self._conn.execute(
+                "UPDATE completions SET used_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return value
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                "SELECT key FROM completions ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedChatModel(BaseChatModel):
+    """Chat model that serves repeated calls from a completion store.
+
+    It delegates to ``model`` on a miss and keeps the wrapped model's
+    callbacks and tags, so chains built on it trace the same way. Streaming
+    is passed through on a miss; a hit is streamed as a single chunk.
+    """
+
+    model: BaseChatModel
+    store: Any
+    mode: str = "cache"
+    hits: int = 0
+    misses: int = 0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cached-{self.model._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.model._identifying_params
+
+    def cache_key(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs
+    ) -> str:
+        params = self.model._get_invocation_params(stop=stop, **kwargs)
+        payload = json.dumps(
+            {
+                "model": params.get("model_name") or params.get("model"),
+                "temperature": params.get("temperature"),
+                "params": params,
+                "messages": [message_to_dict(message) for message in messages],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[ChatResult]:
+        if self.mode == "record":
+            return None
+        value = self.store.get(key, ignore_ttl=self.mode == "replay")
+        if value is None:
+            self.misses += 1
+            if self.mode == "replay":
+                raise CacheMissError(f"No recorded completion for cache key {key}")
+            return None
+        self.hits += 1
+        return _result_from_json(value)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self.cache_key(messages, stop, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        result = self.model._generate(messages, stop=stop, **kwargs)
+        self.store.set(key, _result_to_json(result))
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self.cache_key(messages, stop, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        result = await self.model._agenerate(messages, stop=stop, **kwargs)
+        self.store.set(key, _result_to_json(result))
+        return result
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        key = self.cache_key(messages, stop, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield _single_chunk(cached)
+            return
+        generation = None
+        for chunk in self.model._stream(messages, stop=stop, **kwargs):
+            generation = chunk if generation is None else generation + chunk
+            yield chunk
+        if generation is not None:
+            self.store.set(key, _result_to_json(ChatResult(generations=[generation])))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        key = self.cache_key(messages, stop, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield _single_chunk(cached)
+            return
+        generation = None
+        async for chunk in self.model._astream(messages, stop=stop, **kwargs):
+            generation = chunk if generation is None else generation + chunk
+            yield chunk
+        if generation is not None:
+            self.store.set(key, _result_to_json(ChatResult(generations=[generation])))
+
+
+def _result_to_json(result: ChatResult) -> str:
+    return json.dumps(
+        [
+            {
+                "message": message_to_dict(generation.message),
+                "generation_info": generation.generation_info,
+            }
+            for generation in result.generations
+        ],
+        default=str,
+    )
+
+
+def _result_from_json(value: str) -> ChatResult:
+    generations = []
+    for entry in json.loads(value):
+        (message,) = messages_from_dict([entry["message"]])
+        generations.append(
+            ChatGeneration(message=message, generation_info=entry["generation_info"])
+        )
+    return ChatResult(generations=generations)
+
+
+def _single_chunk(result: ChatResult) -> ChatGenerationChunk:
+    message = result.generations[0].message
+    return ChatGenerationChunk(message=AIMessageChunk(content=message.content))
+
+
+_store = None
+
+
+def get_completion_store():
+    """Return the shared completion store for LLM_CACHE_BACKEND"""
+    global _store
+    if _store is None:
+        backend = LLM_CACHE_BACKEND.lower()
+        if backend == "memory":
+            _store = MemoryCompletionStore()
+        elif backend == "sqlite":
+            _store = SQLiteCompletionStore()
+        else:
+            raise ValueError(
+                f"Unknown LLM_CACHE_BACKEND '{backend}'. Use 'memory' or 'sqlite'"
+            )
+    return _store
+
+
+def cached_chat_model(
+    model: BaseChatModel, mode: Optional[str] = None, store: Any = None
+) -> BaseChatModel:
+    """Wrap ``model`` with the completion cache unless the cache is off"""
+    mode = (mode or LLM_CACHE_MODE).lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM_CACHE_MODE '{mode}'. Use one of {MODES}")
+    if mode == "off":
+        return model
+    return CachedChatModel(
+        model=model,
+        store=store or get_completion_store(),
+        mode=mode,
+        callbacks=model.callbacks,
+        tags=model.tags,
+    )
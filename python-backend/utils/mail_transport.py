@@ -0,0 +1,169 @@
+"""
+Long-lived Mailgun HTTP transport with connection pooling and a bulk
+sending pipeline (bounded concurrency, token-bucket rate limiting and
+429 backoff).
+"""
+
+import asyncio
+import base64
+import json
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from .concurrency import TokenBucket, run_bounded
+
+MAILGUN_API_URL = os.getenv("MAILGUN_API_URL", "https://api.mailgun.net/v3")
+MAILGUN_MAX_CONNECTIONS = int(os.getenv("MAILGUN_MAX_CONNECTIONS", "20"))
+MAILGUN_KEEPALIVE_SECONDS = float(os.getenv("MAILGUN_KEEPALIVE_SECONDS", "30"))
+MAILGUN_SEND_CONCURRENCY = int(os.getenv("MAILGUN_SEND_CONCURRENCY", "10"))
+MAILGUN_RATE_PER_SECOND = float(os.getenv("MAILGUN_RATE_PER_SECOND", "10"))
+MAILGUN_MAX_RETRIES = int(os.getenv("MAILGUN_MAX_RETRIES", "3"))
+MAILGUN_BACKOFF_SECONDS = float(os.getenv("MAILGUN_BACKOFF_SECONDS", "1"))
+
+
+@dataclass
+class MailResponse:
+    """Raw result of a single Mailgun API call"""
+
+    status: int
+    text: str
+    retry_after: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+@dataclass
+class SendResult:
+    """Per-recipient outcome of a bulk send"""
+
+    to: str
+    success: bool
+    status: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    response: Dict[str, Any] = field(default_factory=dict)
+
+
+class MailTransport:
+    """Pooled, keep-alive HTTP session to the Mailgun messages API.
+
+    One instance lives for the whole application (started and closed by the
+    FastAPI lifespan). If it is used without being started, the session is
+    created lazily on first use.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        domain: str,
+        base_url: str = MAILGUN_API_URL,
+        max_connections: int = MAILGUN_MAX_CONNECTIONS,
+        keepalive_timeout: float = MAILGUN_KEEPALIVE_SECONDS,
+    ):
+        self.api_key = api_key
+        self.domain = domain
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def messages_url(self) -> str:
+        return f"{self.base_url}/{self.domain}/messages"
+
+    async def start(self):
+        """Open the pooled session if it isn't open for the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._session and not self._session.closed and self._loop is loop:
+            return
+        auth = base64.b64encode(f"api:{self.api_key}".encode()).decode()
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+            ),
+            headers={"Authorization": f"Basic {auth}"},
+        )
+        self._loop = loop
+
+    async def close(self):
+        """Close the pooled session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    async def post_message(self, data: Dict[str, str]) -> MailResponse:
+        """Send one message over the shared session"""
+        await self.start()
+        async with self._session.post(self.messages_url, data=data) as response:
+            text = await response.text()
+            retry_after = response.headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            return MailResponse(
+                status=response.status, text=text, retry_after=retry_after
+            )
+
+    async def send_bulk(
+        self,
+        messages: List[Dict[str, str]],
+        concurrency: int = MAILGUN_SEND_CONCURRENCY,
+        rate_per_second: float = MAILGUN_RATE_PER_SECOND,
+        max_retries: int = MAILGUN_MAX_RETRIES,
+        backoff_seconds: float = MAILGUN_BACKOFF_SECONDS,
+    ) -> List[SendResult]:
+        """Send many messages with bounded concurrency and rate limiting.
+
+        A 429 pauses the whole pipeline for the server's ``Retry-After`` (or an
+        exponential backoff) before the message is retried. Results are
+        returned in input order, one per message.
+        """
+        bucket = TokenBucket(rate_per_second)
+
+        async def send_one(message: Dict[str, str]) -> SendResult:
+            result = SendResult(to=message.get("to", ""), success=False)
+            while True:
+                await bucket.acquire()
+                result.attempts += 1
+                response = await self.post_message(message)
+                result.status = response.status
+
+                if response.ok:
+                    result.success = True
+                    result.response = _parse_json(response.text)
+                    return result
+
+                if response.status == 429 and result.attempts <= max_retries:
+                    delay = response.retry_after or backoff_seconds * (
+                        2 ** (result.attempts - 1)
+                    )
+                    bucket.pause(delay + random.uniform(0, delay * 0.1))
+                    continue
+
+                result.error = f"{response.status} - {response.text}"
+                return result
+
+        def on_error(message: Dict[str, str], e: Exception) -> SendResult:
+            return SendResult(to=message.get("to", ""), success=False, error=str(e))
+
+        return await run_bounded(
+            messages, send_one, concurrency=concurrency, on_error=on_error
+        )
+
+
+def _parse_json(text: str) -> Dict[str, Any]:
+    """Parse a JSON response body, tolerating empty or non-JSON bodies"""
+    try:
+        return json.loads(text) if text else {}
+    except ValueError:
+        return {"message": text}
@@ -0,0 +1,327 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and fixed-bucket histograms are kept in memory and
+rendered by ``registry.render()`` for the ``/metrics`` endpoint. Recording a
+sample is a dict lookup and an add under an uncontended lock, so it is safe
+to call on every request.
+
+The shared histograms time the agents' operations and each of their
+stages::
+
+    @timed("generate_outreach")
+    async def generate_outreach(self, ...):
+        with stage("generate_outreach", "context"):
+            context = await self.get_customer_context(customer_id)
+"""
+
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; wide enough for an LLM call at the top end
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(v))}"' for name, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._functions: Dict[LabelKey, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """Read the value from ``function`` at render time"""
+        self._functions[self._key(labels)] = function
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            samples = [(self.name, key, value) for key, value in self._values.items()]
+        for key, function in self._functions.items():
+            try:
+                samples.append((self.name, key, float(function())))
+            except Exception as e:
+                print(f"Error reading metric {self.name}: {str(e)}")
+        return samples
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for name, key, value in self.samples():
+            labels = _format_labels(self.labelnames, key)
+            yield f"{name}{labels} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. requests handled"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, e.g. jobs in progress"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets, e.g. latencies"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., count above the last bucket]
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def time(self, **labels) -> "Timer":
+        """Context manager that observes the seconds spent inside it"""
+        return Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        samples = []
+        with self._lock:
+            snapshot = [
+                (key, list(counts), self._sums[key])
+                for key, counts in self._counts.items()
+            ]
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(
+                    (f"{self.name}_bucket", key + (_format_value(bound),), cumulative)
+                )
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, cumulative))
+        return samples
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for name, key, value in self.samples():
+            names = self.labelnames
+            if name.endswith("_bucket"):
+                names = names + ("le",)
+            yield f"{name}{_format_labels(names, key)} {_format_value(value)}"
+
+
+class Timer:
+    """Observe the duration of a ``with`` block on a histogram"""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    """The metrics rendered at /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+operation_seconds = registry.histogram(
+    "backend_operation_duration_seconds",
+    "Duration of agent operations",
+    ["operation", "outcome"],
+)
+operations_total = registry.counter(
+    "backend_operations_total", "Agent operations by outcome", ["operation", "outcome"]
+)
+stage_seconds = registry.histogram(
+    "backend_stage_duration_seconds",
+    "Duration of each stage of an agent operation",
+    ["operation", "stage"],
+)
+
+
+def stage(operation: str, name: str) -> Timer:
+    """Time one stage of an operation, e.g. ``stage("resolve_ticket", "db_write")``"""
+    return stage_seconds.time(operation=operation, stage=name)
+
+
+class OperationTimer:
+    """Time a whole operation and count it by outcome.
+
+    The outcome is ``error`` if the block raises or ``fail()`` was called
+    (for code that returns errors instead of raising), ``success`` otherwise.
+    """
+
+    __slots__ = ("operation", "outcome", "start")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.outcome = "success"
+        self.start = 0.0
+
+    def fail(self):
+        self.outcome = "error"
+
+    def __enter__(self) -> "OperationTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.outcome = "error"
+        operation_seconds.observe(
+            time.perf_counter() - self.start,
+            operation=self.operation,
+            outcome=self.outcome,
+        )
+        operations_total.inc(operation=self.operation, outcome=self.outcome)
+
+
+def track(operation: str) -> OperationTimer:
+    """Time an operation, e.g. ``with track("process_command") as op: ...``"""
+    return OperationTimer(operation)
+
+
+def timed(operation: str):
+    """Decorator that tracks an async function as ``operation``.
+
+    A returned dict with ``"success": False`` counts as an error.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track(operation) as tracked:
+                result = await func(*args, **kwargs)
+                if isinstance(result, dict) and result.get("success") is False:
+                    tracked.fail()
+                return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,274 @@
+"""
+Async repository functions for the Supabase tables used by the backend.
+
+Every query is executed through ``utils.db.execute`` so the synchronous
+Supabase client never blocks the event loop.
+"""
+
+from typing import Any, Dict, List, Optional
+from .db import get_supabase, execute
+
+Row = Dict[str, Any]
+
+
+def _rows(response) -> List[Row]:
+    """Return the rows of a query response, or an empty list"""
+    if response and getattr(response, "data", None):
+        return response.data
+    return []
+
+
+def _row(response) -> Optional[Row]:
+    """Return the single row of a maybe_single() response, or None"""
+    if response and getattr(response, "data", None):
+        return response.data
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Users
+# ---------------------------------------------------------------------------
+
+
+async def get_user(user_id: str, columns: str = "*") -> Optional[Row]:
+    """Fetch a single user by ID"""
+    response = await execute(
+        get_supabase().table("users").select(columns).eq("id", user_id).maybe_single()
+    )
+    return _row(response)
+
+
+async def get_users(user_ids: List[str], columns: str = "*") -> List[Row]:
+    """Fetch every user whose ID is in ``user_ids``"""
+    if not user_ids:
+        return []
+    response = await execute(
+        get_supabase().table("users").select(columns).in_("id", user_ids)
+    )
+    return _rows(response)
+
+
+async def search_users(query: str, limit: int) -> List[Row]:
+    """Substring search on user name or email in one query (``search_users`` RPC).
+
+    Name matches come first; at most ``limit`` rows are returned.
+    """
+    response = await execute(
+        get_supabase().rpc("search_users", {"query": query, "max_results": limit})
+    )
+    return _rows(response)
+
+
+# ---------------------------------------------------------------------------
+# Tickets
+# ---------------------------------------------------------------------------
+
+
+async def get_ticket(ticket_id: str, columns: str = "*") -> Optional[Row]:
+    """Fetch a single ticket by ID, optionally with joined columns"""
+    response = await execute(
+        get_supabase()
+        .table("tickets")
+        .select(columns)
+        .eq("id", ticket_id)
+        .maybe_single()
+    )
+    return _row(response)
+
+
+async def get_tickets(ticket_ids: List[str], columns: str = "*") -> List[Row]:
+    """Fetch every ticket whose ID is in ``ticket_ids`` in one query"""
+    if not ticket_ids:
+        return []
+    response = await execute(
+        get_supabase().table("tickets").select(columns).in_("id", ticket_ids)
+    )
+    return _rows(response)
+
+
+async def list_customer_tickets(customer_id: str, limit: int) -> List[Row]:
+    """Fetch a customer's most recent tickets, newest first"""
+    response = await execute(
+        get_supabase()
+        .table("tickets")
+        .select("*")
+        .eq("customer_id", customer_id)
+        .order("created_at", desc=True)
+        .limit(limit)
+    )
+    return _rows(response)
+
+
+async def list_tickets_for_customers(customer_ids: List[str], limit: int) -> List[Row]:
+    """Fetch each customer's ``limit`` most recent tickets in one query.
+
+    Uses the ``latest_customer_tickets`` RPC, which caps the rows per
+    customer in the database; rows are newest first within each customer.
+    """
+    if not customer_ids:
+        return []
+    response = await execute(
+        get_supabase().rpc(
+            "latest_customer_tickets",
+            {"customer_ids": customer_ids, "per_customer": limit},
+        )
+    )
+    return _rows(response)
+
+
+async def update_ticket(ticket_id: str, values: Row) -> List[Row]:
+    """Update a single ticket and return the updated rows"""
+    response = await execute(
+        get_supabase().table("tickets").update(values).eq("id", ticket_id)
+    )
+    return _rows(response)
+
+
+async def resolve_tickets(
+    resolutions: List[Row], author_id: str, resolved_at: str
+) -> List[str]:
+    """Resolve many tickets and record their resolutions in one transaction.
+
+    ``resolutions`` holds ``{"ticket_id", "resolution_text"}`` rows. Uses
+    the ``resolve_tickets`` RPC, which sets each ticket RESOLVED and inserts
+    its AGENT_RESOLUTION interaction together, skipping tickets that are
+    already resolved or closed. Returns the IDs of the tickets it resolved.
+    """
+    if not resolutions:
+        return []
+    response = await execute(
+        get_supabase().rpc(
+            "resolve_tickets",
+            {
+                "resolutions": resolutions,
+                "resolved_by": author_id,
+                "resolved_at": resolved_at,
+            },
+        )
+    )
+    return [str(ticket_id) for ticket_id in _rows(response)]
+
+
+# ---------------------------------------------------------------------------
+# Interactions
+# ---------------------------------------------------------------------------
+
+
+async def list_author_interactions(author_id: str, limit: int) -> List[Row]:
+    """Fetch an author's most recent interactions, newest first"""
+    response = await execute(
+        get_supabase()
+        .table("interactions")
+        .select("*")
+        .eq("author_id", author_id)
+        .order("created_at", desc=True)
+        .limit(limit)
+    )
+    return _rows(response)
+
+
+async def list_interactions_for_authors(author_ids: List[str], limit: int) -> List[Row]:
+    """Fetch each author's ``limit`` most recent interactions in one query.
+
+    Uses the ``latest_author_interactions`` RPC, which caps the rows per
+    author in the database; rows are newest first within each author.
+    """
+    if not author_ids:
+        return []
+    response = await execute(
+        get_supabase().rpc(
+            "latest_author_interactions",
+            {"author_ids": author_ids, "per_author": limit},
+        )
+    )
+    return _rows(response)
+
+
+async def insert_interaction(interaction: Row) -> List[Row]:
+    """Insert an interaction and return the created rows"""
+    response = await execute(get_supabase().table("interactions").insert(interaction))
+    return _rows(response)
+
+
+async def insert_interactions(interactions: List[Row]) -> List[Row]:
+    """Insert many interactions in one multi-row insert"""
+    if not interactions:
+        return []
+    response = await execute(get_supabase().table("interactions").insert(interactions))
+    return _rows(response)
+
+
+# ---------------------------------------------------------------------------
+# Email logs
+# ---------------------------------------------------------------------------
+
+
+async def insert_email_log(email_log: Row) -> List[Row]:
+    """Insert an email log and return the created rows"""
+    response = await execute(get_supabase().table("email_logs").insert(email_log))
+    return _rows(response)
+
+
+async def insert_email_logs(email_logs: List[Row]) -> List[Row]:
+    """Insert many email logs in one multi-row insert, rows returned in order"""
+    if not email_logs:
+        return []
+    response = await execute(get_supabase().table("email_logs").insert(email_logs))
+    return _rows(response)
+
+
+async def get_email_logs(email_log_ids: List[str], columns: str = "*") -> List[Row]:
+    """Fetch every email log whose ID is in ``email_log_ids``"""
+    if not email_log_ids:
+        return []
+    response = await execute(
+        get_supabase().table("email_logs").select(columns).in_("id", email_log_ids)
+    )
+    return _rows(response)
+
+
+# ---------------------------------------------------------------------------
+# Outreach sessions
+# ---------------------------------------------------------------------------
+
+
+async def create_outreach_session(session: Row) -> List[Row]:
+    """Insert an agent outreach session and return the created rows"""
+    response = await execute(
+        get_supabase().table("agent_outreach_sessions").insert(session)
+    )
+    return _rows(response)
+
+
+async def update_outreach_session(session_id: str, values: Row) -> List[Row]:
+    """Update an agent outreach session"""
+    response = await execute(
+        get_supabase()
+        .table("agent_outreach_sessions")
+        .update(values)
+        .eq("id", session_id)
+    )
+    return _rows(response)
+
+
+async def get_outreach_session(session_id: str, columns: str = "*") -> Optional[Row]:
+    """Fetch a single agent outreach session by ID"""
+    response = await execute(
+        get_supabase()
+        .table("agent_outreach_sessions")
+        .select(columns)
+        .eq("id", session_id)
+        .maybe_single()
+    )
+    return _row(response)
+
+
+async def list_outreach_sessions(status: str, columns: str = "*") -> List[Row]:
+    """Fetch every agent outreach session with the given status"""
+    response = await execute(
+        get_supabase()
+        .table("agent_outreach_sessions")
+        .select(columns)
+        .eq("status", status)
+    )
+    return _rows(response)
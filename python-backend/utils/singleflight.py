@@ -0,0 +1,108 @@
+"""
+Single-flight loading with a short-lived result cache.
+
+Concurrent requests for the same entity (e.g. several agents opening one
+ticket) share one in-flight fetch instead of each querying Supabase, and the
+result is reused for ``SINGLEFLIGHT_TTL`` seconds afterwards.
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .cache import TTLCache
+
+SINGLEFLIGHT_TTL = float(os.getenv("SINGLEFLIGHT_TTL", "5"))
+SINGLEFLIGHT_CACHE_SIZE = int(os.getenv("SINGLEFLIGHT_CACHE_SIZE", "10000"))
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """Coalesce concurrent loads keyed by ``(entity, id)``.
+
+    ``load`` returns a cached result when there is one (a hit), joins the
+    fetch already running for the key (coalesced), or runs ``loader`` itself
+    (a miss). Failed loads are not cached; every waiting caller gets the
+    error. The fetch is shielded, so a caller that is cancelled doesn't
+    cancel it for the others.
+
+    ``forget`` bumps the key's generation: a fetch already running when it
+    is called still answers its waiters but isn't cached, and later calls
+    start a new fetch.
+    """
+
+    def __init__(
+        self, ttl: float = SINGLEFLIGHT_TTL, max_size: int = SINGLEFLIGHT_CACHE_SIZE
+    ):
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._inflight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        # Bumped by forget; only kept for keys with a fetch in flight
+        self._generations: Dict[Tuple[str, Hashable], int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def load(
+        self, entity: str, id: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        key = (entity, id)
+        cached = self.cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            self.hits += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        generation = self._generations.get(key, 0)
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+
+        def finish(done: asyncio.Future):
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            current = self._generations.get(key, 0)
+            if key not in self._inflight:
+                self._generations.pop(key, None)
+            # Forgotten while loading: the result may predate the change
+            if current != generation:
+                return
+            if not done.cancelled() and done.exception() is None:
+                self.cache.set(key, done.result())
+
+        task.add_done_callback(finish)
+        return await asyncio.shield(task)
+
+    def prime(self, entity: str, id: Hashable, value: Any):
+        """Cache a value loaded some other way (e.g. by a bulk query)"""
+        self.cache.set((entity, id), value)
+
+    def peek(self, entity: str, id: Hashable) -> Optional[Any]:
+        """The cached value for a key, without loading or counting"""
+        return self.cache.get((entity, id))
+
+    def forget(self, entity: str, id: Hashable):
+        """Drop a cached value, e.g. after this service changed the entity.
+
+        A fetch in flight for the key is not cached when it finishes.
+        """
+        key = (entity, id)
+        self.cache.pop(key)
+        if self._inflight.pop(key, None) is not None:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+# Shared by the context fetches in the agents and routes
+context_flight = SingleFlight()
@@ -0,0 +1,266 @@
+"""
+Background telemetry queue for LangSmith calls.
+
+Request handlers call ``TelemetryQueue.submit("create_feedback", ...)`` which
+only appends to a bounded in-process queue. A dedicated worker thread drains
+it in batches and makes the blocking client calls, so telemetry never runs on
+the event loop.
+
+When the queue is full, records are appended to ``TELEMETRY_SPILL_PATH`` (a
+JSONL file) if one is configured and replayed once the queue drains, or
+dropped otherwise. ``close()`` flushes everything still queued.
+"""
+
+import json
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+TELEMETRY_QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", "10000"))
+TELEMETRY_BATCH_SIZE = int(os.getenv("TELEMETRY_BATCH_SIZE", "100"))
+TELEMETRY_FLUSH_SECONDS = float(os.getenv("TELEMETRY_FLUSH_SECONDS", "1"))
+TELEMETRY_SPILL_PATH = os.getenv("TELEMETRY_SPILL_PATH")
+
+Record = Dict[str, Any]
+
+_STOP = object()
+
+_langsmith_client = None
+
+
+def get_langsmith_client():
+    """Return the shared LangSmith client, created on first use."""
+    global _langsmith_client
+    if _langsmith_client is None:
+        from langsmith import Client
+
+        _langsmith_client = Client()
+    return _langsmith_client
+
+
+class TelemetryQueue:
+    """Bounded queue of client calls drained by a worker thread.
+
+    Each record is a client method name plus its arguments. Within a batch,
+    consecutive ``update_run`` calls for the same run are merged, and updates
+    that follow a ``create_run`` in the same batch are folded into it, so a
+    short-lived run costs a single request.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        max_size: int = TELEMETRY_QUEUE_SIZE,
+        batch_size: int = TELEMETRY_BATCH_SIZE,
+        flush_interval: float = TELEMETRY_FLUSH_SECONDS,
+        spill_path: Optional[str] = TELEMETRY_SPILL_PATH,
+    ):
+        self._client_factory = client_factory
+        self._client = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def submit(self, method: str, *args, **kwargs) -> bool:
+        """Queue a client call without blocking. Returns False if dropped."""
+        self.start()
+        record = {"method": method, "args": list(args), "kwargs": kwargs}
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            if self.spill_path and self._spill([record]):
+                return True
+            self.dropped += 1
+            return False
+
+    def start(self):
+        """Start the worker thread if it isn't running"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="telemetry", daemon=True
+            )
+            self._thread.start()
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every queued record has been processed"""
+        if not self._thread or not self._thread.is_alive():
+            self._drain_inline()
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Flush remaining records and stop the worker"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self._drain_inline()
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def _run(self):
+        self._replay_spill()
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._replay_spill()
+                continue
+
+            batch, markers, stop = [], [], False
+            item = first
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+            if self._queue.empty():
+                self._replay_spill()
+            for marker in markers:
+                marker.set()
+            if stop:
+                return
+
+    def _drain_inline(self):
+        """Process whatever is left on the calling thread"""
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _STOP:
+                batch.append(item)
+        self._process(batch)
+        self._replay_spill()
+
+    def _process(self, batch: List[Record]):
+        for record in coalesce(batch):
+            try:
+                getattr(self.client, record["method"])(
+                    *record["args"], **record["kwargs"]
+                )
+                self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Error sending telemetry ({record['method']}): {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Disk spill
+    # ------------------------------------------------------------------
+
+    def _spill(self, records: List[Record]) -> bool:
+        try:
+            with self._spill_lock, open(self.spill_path, "a") as f:
+                for record in records:
+                    f.write(json.dumps(record, default=_serialize) + "\n")
+            self.spilled += len(records)
+            return True
+        except Exception as e:
+            print(f"Error spilling telemetry to disk: {str(e)}")
+            return False
+
+    def _replay_spill(self):
+        """Send records spilled to disk, including ones left by a previous run"""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        processing = f"{self.spill_path}.{uuid.uuid4().hex}"
+        with self._spill_lock:
+            try:
+                os.replace(self.spill_path, processing)
+            except FileNotFoundError:
+                return
+
+        batch = []
+        with open(processing) as f:
+            for line in f:
+                batch.append(json.loads(line))
+                if len(batch) >= self.batch_size:
+                    self._process(batch)
+                    batch = []
+        self._process(batch)
+        os.remove(processing)
+
+
+def coalesce(batch: List[Record]) -> List[Record]:
+    """Merge run updates into the create or update they follow"""
+    merged: List[Record] = []
+    pending: Dict[str, Record] = {}
+
+    for record in batch:
+        method = record["method"]
+        if method == "create_run" and record["kwargs"].get("id"):
+            record = _copy(record)
+            pending[str(record["kwargs"]["id"])] = record
+        elif method == "update_run":
+            run_id = str(record["kwargs"].get("run_id") or record["args"][0])
+            target = pending.get(run_id)
+            if target is not None:
+                updates = dict(record["kwargs"])
+                updates.pop("run_id", None)
+                target["kwargs"].update(updates)
+                continue
+            record = _copy(record)
+            pending[run_id] = record
+        merged.append(record)
+
+    return merged
+
+
+def _copy(record: Record) -> Record:
+    return {
+        "method": record["method"],
+        "args": list(record["args"]),
+        "kwargs": dict(record["kwargs"]),
+    }
+
+
+def _serialize(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+# Shared queue for LangSmith runs, feedback and examples
+telemetry = TelemetryQueue(get_langsmith_client)
@@ -0,0 +1,103 @@
+"""
+User search for the recipient picker, with an autocomplete cache.
+
+Each search is a single ``search_users`` RPC (see the
+``20250124000000_add_user_search`` migration) that matches name or email
+using trigram indexes and returns at most ``USER_SEARCH_LIMIT`` rows.
+
+Keystroke-driven searches arrive as growing prefixes ("a", "ad", "ada").
+Results are cached per query for ``USER_SEARCH_CACHE_TTL`` seconds, and when
+a shorter prefix returned fewer than the limit, that result already holds
+every match for the longer query, so it is filtered locally instead of
+querying again.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from . import repositories
+from .cache import TTLCache
+
+USER_SEARCH_LIMIT = 10
+USER_SEARCH_CACHE_TTL = float(os.getenv("USER_SEARCH_CACHE_TTL", "30"))
+USER_SEARCH_CACHE_SIZE = int(os.getenv("USER_SEARCH_CACHE_SIZE", "2048"))
+
+Row = Dict
+
+
+def _matches(value: Optional[str], query: str) -> bool:
+    return query in (value or "").lower()
+
+
+def rank_users(rows: List[Row], query: str) -> List[Row]:
+    """Order matches like the RPC: name matches first, then by name and email"""
+    query = query.lower()
+    return sorted(
+        rows,
+        key=lambda user: (
+            not _matches(user.get("name"), query),
+            (user.get("name") or "").lower(),
+            (user.get("email") or "").lower(),
+        ),
+    )
+
+
+class UserSearchCache:
+    """Search results keyed by lower-cased query, reusable for longer queries"""
+
+    def __init__(
+        self,
+        limit: int = USER_SEARCH_LIMIT,
+        ttl: float = USER_SEARCH_CACHE_TTL,
+        max_size: int = USER_SEARCH_CACHE_SIZE,
+    ):
+        self.limit = limit
+        self._results = TTLCache(max_size=max_size, ttl=ttl)
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[List[Row]]:
+        key = query.lower()
+        rows = self._results.get(key)
+        if rows is not None:
+            self.hits += 1
+            return rows
+
+        # A complete result for a shorter prefix contains every match
+        for end in range(len(key) - 1, 0, -1):
+            prefix_rows = self._results.get(key[:end])
+            if prefix_rows is not None and len(prefix_rows) < self.limit:
+                rows = rank_users(
+                    [
+                        user
+                        for user in prefix_rows
+                        if _matches(user.get("name"), key)
+                        or _matches(user.get("email"), key)
+                    ],
+                    key,
+                )
+                self._results.set(key, rows)
+                self.prefix_hits += 1
+                return rows
+
+        self.misses += 1
+        return None
+
+    def set(self, query: str, rows: List[Row]):
+        self._results.set(query.lower(), rows)
+
+    def clear(self):
+        self._results.clear()
+
+
+search_cache = UserSearchCache()
+
+
+async def search_users(query: str) -> List[Row]:
+    """Up to USER_SEARCH_LIMIT users whose name or email contains ``query``"""
+    rows = search_cache.get(query)
+    if rows is None:
+        rows = await repositories.search_users(query, search_cache.limit)
+        search_cache.set(query, rows)
+    return rows
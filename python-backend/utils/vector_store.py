@@ -0,0 +1,323 @@
+"""
+Vector store backends for OutreachAgent.
+
+``create_vector_store`` picks the backend from ``VECTOR_STORE_BACKEND``:
+
+- ``pinecone`` (default): the hosted Pinecone index.
+- ``local``: an in-process NumPy index (``LocalVectorStore``), optionally
+  persisted to ``LOCAL_VECTOR_STORE_PATH`` and memory-mapped on load.
+"""
+
+import json
+import os
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH")
+
+# Metadata key used to pre-filter candidates before scoring
+INDEXED_METADATA_KEY = "customer_id"
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector index over a normalized float32 matrix.
+
+    Rows are L2-normalized on insert so cosine similarity is a single
+    matrix-vector product. A per-customer index narrows filtered lookups to
+    that customer's rows before scoring; any other filter keys are matched
+    exactly against the row metadata.
+
+    When ``path`` is set, vectors are appended to ``<path>/vectors.f32`` and
+    metadata to ``<path>/metadata.jsonl``; the vector file is memory-mapped
+    rather than read into memory.
+
+    Writes and the row lookup of each search hold a lock, so the store can
+    be shared by executor threads; embedding and scoring run outside it.
+    """
+
+    def __init__(self, embedding: Embeddings, path: Optional[str] = None):
+        self._embedding = embedding
+        self.path = path
+        self._dim: Optional[int] = None
+        self._count = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._ids: List[str] = []
+        self._index: Dict[Any, List[int]] = {}
+        self._lock = threading.Lock()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _metadata_path(self) -> str:
+        return os.path.join(self.path, "metadata.jsonl")
+
+    def _load(self):
+        if not os.path.exists(self._metadata_path):
+            return
+        with open(self._metadata_path) as f:
+            for line in f:
+                record = json.loads(line)
+                self._dim = record["dim"]
+                self._register(record["id"], record["text"], record["metadata"])
+        self._remap()
+
+    def _remap(self):
+        """Memory-map the vector file for the rows written so far"""
+        if self._count:
+            self._matrix = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(self._count, self._dim),
+            )
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _register(self, id_: str, text: str, metadata: Dict[str, Any]):
+        row = len(self._ids)
+        self._ids.append(id_)
+        self._texts.append(text)
+        self._metadatas.append(metadata)
+        self._index.setdefault(metadata.get(INDEXED_METADATA_KEY), []).append(row)
+        self._count = row + 1
+
+    def _append_vectors(self, vectors: np.ndarray):
+        if self.path:
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            return
+
+        start = self._count - len(vectors)
+        if self._matrix is None or self._matrix.shape[0] < self._count:
+            capacity = max(
+                self._count, 2 * (0 if self._matrix is None else len(self._matrix)), 64
+            )
+            grown = np.empty((capacity, self._dim), dtype=np.float32)
+            if self._matrix is not None and start:
+                grown[:start] = self._matrix[:start]
+            self._matrix = grown
+        self._matrix[start : self._count] = vectors
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+
+        vectors = _normalize(np.asarray(self._embedding.embed_documents(texts)))
+
+        # Rows must be registered, written and mapped as one step: a search
+        # in between would index rows the matrix doesn't hold yet
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._dim}"
+                )
+
+            for id_, text, metadata in zip(ids, texts, metadatas):
+                self._register(id_, text, metadata)
+            self._append_vectors(vectors)
+
+            if self.path:
+                with open(self._metadata_path, "a") as f:
+                    for id_, text, metadata in zip(ids, texts, metadatas):
+                        f.write(
+                            json.dumps(
+                                {
+                                    "id": id_,
+                                    "text": text,
+                                    "metadata": metadata,
+                                    "dim": self._dim,
+                                }
+                            )
+                            + "\n"
+                        )
+                self._remap()
+
+        return ids
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _candidates(self, filter: Optional[dict]) -> np.ndarray:
+        """Row numbers that satisfy ``filter``"""
+        filter = dict(filter or {})
+        if INDEXED_METADATA_KEY in filter:
+            rows = self._index.get(filter.pop(INDEXED_METADATA_KEY), [])
+        else:
+            rows = range(self._count)
+        if filter:
+            rows = [
+                row
+                for row in rows
+                if all(self._metadatas[row].get(k) == v for k, v in filter.items())
+            ]
+        return np.fromiter(rows, dtype=np.int64)
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        with self._lock:
+            if not self._count:
+                return []
+            rows = self._candidates(filter)
+            if not len(rows):
+                return []
+            # Fancy indexing copies the rows, so scoring can run unlocked
+            matrix = self._matrix[rows]
+
+        query = _normalize(np.asarray([embedding]))[0]
+        scores = matrix @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            (
+                Document(
+                    page_content=self._texts[rows[i]],
+                    metadata=self._metadatas[rows[i]],
+                ),
+                float(scores[i]),
+            )
+            for i in top
+        ]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_by_vector_with_score(
+                embedding, k=k, filter=filter
+            )
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)
+        ]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        path: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, path=path)
+        store.add_texts(texts, metadatas=metadatas, **kwargs)
+        return store
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = vectors.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def create_vector_store(
+    embedding: Embeddings, backend: Optional[str] = None
+) -> VectorStore:
+    """Create the configured vector store backend for outreach interactions"""
+    backend = (backend or VECTOR_STORE_BACKEND).lower()
+
+    if backend == "local":
+        store = LocalVectorStore(embedding, path=LOCAL_VECTOR_STORE_PATH)
+        print(f"✓ Using local vector store ({len(store)} vectors)")
+        return store
+
+    if backend == "pinecone":
+        return _create_pinecone_store(embedding)
+
+    raise ValueError(
+        f"Unknown VECTOR_STORE_BACKEND '{backend}'. Use 'pinecone' or 'local'"
+    )
+
+
+def _create_pinecone_store(embedding: Embeddings) -> VectorStore:
+    from langchain_community.vectorstores import Pinecone
+    from pinecone import Pinecone as PineconeClient
+
+    pinecone_api_key = os.getenv("PINECONE_API_KEY")
+    pinecone_environment = os.getenv("PINECONE_ENVIRONMENT")
+    pinecone_index_name = os.getenv("PINECONE_INDEX", "ticket-ai")
+
+    if not pinecone_api_key or not pinecone_environment:
+        raise ValueError(
+            "Missing Pinecone credentials. Please ensure PINECONE_API_KEY and PINECONE_ENVIRONMENT are set in your .env file"
+        )
+
+    # Initialize Pinecone client using the modern class-based API
+    PineconeClient(api_key=pinecone_api_key, environment=pinecone_environment)
+
+    try:
+        store = Pinecone.from_existing_index(
+            index_name=pinecone_index_name,
+            embedding=embedding,
+            namespace="outreach",
+        )
+        print(f"✓ Successfully connected to Pinecone index: {pinecone_index_name}")
+        return store
+    except Exception as e:
+        print(f"Error initializing Pinecone: {e}")
+        raise
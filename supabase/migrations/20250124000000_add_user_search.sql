@@ -0,0 +1,35 @@
+-- Trigram indexes so substring searches on name and email can use an index
+-- instead of scanning every user (ILIKE '%q%' needs at least 3 characters)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS users_name_trgm_idx ON users USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS users_email_trgm_idx ON users USING gin (email gin_trgm_ops);
+
+-- Drop existing function first to avoid conflicts
+DROP FUNCTION IF EXISTS search_users(TEXT, INTEGER);
+
+-- Case-insensitive substring search on name or email in a single query.
+-- Name matches come first, then alphabetical by name and email (byte order,
+-- so clients can re-sort cached results the same way). LIKE wildcards in
+-- the query are matched literally.
+CREATE OR REPLACE FUNCTION search_users(query TEXT, max_results INTEGER DEFAULT 10)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    email TEXT,
+    avatar_url TEXT
+) LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    pattern TEXT := '%' || replace(replace(replace(query, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+BEGIN
+    RETURN QUERY
+    SELECT u.id, u.name, u.email, u.avatar_url
+    FROM users u
+    WHERE u.name ILIKE pattern OR u.email ILIKE pattern
+    ORDER BY
+        coalesce(u.name ILIKE pattern, false) DESC,
+        lower(coalesce(u.name, '')) COLLATE "C",
+        lower(coalesce(u.email, '')) COLLATE "C"
+    LIMIT max_results;
+END;
+$$;
@@ -0,0 +1,46 @@
+-- Latest tickets / interactions for many customers in one call, capped per
+-- customer in the database. A plain in_() read returns every row of every
+-- customer and is truncated by PostgREST's max-rows, which can push whole
+-- customers out of the result.
+CREATE INDEX IF NOT EXISTS tickets_customer_created_idx
+    ON tickets (customer_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS interactions_author_created_idx
+    ON interactions (author_id, created_at DESC);
+
+-- Drop existing functions first to avoid conflicts
+DROP FUNCTION IF EXISTS latest_customer_tickets(UUID[], INTEGER);
+DROP FUNCTION IF EXISTS latest_author_interactions(UUID[], INTEGER);
+
+-- Each customer's newest per_customer tickets, newest first per customer
+CREATE OR REPLACE FUNCTION latest_customer_tickets(
+    customer_ids UUID[],
+    per_customer INTEGER DEFAULT 5
+)
+RETURNS SETOF tickets LANGUAGE sql STABLE AS $$
+    SELECT t.*
+    FROM unnest(customer_ids) AS c(id)
+    CROSS JOIN LATERAL (
+        SELECT *
+        FROM tickets
+        WHERE tickets.customer_id = c.id
+        ORDER BY tickets.created_at DESC
+        LIMIT per_customer
+    ) t;
+$$;
+
+-- Each author's newest per_author interactions, newest first per author
+CREATE OR REPLACE FUNCTION latest_author_interactions(
+    author_ids UUID[],
+    per_author INTEGER DEFAULT 5
+)
+RETURNS SETOF interactions LANGUAGE sql STABLE AS $$
+    SELECT i.*
+    FROM unnest(author_ids) AS a(id)
+    CROSS JOIN LATERAL (
+        SELECT *
+        FROM interactions
+        WHERE interactions.author_id = a.id
+        ORDER BY interactions.created_at DESC
+        LIMIT per_author
+    ) i;
+$$;
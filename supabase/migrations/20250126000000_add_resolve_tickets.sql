@@ -0,0 +1,45 @@
+-- Resolve many tickets and record their AGENT_RESOLUTION interactions in one
+-- statement, so the status update and the interaction insert commit or roll
+-- back together. Tickets that are already RESOLVED or CLOSED are skipped,
+-- which makes retrying a batch safe.
+
+-- Drop existing function first to avoid conflicts
+DROP FUNCTION IF EXISTS resolve_tickets(JSONB, UUID, TIMESTAMPTZ);
+
+-- resolutions is a JSON array of {"ticket_id", "resolution_text"} objects.
+-- Returns the IDs of the tickets this call resolved.
+CREATE OR REPLACE FUNCTION resolve_tickets(
+    resolutions JSONB,
+    resolved_by UUID,
+    resolved_at TIMESTAMPTZ DEFAULT now()
+)
+RETURNS SETOF UUID LANGUAGE sql VOLATILE AS $$
+    WITH input AS (
+        SELECT (r->>'ticket_id')::UUID AS ticket_id,
+               r->>'resolution_text' AS resolution_text
+        FROM jsonb_array_elements(resolutions) AS r
+    ),
+    resolved AS (
+        UPDATE tickets
+        SET status = 'RESOLVED',
+            resolved_at = resolve_tickets.resolved_at
+        FROM input
+        WHERE tickets.id = input.ticket_id
+          AND tickets.status NOT IN ('RESOLVED', 'CLOSED')
+        RETURNING tickets.id
+    ),
+    created AS (
+        INSERT INTO interactions (ticket_id, author_id, type, content)
+        SELECT input.ticket_id,
+               resolved_by,
+               'AGENT_RESOLUTION',
+               jsonb_build_object(
+                   'resolution_text', input.resolution_text,
+                   'automated', true
+               )
+        FROM input
+        JOIN resolved ON resolved.id = input.ticket_id
+        RETURNING interactions.ticket_id
+    )
+    SELECT created.ticket_id FROM created;
+$$;